@@ -0,0 +1,175 @@
+from reachability_explicit import ReachabilityNet
+from reachability_bdd import SymbolicReachabilityPyEDA
+from ilp_deadlock import DeadlockDetector
+from optimization import OptimizationReachability
+from result_cache import options_key
+
+
+class AnalysisSession:
+    """
+    Giữ một mạng Petri đã parse và tính mỗi kết quả trung gian nhiều nhất một lần,
+    khi có task cần tới: kiểm tra hợp lệ, ma trận pre/post, tập reachable tường
+    minh (bfs), tập reachable BDD. Mọi task dùng chung các kết quả này.
+    cache: ResultCache tùy chọn; có thì mọi kết quả được tra trên đĩa trước khi tính.
+    """
+
+    def __init__(self, net, bdd_backend=None, strategy="monolithic", cache=None):
+        self.net = net
+        self.bdd_backend = bdd_backend
+        self.strategy = strategy
+        self.cache = cache
+        self._valid = None
+        self._compiled = False
+        self._explicit = None     # (markings, time, mem) của bfs()
+        self._symbolic_net = None
+        self._symbolic = None     # kết quả compute_reachable(readable=False)
+        self._formulas = None     # công thức đọc được của Task 3 (chỉ khi in ra)
+        self.cache_hits = {}      # task -> lần tính gần nhất lấy từ ResultCache hay không
+
+    @classmethod
+    def from_pnml(cls, filename, **options):
+        """Parse file PNML (hoặc nạp file nhị phân .pnb); trả về None nếu thất bại."""
+        if filename.endswith(".pnb"):
+            try:
+                return cls(ReachabilityNet.load_binary(filename), **options)
+            except (OSError, ValueError) as e:
+                print("Lỗi khi đọc file mạng nhị phân:", e)
+                return None
+        net = ReachabilityNet()
+        if not net.parse_pnml(filename):
+            return None
+        return cls(net, **options)
+
+    def _cached(self, kind, compute):
+        task = kind.split("-")[0]
+        value = self.cache.get(self.net, kind) if self.cache is not None else None
+        self.cache_hits[task] = value is not None
+        if value is None:
+            value = compute()
+            if self.cache is not None:
+                self.cache.put(self.net, kind, value)
+        return value
+
+    def from_cache(self, task):
+        """
+        True nếu kết quả gần nhất của `task` ('explicit', 'symbolic', 'deadlock',
+        'optimize') lấy từ ResultCache: thời gian, bộ nhớ kèm theo là của lần tính cũ.
+        """
+        return self.cache_hits.get(task, False)
+
+    def _share_structure(self, other):
+        other.places, other.transitions, other.arcs = self.net.places, self.net.transitions, self.net.arcs
+        other.arc_weights = self.net.arc_weights
+        self.net.compile()
+        other._compiled = self.net._compiled  # mọi engine dùng chung một CompiledNet
+        return other
+
+    def is_valid(self):
+        if self._valid is None:
+            self._valid = self.net.check_consistency()
+        return self._valid
+
+    def matrices(self):
+        """Mạng đã có pre/post và ma trận (pre_matrix, post_matrix, incidence)."""
+        if not self._compiled:
+            if not self.net.pre and self.net.transitions:
+                self.net.build_pre_post()
+            self.net.compile_matrices()
+            self._compiled = True
+        return self.net
+
+    def explicit(self):
+        """Kết quả bfs(): (markings, time, mem)."""
+        if self._explicit is None:
+            if not self.net.pre and self.net.transitions:
+                self.net.build_pre_post()
+            self._explicit = self._cached("explicit", self.net.bfs)
+        return self._explicit
+
+    def symbolic_net(self):
+        if self._symbolic_net is None:
+            self._symbolic_net = self._share_structure(SymbolicReachabilityPyEDA(self.bdd_backend))
+        return self._symbolic_net
+
+    def symbolic(self):
+        """
+        Kết quả compute_reachable(): (count, time, mem, info); BDD nằm trong
+        symbolic_net().current_set. info không có công thức đọc được (xem symbolic_formulas()).
+        """
+        if self._symbolic is None:
+            sym = self.symbolic_net()
+            kind = "symbolic-" + options_key(self.strategy, sym.backend.name, sym.variable_order, sym.interleave)
+
+            def compute():
+                result = sym.compute_reachable(return_formula=True, strategy=self.strategy, readable=False)
+                states = sym.export_states(sym.current_set) if hasattr(sym, 'current_set') else None
+                return result, states
+
+            self._symbolic, states = self._cached(kind, compute)
+            if states is not None and not hasattr(sym, 'current_set'):
+                sym.setup_variables()
+                sym.current_set = sym.import_states(states)
+        return self._symbolic
+
+    def symbolic_formulas(self):
+        """
+        {'initial', 'final'}: công thức đọc được của M0 và của tập reachable. Liệt kê
+        từng trạng thái nên chỉ dùng để in; không lưu vào ResultCache.
+        """
+        if self._formulas is None:
+            _, _, _, info = self.symbolic()
+            sym = self.symbolic_net()
+            if not info.get('valid', True):
+                self._formulas = {'initial': info['initial'], 'final': info['final']}
+            else:
+                self._formulas = {'initial': sym.bdd_to_readable_formula(sym.encode_initial_marking()),
+                                  'final': sym.bdd_to_readable_formula(sym.current_set)}
+        return self._formulas
+
+    def reachable_bdd(self):
+        self.symbolic()
+        return getattr(self.symbolic_net(), 'current_set', None)
+
+    def deadlock_detector(self):
+        if self.is_valid():
+            self.matrices()
+        return DeadlockDetector(self.net, self.symbolic_net())
+
+    def detect_deadlock(self, method="ilp", **options):
+        def compute():
+            if method in ("ilp", "symbolic"):
+                self.symbolic()  # fixpoint BDD dùng chung với Task 3
+            return self.deadlock_detector().detect_deadlock(method=method, strategy=self.strategy, **options)
+
+        return self._cached("deadlock-" + options_key(method, self.strategy, options), compute)
+
+    def optimize(self, objective_weights, method="explicit"):
+        """
+        method="explicit": optimize_marking() trên tập reachable tường minh đã tính
+        (không BFS lại); "symbolic": quy hoạch động trên BDD reachable của Task 3;
+        "bnb": branch-and-bound theo cận phương trình trạng thái, không cần bfs().
+        """
+        def compute():
+            if method == "symbolic":
+                self.symbolic()
+                return self.symbolic_net().optimize_symbolic(objective_weights, strategy=self.strategy)
+            opt_net = self._share_structure(OptimizationReachability())
+            if method == "bnb":
+                net = self.matrices()
+                opt_net.pre, opt_net.post = net.pre, net.post
+                opt_net.place_order, opt_net.transition_order = net.place_order, net.transition_order
+                opt_net.pre_matrix, opt_net.post_matrix, opt_net.incidence = net.pre_matrix, net.post_matrix, net.incidence
+                return opt_net.optimize_branch_and_bound(objective_weights)
+            opt_net.pre, opt_net.post = self.net.pre, self.net.post
+            return opt_net.optimize_marking(objective_weights, self.explicit())
+
+        return self._cached("optimize-" + options_key(objective_weights, method), compute)
+
+    def optimize_batch(self, objectives, chunk_size=65536):
+        """Nhiều hàm mục tiêu trên cùng tập reachable tường minh: optimize_batch() một lần duyệt."""
+        def compute():
+            opt_net = self._share_structure(OptimizationReachability())
+            opt_net.pre, opt_net.post = self.net.pre, self.net.post
+            return opt_net.optimize_batch(objectives, self.explicit(), chunk_size)
+
+        return self._cached("optimize-batch-" + options_key(objectives), compute)
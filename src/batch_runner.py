@@ -0,0 +1,331 @@
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+import numpy as np
+
+import metrics
+from analysis_session import AnalysisSession
+from optimization import parse_objective
+from result_cache import ResultCache
+
+try:
+    import resource
+except ImportError:  # Windows: không giới hạn được bộ nhớ, không có ru_maxrss
+    resource = None
+
+# Chạy không tương tác nhiều mạng: mỗi mạng là một job chạy trong tiến trình con riêng
+# (tối đa `workers` job cùng lúc), có timeout và giới hạn bộ nhớ, ghi một file JSON
+# kết quả cho mỗi mạng vào thư mục output.
+# status: ok | invalid (mạng không hợp lệ, chỉ có Task 3, 4) | error | timeout | memory | crashed
+FAILED = ("error", "timeout", "memory", "crashed")
+
+
+def discover(source):
+    """
+    Danh sách file mạng: `source` là thư mục (mọi *.pnml, *.pnb, sắp theo tên) hoặc
+    manifest (mỗi dòng một đường dẫn, tương đối theo thư mục chứa manifest; dòng
+    trống và phần sau '#' bị bỏ qua).
+    """
+    if os.path.isdir(source):
+        return [os.path.join(source, f) for f in sorted(os.listdir(source)) if f.endswith((".pnml", ".pnb"))]
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                paths.append(os.path.join(base, line))
+    return paths
+
+
+def load_net_objectives(filename):
+    """
+    File hàm mục tiêu theo mạng, mỗi dòng 'tên_mạng: p1=2 p3=-1' (một mạng có thể có
+    nhiều dòng); tên là tên file (có hoặc không có đuôi), '*' áp dụng cho mạng không có
+    dòng riêng. Trả về {tên: [(chuỗi mục tiêu, 'file:dòng')]}; place chỉ được kiểm tra
+    khi chạy job (lỗi -> status 'error' của mạng đó).
+    """
+    objectives = {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            name, sep, text = line.partition(":")
+            if not sep or not name.strip():
+                raise ValueError(f"{filename}:{line_no}: thiếu 'tên_mạng:' ở đầu dòng")
+            objectives.setdefault(name.strip(), []).append((text.strip(), f"{filename}:{line_no}"))
+    return objectives
+
+
+def objectives_for(path, objectives):
+    name = os.path.basename(path)
+    keys = dict.fromkeys((name, os.path.splitext(name)[0], path))
+    matched = [objective for key in keys for objective in objectives.get(key, [])]
+    return matched or objectives.get("*", [])
+
+
+def _jsonable(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset, tuple)):
+        return sorted(value)
+    raise TypeError(f"không ghi được {type(value).__name__} ra JSON")
+
+
+def write_result(filename, result):
+    """Ghi JSON qua file tạm rồi đổi tên: không bao giờ để lại file kết quả ghi dở."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False, default=_jsonable)
+        os.replace(tmp, filename)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def analyze(path, objectives, result, deadlock_method="ilp", opt_method="explicit", cache=None):
+    """
+    Task 1-5 của main.test_file() trên một mạng, không hỏi bàn phím; kết quả ghi dần vào
+    dict `result` để lỗi giữa chừng vẫn giữ phần đã tính.
+    objectives: [(chuỗi 'p1=2 p3=-1', vị trí trong file)]; rỗng -> mọi trọng số = 1.
+    """
+    session = AnalysisSession.from_pnml(path, cache=cache)
+    if session is None:
+        raise ValueError("Parsing failed")
+    net = session.net
+    result.update(places=len(net.places), transitions=len(net.transitions), arcs=len(net.arcs))
+
+    valid = session.is_valid()
+    result['valid'] = valid
+    if valid:
+        markings, exec_time, _ = session.explicit()
+        result['explicit'] = {'states': len(markings), 'seconds': exec_time,
+                              'cached': session.from_cache('explicit')}
+
+    try:
+        count, exec_time, _, formulas = session.symbolic()
+        result['symbolic'] = {'states': count, 'seconds': exec_time, 'iterations': formulas.get('iterations'),
+                              'cached': session.from_cache('symbolic')}
+    except ValueError as e:  # mạng không 1-safe: bỏ Task 3, các task khác vẫn chạy
+        result['symbolic'] = {'error': str(e)}
+
+    method = deadlock_method
+    if not valid and method in ("por", "state_equation"):
+        method = "ilp"  # như main.test_file(): hai cách này cần mạng hợp lệ
+    dead_marking, elapsed_time, message = session.detect_deadlock(method, max_attempts=20)
+    result['deadlock'] = {'method': method, 'found': dead_marking is not None,
+                          'marking': dead_marking, 'message': message, 'seconds': elapsed_time,
+                          'cached': session.from_cache('deadlock')}
+
+    if not valid:
+        result['status'] = "invalid"
+        return result
+
+    weights = [parse_objective(text, net.places, where) for text, where in objectives]
+    weights = weights or [{p: 1 for p in net.places}]
+    optimized = []
+    if opt_method == "explicit":
+        values, best, _, exec_time, _ = session.optimize_batch(weights)
+        optimized = [{'weights': w, 'value': v, 'marking': m} for w, v, m in zip(weights, values, best)]
+    else:
+        for w in weights:
+            marking, value, _, exec_time, _ = session.optimize(w, opt_method)
+            optimized.append({'weights': w, 'value': value, 'marking': marking})
+    result['optimize'] = {'method': opt_method, 'objectives': optimized, 'cached': session.from_cache('optimize')}
+    return result
+
+
+def run_job(path, output, objectives, options):
+    """Thân của tiến trình con: tách nhóm tiến trình, đặt giới hạn bộ nhớ, chạy analyze(), ghi JSON."""
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    memory_mb = options.get('memory_mb')
+    if memory_mb and resource is not None:
+        limit = int(memory_mb * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    result = {'net': path, 'status': "ok"}
+    log = io.StringIO()
+    start = time.perf_counter()
+    with metrics.recording(trace_memory=False) as recorded, contextlib.redirect_stdout(log):
+        try:
+            cache = ResultCache() if options.get('cache', True) else None
+            analyze(path, objectives, result, options.get('deadlock_method', "ilp"),
+                    options.get('opt_method', "explicit"), cache)
+        except MemoryError:
+            result.update(status="memory", error=f"vượt giới hạn bộ nhớ {memory_mb} MB")
+        except Exception as e:
+            result.update(status="error", error=f"{type(e).__name__}: {e}")
+    result['seconds'] = time.perf_counter() - start
+    if resource is not None:
+        result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    result['metrics'] = recorded.to_dict()
+    result['log'] = log.getvalue()[-4000:]
+    write_result(output, result)
+
+
+SUMMARY = "summary.json"
+
+
+def _output_names(paths):
+    """
+    Tên file kết quả theo tên mạng; trùng tên (manifest từ nhiều thư mục, hay mạng tên
+    'summary' trùng SUMMARY) thì thêm -k, với k nhỏ nhất chưa bị dùng.
+    """
+    names, taken = [], {SUMMARY}
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, k = f"{stem}.json", 0
+        while name in taken:
+            k += 1
+            name = f"{stem}-{k}.json"
+        taken.add(name)
+        names.append(name)
+    return names
+
+
+def _kill_group(proc):
+    """
+    Kill cả nhóm tiến trình của job (run_job() tự làm trưởng nhóm): giết riêng job sẽ bỏ
+    lại tiến trình cháu, vd. cbc do PuLP chạy, tiếp tục chiếm CPU sau timeout.
+    """
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass  # nhóm đã trống, hoặc job chưa kịp setpgrp()
+    if proc.exitcode is None:
+        proc.kill()
+
+
+def run_batch(paths, output_dir, objectives=None, workers=None, timeout=None, memory_mb=None,
+              deadlock_method="ilp", opt_method="explicit", cache=True, resume=False, progress=None):
+    """
+    Chạy mọi mạng trong `paths`, mỗi mạng một tiến trình con, tối đa `workers` tiến trình
+    cùng lúc (mặc định số CPU). Job quá `timeout` giây bị kill (status 'timeout'); job
+    chết không ghi được kết quả (vd. bị OOM killer) có status 'crashed'.
+    resume=True: bỏ qua mạng đã có file kết quả không thất bại.
+    Ghi thêm summary.json; trả về list tóm tắt {net, file, status, seconds}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    objectives = objectives or {}
+    workers = workers or os.cpu_count() or 1
+    options = {'memory_mb': memory_mb, 'deadlock_method': deadlock_method,
+               'opt_method': opt_method, 'cache': cache}
+    ctx = multiprocessing.get_context()
+
+    summary = []
+    pending = deque()
+    for path, name in zip(paths, _output_names(paths)):
+        output = os.path.join(output_dir, name)
+        if resume and os.path.exists(output):
+            with open(output, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            if previous.get('status') not in FAILED:
+                summary.append({'net': path, 'file': name, 'status': previous['status'],
+                                'seconds': previous.get('seconds'), 'resumed': True})
+                continue
+            os.remove(output)
+        pending.append((path, name, output))
+
+    def finish(entry):
+        summary.append(entry)
+        if progress is not None:
+            progress(entry)
+
+    running = {}  # sentinel -> (process, path, name, output, thời điểm bắt đầu)
+    while pending or running:
+        while pending and len(running) < workers:
+            path, name, output = pending.popleft()
+            proc = ctx.Process(target=run_job, args=(path, output, objectives_for(path, objectives), options))
+            proc.start()
+            running[proc.sentinel] = (proc, path, name, output, time.perf_counter())
+
+        now = time.perf_counter()
+        deadline = None
+        if timeout is not None:
+            deadline = max(0.0, min(start + timeout for _, _, _, _, start in running.values()) - now)
+        ready = set(wait(list(running), timeout=deadline))
+
+        now = time.perf_counter()
+        for sentinel, (proc, path, name, output, start) in list(running.items()):
+            elapsed = now - start
+            if sentinel in ready:
+                proc.join()
+                _kill_group(proc)  # tiến trình cháu mồ côi nếu job chết giữa chừng
+            elif timeout is not None and elapsed >= timeout:
+                _kill_group(proc)
+                proc.join()
+                write_result(output, {'net': path, 'status': "timeout", 'seconds': elapsed,
+                                      'error': f"vượt quá {timeout} giây"})
+            else:
+                continue
+            del running[sentinel]
+            if not os.path.exists(output):
+                write_result(output, {'net': path, 'status': "crashed", 'seconds': elapsed,
+                                      'error': f"tiến trình kết thúc với mã {proc.exitcode}"})
+            with open(output, 'r', encoding='utf-8') as f:
+                status = json.load(f)['status']
+            finish({'net': path, 'file': name, 'status': status, 'seconds': elapsed})
+
+    write_result(os.path.join(output_dir, SUMMARY), summary)
+    return summary
+
+
+def _option(name, default=None):
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+if __name__ == "__main__":
+    # python batch_runner.py <thư mục | manifest> --output DIR [--objectives FILE] [--workers N]
+    #     [--timeout S] [--memory-mb M] [--por | --symbolic | --state-equation]
+    #     [--symbolic-opt | --bnb] [--no-cache] [--resume]
+    if len(sys.argv) < 2 or sys.argv[1].startswith("--"):
+        print("Usage: python batch_runner.py <directory|manifest> --output DIR [options]")
+        exit(2)
+
+    deadlock_method = "ilp"
+    if "--por" in sys.argv[2:]:
+        deadlock_method = "por"
+    elif "--symbolic" in sys.argv[2:]:
+        deadlock_method = "symbolic"
+    elif "--state-equation" in sys.argv[2:]:
+        deadlock_method = "state_equation"
+    opt_method = "explicit"
+    if "--symbolic-opt" in sys.argv[2:]:
+        opt_method = "symbolic"
+    elif "--bnb" in sys.argv[2:]:
+        opt_method = "bnb"
+
+    paths = discover(sys.argv[1])
+    objectives_file = _option("--objectives")
+    timeout, memory_mb, workers = _option("--timeout"), _option("--memory-mb"), _option("--workers")
+
+    def report(entry):
+        print(f"   {entry['status']:<8} {entry['seconds']:>10.3f}s  {entry['net']}")
+
+    print(f"Running {len(paths)} net(s)")
+    summary = run_batch(paths, _option("--output", "batch-results"),
+                        objectives=load_net_objectives(objectives_file) if objectives_file else None,
+                        workers=int(workers) if workers else None,
+                        timeout=float(timeout) if timeout else None,
+                        memory_mb=float(memory_mb) if memory_mb else None,
+                        deadlock_method=deadlock_method, opt_method=opt_method,
+                        cache="--no-cache" not in sys.argv[2:], resume="--resume" in sys.argv[2:],
+                        progress=report)
+
+    failed = [entry for entry in summary if entry['status'] in FAILED]
+    print(f"{len(summary) - len(failed)} done, {len(failed)} failed")
+    exit(1 if failed else 0)
@@ -0,0 +1,768 @@
+import sys
+from array import array
+
+from pyeda.inter import bddvar
+from pyeda.boolalg import bdd as pyeda_bdd
+
+
+class BddBackend:
+    """
+    Giao diện BDD mà phần phân tích symbolic dùng: tạo biến, apply, lượng hóa,
+    đổi tên biến, đếm mô hình và thống kê node. Các BDD trả về hỗ trợ toán tử
+    &, |, ^, ~ và is_zero()/is_one(); mọi phép khác đi qua backend.
+    """
+
+    name = None
+
+    def var(self, name):
+        """Biến BDD theo tên; biến mới được thêm vào cuối thứ tự biến."""
+        raise NotImplementedError
+
+    def true(self):
+        raise NotImplementedError
+
+    def false(self):
+        raise NotImplementedError
+
+    def apply(self, op, f, g=None):
+        """op: 'and', 'or', 'xor' (hai ngôi) hoặc 'not' (một ngôi)."""
+        if op == 'and':
+            return f & g
+        if op == 'or':
+            return f | g
+        if op == 'xor':
+            return f ^ g
+        if op == 'not':
+            return ~f
+        raise ValueError(f"Phép toán không hợp lệ: '{op}'")
+
+    def ite(self, f, g, h):
+        return (f & g) | (~f & h)
+
+    def exists(self, f, variables):
+        raise NotImplementedError
+
+    def and_exists(self, f, g, variables):
+        """∃variables. (f ∧ g) (relational product)."""
+        return self.exists(f & g, variables)
+
+    def rename(self, f, mapping):
+        """Thay biến theo mapping {biến cũ: biến mới}."""
+        raise NotImplementedError
+
+    def level(self, var):
+        """Vị trí của biến trong thứ tự biến (nhỏ hơn = gần gốc hơn)."""
+        raise NotImplementedError
+
+    def var_name(self, var):
+        raise NotImplementedError
+
+    def top_level(self, f):
+        """Tầng của biến trên cùng của f; -1 nếu f là hằng."""
+        raise NotImplementedError
+
+    def count(self, f, variables):
+        """Số phép gán trên `variables` thỏa f (f chỉ phụ thuộc các biến này)."""
+        raise NotImplementedError
+
+    def node_count(self, f):
+        """Số node của f (kể cả các node hằng)."""
+        raise NotImplementedError
+
+    def satisfy_all(self, f):
+        """Duyệt các đường tới ONE dưới dạng {biến: 0/1} (biến vắng mặt: tùy ý)."""
+        raise NotImplementedError
+
+    def collect(self):
+        """Thu hồi node không còn được tham chiếu. Trả về số node đã giải phóng."""
+        return 0
+
+    def stats(self):
+        return {'backend': self.name}
+
+    def _node(self, f):
+        """Node gốc của f (khóa băm được, duy nhất trong backend)."""
+        raise NotImplementedError
+
+    def _decompose(self, node):
+        """0/1 nếu node là hằng, ngược lại (tên biến, node lo, node hi)."""
+        raise NotImplementedError
+
+    def dump(self, f):
+        """
+        f -> (nodes, root) không phụ thuộc backend (để lưu xuống đĩa):
+        nodes[i] = (tên biến, lo, hi) theo thứ tự con trước cha, chỉ số 0/1 là
+        hằng ZERO/ONE, nodes[i] có chỉ số i + 2.
+        """
+        index = {}
+        nodes = []
+        root = self._node(f)
+        stack = [root]
+        while stack:
+            node = stack[-1]
+            if node in index:
+                stack.pop()
+                continue
+            parts = self._decompose(node)
+            if not isinstance(parts, tuple):
+                index[node] = parts
+                stack.pop()
+                continue
+            name, lo, hi = parts
+            pending = [child for child in (lo, hi) if child not in index]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            index[node] = len(nodes) + 2
+            nodes.append((name, index[lo], index[hi]))
+        return nodes, index[root]
+
+    def max_weight(self, f, weights):
+        """
+        Phép gán thỏa f có tổng trọng số lớn nhất, tìm bằng quy hoạch động trên các
+        node của f (mỗi node một lần, không liệt kê phép gán). weights: {biến: trọng
+        số}, f chỉ phụ thuộc các biến này; biến bị bỏ qua trên một cạnh là tùy ý nên
+        lấy 1 nếu trọng số dương. Trả về (giá trị, {biến: 0/1}) hoặc None nếu f rỗng.
+        """
+        nodes, root = self.dump(f)
+        if root == 0:
+            return None
+        order = sorted(weights, key=self.level)
+        n = len(order)
+        pos = {self.var_name(v): i for i, v in enumerate(order)}
+        prefix = [0]
+        for v in order:
+            prefix.append(prefix[-1] + max(0, weights[v]))
+
+        def free(a, b):
+            # lợi nhất cho các biến tùy ý ở vị trí a..b-1
+            return prefix[b] - prefix[a]
+
+        position = [n, n] + [pos[name] for name, _, _ in nodes]
+        best = [None, 0]
+        choice = [None, None]
+        for k, (_, lo, hi) in enumerate(nodes, start=2):
+            p = position[k]
+            options = []
+            if best[lo] is not None:
+                options.append((best[lo] + free(p + 1, position[lo]), 0))
+            if best[hi] is not None:
+                options.append((best[hi] + weights[order[p]] + free(p + 1, position[hi]), 1))
+            value, bit = max(options)
+            best.append(value)
+            choice.append(bit)
+
+        assignment = {}
+
+        def fill(a, b):
+            for i in range(a, b):
+                assignment[order[i]] = 1 if weights[order[i]] > 0 else 0
+
+        fill(0, position[root])
+        k = root
+        while k > 1:
+            p = position[k]
+            _, lo, hi = nodes[k - 2]
+            assignment[order[p]] = choice[k]
+            child = hi if choice[k] else lo
+            fill(p + 1, position[child])
+            k = child
+        return best[root] + free(0, position[root]), assignment
+
+    def load(self, nodes, root, names=None):
+        """Dựng lại BDD từ dump(); names: {tên biến lúc dump: tên biến hiện tại}."""
+        built = [self.false(), self.true()]
+        for name, lo, hi in nodes:
+            var = self.var(names[name] if names else name)
+            built.append(self.ite(var, built[hi], built[lo]))
+        return built[root]
+
+
+class PyEdaBackend(BddBackend):
+    """BDD của PyEDA: thứ tự biến cố định theo lần tạo đầu tiên của mỗi tên trong tiến trình."""
+
+    name = "pyeda"
+
+    def var(self, name):
+        return bddvar(name)
+
+    def true(self):
+        return pyeda_bdd.BDDONE
+
+    def false(self):
+        return pyeda_bdd.BDDZERO
+
+    def exists(self, f, variables):
+        # smoothing trên nhiều biến cùng lúc duyệt 2^k cofactor -> từng biến một
+        for v in variables:
+            f = f.smoothing([v])
+        return f
+
+    def rename(self, f, mapping):
+        return f.compose(mapping)
+
+    def level(self, var):
+        return var.uniqid
+
+    def var_name(self, var):
+        return str(var)
+
+    def top_level(self, f):
+        return -1 if f.top is None else f.top.uniqid
+
+    def count(self, f, variables):
+        # đếm có nhớ trên các node, cạnh bỏ qua k tầng biến nhân thêm 2^k
+        levels = sorted(v.uniqid for v in variables)
+        level = {uid: i for i, uid in enumerate(levels)}
+        n = len(levels)
+        memo = {}
+
+        def node_level(node):
+            return n if node.root < 0 else level[node.root]
+
+        def count(node):
+            if node is pyeda_bdd.BDDNODEZERO:
+                return 0
+            if node is pyeda_bdd.BDDNODEONE:
+                return 1
+            key = id(node)
+            if key not in memo:
+                here = node_level(node)
+                memo[key] = sum(count(child) << (node_level(child) - here - 1)
+                                for child in (node.lo, node.hi))
+            return memo[key]
+
+        return count(f.node) << node_level(f.node)
+
+    def node_count(self, f):
+        return sum(1 for _ in f.dfs_preorder())
+
+    def satisfy_all(self, f):
+        return f.satisfy_all()
+
+    def stats(self):
+        return {'backend': self.name, 'live_nodes': len(pyeda_bdd._NODES)}
+
+    def _node(self, f):
+        return f.node
+
+    def _decompose(self, node):
+        if node is pyeda_bdd.BDDNODEZERO:
+            return 0
+        if node is pyeda_bdd.BDDNODEONE:
+            return 1
+        return str(pyeda_bdd._VARS[node.root]), node.lo, node.hi
+
+
+class ArrayBdd:
+    """Tham chiếu tới một node của ArrayBackend; giữ node sống qua các lần GC."""
+
+    __slots__ = ('backend', 'node')
+
+    def __init__(self, backend, node):
+        self.backend = backend
+        self.node = node
+        backend._ref(node)
+
+    def __del__(self):
+        try:
+            self.backend._unref(self.node)
+        except Exception:
+            pass  # lúc tắt interpreter
+
+    def __and__(self, other):
+        return self.backend.apply('and', self, other)
+
+    def __or__(self, other):
+        return self.backend.apply('or', self, other)
+
+    def __xor__(self, other):
+        return self.backend.apply('xor', self, other)
+
+    def __invert__(self):
+        return self.backend.apply('not', self)
+
+    def is_zero(self):
+        return self.node == ArrayBackend.ZERO
+
+    def is_one(self):
+        return self.node == ArrayBackend.ONE
+
+    def __eq__(self, other):
+        return (isinstance(other, ArrayBdd) and other.backend is self.backend
+                and other.node == self.node)
+
+    def __hash__(self):
+        return hash(self.node)
+
+    def __repr__(self):
+        if self.node <= ArrayBackend.ONE:
+            return str(self.node)
+        return f"ArrayBdd(node={self.node}, top={self.backend.names[self.backend.node_level[self.node]]})"
+
+
+class _NodeLimit(Exception):
+    """_mk() vượt max_nodes giữa một phép toán; ArrayBackend._run() GC rồi thử lại."""
+
+
+class ArrayBackend(BddBackend):
+    """
+    BDD tự cài đặt trên bảng node dạng mảng:
+    - mỗi node là (level, lo, hi) nằm trong 3 array('i'); node 0/1 là hằng ZERO/ONE
+    - unique table {khóa số nguyên của (level, lo, hi): node} bảo đảm tính chính tắc
+    - computed table ánh xạ trực tiếp (direct-mapped) kích thước cố định; ô bị
+      trùng thì ghi đè (eviction), nên bộ nhớ cache luôn bị chặn
+    - GC đánh dấu - quét từ các node còn được ArrayBdd tham chiếu; node rảnh
+      được dùng lại. GC chỉ chạy giữa các phép toán khi số node vượt ngưỡng.
+    max_nodes: giới hạn số node sống. Phép toán vượt giới hạn giữa chừng được bỏ dở,
+      GC rồi chạy lại một lần (xem _run); vẫn vượt -> MemoryError.
+    """
+
+    name = "array"
+
+    ZERO, ONE = 0, 1
+    TERMINAL = 2 ** 31 - 1   # level của node hằng (dưới mọi biến)
+    FREE = -1                # level của ô node đã giải phóng
+
+    AND, OR, XOR, NOT, ITE, EXISTS, AND_EXISTS, RENAME = range(8)
+    _OPS = {'and': AND, 'or': OR, 'xor': XOR}
+
+    def __init__(self, cache_size=1 << 18, gc_threshold=1 << 18, max_nodes=None):
+        self.node_level = array('i', [self.TERMINAL, self.TERMINAL])
+        self.node_lo = array('i', [self.ZERO, self.ONE])
+        self.node_hi = array('i', [self.ZERO, self.ONE])
+        self.unique = {}
+        self.free = []
+        self.refs = {}           # node -> số ArrayBdd đang trỏ tới
+
+        self.names = []          # level -> tên biến
+        self.levels = {}         # tên biến -> level
+        self._var_handles = []   # level -> ArrayBdd của biến
+        self._maps = {}          # mapping đổi tên -> id dùng trong khóa cache
+
+        size = 1
+        while size < cache_size:
+            size *= 2
+        self.cache_mask = size - 1
+        self.ct_op = array('b', [-1]) * size
+        self.ct_a = array('q', [0]) * size
+        self.ct_b = array('q', [0]) * size
+        self.ct_c = array('q', [0]) * size
+        self.ct_res = array('q', [0]) * size
+
+        self.gc_threshold = gc_threshold
+        self.max_nodes = max_nodes
+        self.counters = {'cache_hits': 0, 'cache_misses': 0, 'cache_evictions': 0,
+                         'gc_runs': 0, 'gc_freed': 0, 'peak_nodes': 2}
+
+    # ---------- tham chiếu ngoài ----------
+    def _ref(self, node):
+        self.refs[node] = self.refs.get(node, 0) + 1
+
+    def _unref(self, node):
+        n = self.refs.get(node, 0) - 1
+        if n > 0:
+            self.refs[node] = n
+        else:
+            self.refs.pop(node, None)
+
+    def _wrap(self, node):
+        return ArrayBdd(self, node)
+
+    # ---------- bảng node ----------
+    def _key(self, level, lo, hi):
+        return (level << 64) | (lo << 32) | hi
+
+    def _mk(self, level, lo, hi):
+        if lo == hi:
+            return lo
+        key = self._key(level, lo, hi)
+        node = self.unique.get(key)
+        if node is not None:
+            return node
+
+        if self.max_nodes is not None and len(self.unique) + 2 >= self.max_nodes:
+            raise _NodeLimit()
+        if self.free:
+            node = self.free.pop()
+            self.node_level[node] = level
+            self.node_lo[node] = lo
+            self.node_hi[node] = hi
+        else:
+            node = len(self.node_level)
+            self.node_level.append(level)
+            self.node_lo.append(lo)
+            self.node_hi.append(hi)
+        self.unique[key] = node
+        live = len(self.unique) + 2
+        if live > self.counters['peak_nodes']:
+            self.counters['peak_nodes'] = live
+        return node
+
+    def _cofactors(self, f, level):
+        if self.node_level[f] == level:
+            return self.node_lo[f], self.node_hi[f]
+        return f, f
+
+    # ---------- computed table ----------
+    def _slot(self, op, a, b, c):
+        return hash((op, a, b, c)) & self.cache_mask
+
+    def _lookup(self, slot, op, a, b, c):
+        if (self.ct_op[slot] == op and self.ct_a[slot] == a
+                and self.ct_b[slot] == b and self.ct_c[slot] == c):
+            self.counters['cache_hits'] += 1
+            return self.ct_res[slot]
+        self.counters['cache_misses'] += 1
+        return -1
+
+    def _store(self, slot, op, a, b, c, result):
+        if self.ct_op[slot] != -1:
+            self.counters['cache_evictions'] += 1
+        self.ct_op[slot] = op
+        self.ct_a[slot] = a
+        self.ct_b[slot] = b
+        self.ct_c[slot] = c
+        self.ct_res[slot] = result
+        return result
+
+    # ---------- các phép toán trên node ----------
+    def _apply(self, op, f, g):
+        if op == self.AND:
+            if f == self.ZERO or g == self.ZERO:
+                return self.ZERO
+            if f == self.ONE or f == g:
+                return g
+            if g == self.ONE:
+                return f
+        elif op == self.OR:
+            if f == self.ONE or g == self.ONE:
+                return self.ONE
+            if f == self.ZERO or f == g:
+                return g
+            if g == self.ZERO:
+                return f
+        else:
+            if f == g:
+                return self.ZERO
+            if f == self.ZERO:
+                return g
+            if g == self.ZERO:
+                return f
+            if f == self.ONE:
+                return self._not(g)
+            if g == self.ONE:
+                return self._not(f)
+        if f > g:
+            f, g = g, f  # cả 3 phép đều giao hoán
+
+        slot = self._slot(op, f, g, 0)
+        result = self._lookup(slot, op, f, g, 0)
+        if result >= 0:
+            return result
+
+        top = min(self.node_level[f], self.node_level[g])
+        f0, f1 = self._cofactors(f, top)
+        g0, g1 = self._cofactors(g, top)
+        result = self._mk(top, self._apply(op, f0, g0), self._apply(op, f1, g1))
+        return self._store(slot, op, f, g, 0, result)
+
+    def _not(self, f):
+        if f <= self.ONE:
+            return 1 - f
+        slot = self._slot(self.NOT, f, 0, 0)
+        result = self._lookup(slot, self.NOT, f, 0, 0)
+        if result >= 0:
+            return result
+        result = self._mk(self.node_level[f], self._not(self.node_lo[f]), self._not(self.node_hi[f]))
+        return self._store(slot, self.NOT, f, 0, 0, result)
+
+    def _ite(self, f, g, h):
+        if f == self.ONE or g == h:
+            return g
+        if f == self.ZERO:
+            return h
+        if g == self.ONE and h == self.ZERO:
+            return f
+        if g == self.ZERO and h == self.ONE:
+            return self._not(f)
+
+        slot = self._slot(self.ITE, f, g, h)
+        result = self._lookup(slot, self.ITE, f, g, h)
+        if result >= 0:
+            return result
+
+        top = min(self.node_level[f], self.node_level[g], self.node_level[h])
+        f0, f1 = self._cofactors(f, top)
+        g0, g1 = self._cofactors(g, top)
+        h0, h1 = self._cofactors(h, top)
+        result = self._mk(top, self._ite(f0, g0, h0), self._ite(f1, g1, h1))
+        return self._store(slot, self.ITE, f, g, h, result)
+
+    def _skip_cube(self, cube, level):
+        # bỏ các biến của cube nằm trên level (f không phụ thuộc các biến đó)
+        while cube != self.ONE and self.node_level[cube] < level:
+            cube = self.node_hi[cube]
+        return cube
+
+    def _exists(self, f, cube):
+        if f <= self.ONE:
+            return f
+        level = self.node_level[f]
+        cube = self._skip_cube(cube, level)
+        if cube == self.ONE:
+            return f
+
+        slot = self._slot(self.EXISTS, f, cube, 0)
+        result = self._lookup(slot, self.EXISTS, f, cube, 0)
+        if result >= 0:
+            return result
+
+        lo, hi = self.node_lo[f], self.node_hi[f]
+        if self.node_level[cube] == level:
+            rest = self.node_hi[cube]
+            result = self._exists(lo, rest)
+            if result != self.ONE:
+                result = self._apply(self.OR, result, self._exists(hi, rest))
+        else:
+            result = self._mk(level, self._exists(lo, cube), self._exists(hi, cube))
+        return self._store(slot, self.EXISTS, f, cube, 0, result)
+
+    def _and_exists(self, f, g, cube):
+        if f == self.ZERO or g == self.ZERO:
+            return self.ZERO
+        if f == self.ONE or f == g:
+            return self._exists(g, cube)
+        if g == self.ONE:
+            return self._exists(f, cube)
+        if f > g:
+            f, g = g, f
+
+        top = min(self.node_level[f], self.node_level[g])
+        cube = self._skip_cube(cube, top)
+        if cube == self.ONE:
+            return self._apply(self.AND, f, g)
+
+        slot = self._slot(self.AND_EXISTS, f, g, cube)
+        result = self._lookup(slot, self.AND_EXISTS, f, g, cube)
+        if result >= 0:
+            return result
+
+        f0, f1 = self._cofactors(f, top)
+        g0, g1 = self._cofactors(g, top)
+        if self.node_level[cube] == top:
+            rest = self.node_hi[cube]
+            result = self._and_exists(f0, g0, rest)
+            if result != self.ONE:
+                result = self._apply(self.OR, result, self._and_exists(f1, g1, rest))
+        else:
+            result = self._mk(top, self._and_exists(f0, g0, cube), self._and_exists(f1, g1, cube))
+        return self._store(slot, self.AND_EXISTS, f, g, cube, result)
+
+    def _rename(self, f, mapping, map_id):
+        if f <= self.ONE:
+            return f
+        slot = self._slot(self.RENAME, f, map_id, 0)
+        result = self._lookup(slot, self.RENAME, f, map_id, 0)
+        if result >= 0:
+            return result
+
+        level = self.node_level[f]
+        target = mapping.get(level, level)
+        lo = self._rename(self.node_lo[f], mapping, map_id)
+        hi = self._rename(self.node_hi[f], mapping, map_id)
+        if target < self.node_level[lo] and target < self.node_level[hi]:
+            result = self._mk(target, lo, hi)
+        else:
+            # biến mới không nằm trên các con -> dựng lại bằng ITE
+            result = self._ite(self._mk(target, self.ZERO, self.ONE), hi, lo)
+        return self._store(slot, self.RENAME, f, map_id, 0, result)
+
+    def _cube(self, variables):
+        node = self.ONE
+        for level in sorted((self.level(v) for v in variables), reverse=True):
+            node = self._mk(level, self.ZERO, node)
+        return node
+
+    # ---------- GC ----------
+    def _run(self, compute):
+        """
+        Chạy một phép toán API (compute() -> node) và bọc kết quả. Không GC giữa chừng
+        được vì node trung gian trên ngăn xếp đệ quy không có ArrayBdd nào giữ; nên khi
+        _mk vượt max_nodes, phép toán bị bỏ dở, GC thu hồi cả node rác lẫn node dở,
+        rồi chạy lại từ đầu một lần.
+        """
+        self._maybe_collect()
+        try:
+            return self._wrap(compute())
+        except _NodeLimit:
+            pass
+        self.collect()
+        try:
+            return self._wrap(compute())
+        except _NodeLimit:
+            raise MemoryError(f"Vượt giới hạn {self.max_nodes} node BDD (sau GC)") from None
+
+    def _maybe_collect(self):
+        if len(self.unique) > self.gc_threshold:
+            self.collect()
+            if 2 * len(self.unique) > self.gc_threshold:
+                self.gc_threshold *= 2  # phần lớn node vẫn sống -> nới ngưỡng
+
+    def collect(self):
+        marked = bytearray(len(self.node_level))
+        marked[self.ZERO] = marked[self.ONE] = 1
+        stack = list(self.refs)
+        while stack:
+            node = stack.pop()
+            if marked[node]:
+                continue
+            marked[node] = 1
+            stack.append(self.node_lo[node])
+            stack.append(self.node_hi[node])
+
+        freed = 0
+        for key, node in list(self.unique.items()):
+            if not marked[node]:
+                del self.unique[key]
+                self.node_level[node] = self.FREE
+                self.free.append(node)
+                freed += 1
+
+        # kết quả trong cache có thể trỏ tới node vừa giải phóng
+        for i in range(len(self.ct_op)):
+            self.ct_op[i] = -1
+        self.counters['gc_runs'] += 1
+        self.counters['gc_freed'] += freed
+        return freed
+
+    # ---------- API ----------
+    def var(self, name):
+        level = self.levels.get(name)
+        if level is None:
+            level = len(self.names)
+            handle = self._run(lambda: self._mk(level, self.ZERO, self.ONE))
+            self.names.append(name)
+            self.levels[name] = level
+            self._var_handles.append(handle)
+            # đệ quy sâu tối đa theo số tầng biến
+            sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * len(self.names) + 1000))
+        return self._var_handles[level]
+
+    def true(self):
+        return self._wrap(self.ONE)
+
+    def false(self):
+        return self._wrap(self.ZERO)
+
+    def apply(self, op, f, g=None):
+        if op == 'not':
+            return self._run(lambda: self._not(f.node))
+        if op not in self._OPS:
+            raise ValueError(f"Phép toán không hợp lệ: '{op}'")
+        return self._run(lambda: self._apply(self._OPS[op], f.node, g.node))
+
+    def ite(self, f, g, h):
+        return self._run(lambda: self._ite(f.node, g.node, h.node))
+
+    def exists(self, f, variables):
+        return self._run(lambda: self._exists(f.node, self._cube(variables)))
+
+    def and_exists(self, f, g, variables):
+        return self._run(lambda: self._and_exists(f.node, g.node, self._cube(variables)))
+
+    def rename(self, f, mapping):
+        levels = {self.level(a): self.level(b) for a, b in mapping.items()}
+        key = frozenset(levels.items())
+        map_id = self._maps.setdefault(key, len(self._maps))
+        return self._run(lambda: self._rename(f.node, levels, map_id))
+
+    def level(self, var):
+        return self.node_level[var.node]
+
+    def var_name(self, var):
+        return self.names[self.level(var)]
+
+    def top_level(self, f):
+        return -1 if f.node <= self.ONE else self.node_level[f.node]
+
+    def count(self, f, variables):
+        levels = sorted(self.level(v) for v in variables)
+        position = {lv: i for i, lv in enumerate(levels)}
+        n = len(levels)
+        memo = {self.ZERO: 0, self.ONE: 1}
+
+        def node_pos(node):
+            return n if node <= self.ONE else position[self.node_level[node]]
+
+        def count(node):
+            if node not in memo:
+                here = node_pos(node)
+                memo[node] = sum(count(child) << (node_pos(child) - here - 1)
+                                 for child in (self.node_lo[node], self.node_hi[node]))
+            return memo[node]
+
+        return count(f.node) << node_pos(f.node)
+
+    def node_count(self, f):
+        seen = set()
+        stack = [f.node]
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            if node > self.ONE:
+                stack.append(self.node_lo[node])
+                stack.append(self.node_hi[node])
+        return len(seen)
+
+    def satisfy_all(self, f):
+        path = []
+
+        def walk(node):
+            if node == self.ONE:
+                yield {self._var_handles[lv]: v for lv, v in path}
+            elif node != self.ZERO:
+                level = self.node_level[node]
+                for value, child in ((0, self.node_lo[node]), (1, self.node_hi[node])):
+                    path.append((level, value))
+                    yield from walk(child)
+                    path.pop()
+
+        # giữ f sống trong lúc duyệt
+        return (point for point in walk(f.node) if f is not None)
+
+    def _node(self, f):
+        return f.node
+
+    def _decompose(self, node):
+        if node <= self.ONE:
+            return node
+        return self.names[self.node_level[node]], self.node_lo[node], self.node_hi[node]
+
+    def stats(self):
+        live = len(self.unique) + 2
+        cache_bytes = sum(a.itemsize * len(a) for a in
+                          (self.ct_op, self.ct_a, self.ct_b, self.ct_c, self.ct_res))
+        node_bytes = sum(a.itemsize * len(a) for a in
+                         (self.node_level, self.node_lo, self.node_hi))
+        return dict(self.counters, backend=self.name, live_nodes=live,
+                    allocated_nodes=len(self.node_level), free_slots=len(self.free),
+                    external_refs=len(self.refs), cache_slots=len(self.ct_op),
+                    node_table_bytes=node_bytes, cache_bytes=cache_bytes)
+
+
+BACKENDS = {
+    PyEdaBackend.name: PyEdaBackend,
+    ArrayBackend.name: ArrayBackend,
+}
+
+
+def make_backend(name="pyeda", **options):
+    if name is None:
+        name = PyEdaBackend.name
+    if name not in BACKENDS:
+        raise ValueError(f"Backend BDD không hợp lệ: '{name}' (chọn một trong {tuple(BACKENDS)})")
+    return BACKENDS[name](**options)
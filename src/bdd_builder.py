@@ -0,0 +1,89 @@
+class BddBuilder:
+    """
+    Dựng BDD trực tiếp từ các biến của backend bằng toán tử BDD (không qua chuỗi
+    biểu thức + expr2bdd). Các cube theo từng tập place được lưu cache.
+    """
+
+    def __init__(self, backend, curr_vars, next_vars):
+        self.backend = backend
+        self.curr_vars = curr_vars    # place -> x
+        self.next_vars = next_vars    # place -> x'
+        self._cache = {}
+
+    def true(self):
+        return self.backend.true()
+
+    def false(self):
+        return self.backend.false()
+
+    def conjoin(self, factors):
+        """
+        AND nhiều BDD, bắt đầu từ các biến ở đáy thứ tự để mỗi bước chỉ thêm
+        một tầng lên trên.
+        """
+        factors = sorted(factors, key=lambda f: -self.backend.top_level(f))
+        result = self.backend.true()
+        for f in factors:
+            result = f & result
+        return result
+
+    def disjoin(self, terms):
+        """OR nhiều BDD theo cặp (cây cân bằng) để các BDD trung gian nhỏ."""
+        terms = list(terms)
+        if not terms:
+            return self.backend.false()
+        while len(terms) > 1:
+            terms = [terms[i] | terms[i + 1] if i + 1 < len(terms) else terms[i]
+                     for i in range(0, len(terms), 2)]
+        return terms[0]
+
+    def _vars(self, primed):
+        return self.next_vars if primed else self.curr_vars
+
+    def positive_cube(self, places, primed=False):
+        """∧ x_p (hoặc x_p') với p thuộc places."""
+        key = ('pos', primed, frozenset(places))
+        if key not in self._cache:
+            variables = self._vars(primed)
+            self._cache[key] = self.conjoin([variables[p] for p in places])
+        return self._cache[key]
+
+    def negative_cube(self, places, primed=False):
+        """∧ ¬x_p (hoặc ¬x_p') với p thuộc places."""
+        key = ('neg', primed, frozenset(places))
+        if key not in self._cache:
+            variables = self._vars(primed)
+            self._cache[key] = self.conjoin([~variables[p] for p in places])
+        return self._cache[key]
+
+    def same(self, p):
+        """x_p ↔ x_p' (place p không đổi)."""
+        key = ('same', p)
+        if key not in self._cache:
+            self._cache[key] = ~(self.curr_vars[p] ^ self.next_vars[p])
+        return self._cache[key]
+
+    def frame(self, places):
+        """∧ (x_p ↔ x_p') với p thuộc places: các place không đổi."""
+        key = ('frame', frozenset(places))
+        if key not in self._cache:
+            self._cache[key] = self.conjoin([self.same(p) for p in places])
+        return self._cache[key]
+
+    def marking(self, marking, places=None):
+        """Cube của một marking (place có token -> x_p, ngược lại ¬x_p)."""
+        places = self.curr_vars if places is None else places
+        return self.conjoin([self.curr_vars[p] if marking.get(p, 0) > 0 else ~self.curr_vars[p]
+                             for p in places])
+
+    def transition(self, pre_places, post_places, unchanged_places=()):
+        """
+        Quan hệ của một transition:
+        x(pre) ∧ x'(post) ∧ ¬x'(pre \\ post) ∧ frame(unchanged_places).
+        Mọi literal được AND một lần từ đáy lên, tránh AND hai BDD lớn với nhau.
+        """
+        factors = [self.curr_vars[p] for p in pre_places]
+        factors += [self.next_vars[p] for p in post_places]
+        factors += [~self.next_vars[p] for p in set(pre_places) - set(post_places)]
+        factors += [self.same(p) for p in unchanged_places]
+        return self.conjoin(factors)
@@ -0,0 +1,184 @@
+import itertools
+import json
+import sys
+import time
+from reachability_bdd import SymbolicReachabilityPyEDA
+
+
+def transition_supports(net):
+    """
+    {transition: [các place nối với transition]} (theo thứ tự cung trong file).
+    """
+    ir = net.compile()
+    return {t: [ir.place_ids[j] for j in ir.support(i)] for i, t in enumerate(ir.transition_ids)}
+
+
+def alphabetical_order(net):
+    return sorted(net.places.keys())
+
+
+def cluster_order(net):
+    """
+    Gom các place dùng chung transition: duyệt đồ thị place-transition theo chiều
+    rộng, mỗi lần gặp một transition thì xếp liền các place của nó với nhau.
+    Bắt đầu từ các place có token ban đầu.
+    """
+    supports = transition_supports(net)
+    touching = {p: [] for p in net.places}
+    for t, places in supports.items():
+        for p in places:
+            touching[p].append(t)
+
+    starts = sorted(net.places, key=lambda p: (net.places[p]['initial'] == 0, p))
+    order, placed, used = [], set(), set()
+    for start in starts:
+        if start in placed:
+            continue
+        queue = [start]
+        placed.add(start)
+        while queue:
+            p = queue.pop(0)
+            order.append(p)
+            for t in touching[p]:
+                if t in used:
+                    continue
+                used.add(t)
+                for q in supports[t]:
+                    if q not in placed:
+                        placed.add(q)
+                        queue.append(q)
+    return order
+
+
+def order_span(net, order):
+    """Tổng độ trải (vị trí lớn nhất - nhỏ nhất) của các transition theo thứ tự."""
+    pos = {p: i for i, p in enumerate(order)}
+    total = 0
+    for places in transition_supports(net).values():
+        if places:
+            idx = [pos[p] for p in places]
+            total += max(idx) - min(idx)
+    return total
+
+
+def force_order(net, iterations=50, initial=None):
+    """
+    Heuristic FORCE: lặp lại "đặt mỗi place vào trọng tâm các transition chứa nó"
+    rồi sắp xếp lại. Giữ thứ tự có tổng độ trải nhỏ nhất.
+    """
+    supports = [places for places in transition_supports(net).values() if places]
+    order = list(initial or cluster_order(net))
+    best, best_span = list(order), order_span(net, order)
+
+    for _ in range(iterations):
+        pos = {p: i for i, p in enumerate(order)}
+        pulls = {p: [] for p in order}
+        for places in supports:
+            center = sum(pos[p] for p in places) / len(places)
+            for p in places:
+                pulls[p].append(center)
+
+        new_pos = {p: sum(c) / len(c) if c else pos[p] for p, c in pulls.items()}
+        new_order = sorted(order, key=lambda p: (new_pos[p], pos[p]))
+        if new_order == order:
+            break
+        order = new_order
+
+        span = order_span(net, order)
+        if span < best_span:
+            best, best_span = list(order), span
+
+    return best
+
+
+# PyEDA giữ biến theo tên suốt tiến trình: mỗi lần so sánh cần tiền tố chưa dùng
+_prefix_ids = itertools.count()
+
+
+def expected_variable_order(prefix, order, interleave=True):
+    """Tên biến theo đúng thứ tự setup_variables() sẽ tạo."""
+    curr = [f"{prefix}_{p}" for p in order]
+    nxt = [f"{prefix}_{p}_prime" for p in order]
+    if interleave:
+        return [name for pair in zip(curr, nxt) for name in pair]
+    return curr + nxt
+
+
+ORDERINGS = {
+    "alphabetical": alphabetical_order,
+    "cluster": cluster_order,
+    "force": force_order,
+}
+
+
+def save_order(order, filename):
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(list(order), f, ensure_ascii=False, indent=2)
+
+
+def load_order(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_orderings(net, names=None, strategy="monolithic", interleave=True):
+    """
+    Tính reachable với từng thứ tự biến và trả về số node BDD, số trạng thái, thời gian.
+    Mỗi lần chạy dùng một tiền tố tên biến chưa từng dùng để PyEDA tạo biến mới
+    theo đúng thứ tự; thứ tự thực tế được kiểm tra lại sau khi tính.
+    Mạng không hợp lệ cho phân tích symbolic -> ValueError.
+    """
+    check = SymbolicReachabilityPyEDA()
+    check.places, check.transitions, check.arcs = net.places, net.transitions, net.arcs
+    is_valid, errors = check.check_symbolic_consistency()
+    if not is_valid:
+        raise ValueError("Mạng không hợp lệ cho phân tích symbolic: " + "; ".join(errors))
+
+    results = {}
+    for name in names or ORDERINGS:
+        sym = SymbolicReachabilityPyEDA()
+        sym.places, sym.transitions, sym.arcs = net.places, net.transitions, net.arcs
+        sym.var_prefix = f"o{next(_prefix_ids)}_{name}"
+        sym.variable_order = ORDERINGS[name](net)
+        sym.interleave = interleave
+
+        start = time.time()
+        count, duration, _ = sym.compute_reachable(return_formula=False, strategy=strategy)
+        expected = expected_variable_order(sym.var_prefix, sym.variable_order, interleave)
+        if sym.actual_variable_order() != expected:
+            raise RuntimeError(f"Thứ tự biến '{name}' không được áp dụng (tiền tố {sym.var_prefix} đã tồn tại?)")
+        results[name] = {
+            'order': sym.variable_order,
+            'states': count,
+            'fixpoint_time': duration,
+            'total_time': time.time() - start,
+            'nodes': dict(sym.node_stats),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Sử dụng: python src/bdd_ordering.py <file.pnml> [--export <thứ tự>=<file.json>]")
+        sys.exit(1)
+
+    net = SymbolicReachabilityPyEDA()
+    if not net.parse_pnml(sys.argv[1]):
+        sys.exit(1)
+
+    if "--export" in sys.argv:
+        name, filename = sys.argv[sys.argv.index("--export") + 1].split("=", 1)
+        save_order(ORDERINGS[name](net), filename)
+        print(f"Đã lưu thứ tự '{name}' vào {filename}")
+        sys.exit(0)
+
+    try:
+        results = compare_orderings(net)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    for name, res in results.items():
+        print(f"{name:>12}: {res['states']} trạng thái, "
+              f"relation {res['nodes']['relation']} node, reachable {res['nodes']['reachable']} node, "
+              f"{res['total_time']:.4f}s")
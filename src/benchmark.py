@@ -0,0 +1,266 @@
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import sys
+import time
+from itertools import count
+
+import metrics
+from analysis_session import AnalysisSession
+from net_generators import FAMILIES, SAFE_FAMILIES, generate
+
+FORMAT_VERSION = 1
+
+DEFAULT_SIZES = {
+    'philosophers': [2, 3, 4, 5, 6, 8],
+    'token_ring': [4, 8, 16, 32, 64],
+    'producer_consumer': [2, 3, 4, 6, 8],
+    'fork_join': [2, 4, 6, 8, 10],
+}
+
+# "task" hoặc "task:method" (method như trong AnalysisSession.detect_deadlock/optimize)
+DEFAULT_ENGINES = ['explicit', 'symbolic', 'deadlock:symbolic', 'deadlock:state_equation',
+                   'optimize:explicit', 'optimize:bnb']
+
+# Engine dựa trên BDD mã hóa 1-safe: kết quả vô nghĩa trên họ mạng không 1-safe
+SYMBOLIC_ENGINES = {'symbolic', 'deadlock', 'deadlock:ilp', 'deadlock:symbolic', 'optimize:symbolic'}
+
+_runs = count()
+
+
+def _record(family, size, engine, status, seconds=None, detail=None):
+    return {'family': family, 'size': size, 'engine': engine, 'status': status,
+            'seconds': seconds, 'peak_mb': None, 'states': None,
+            'places': None, 'transitions': None, 'detail': detail or {}}
+
+
+def supported(family, engine):
+    """Engine BDD chỉ chạy trên họ 1-safe (SAFE_FAMILIES); các engine khác chạy trên mọi họ."""
+    return engine not in SYMBOLIC_ENGINES or family in SAFE_FAMILIES
+
+
+def run_engine(net, engine, bdd_backend=None):
+    """
+    Chạy một engine trên một AnalysisSession mới (không cache) -> (số trạng thái, detail).
+    Số trạng thái là số marking mà engine đếm/duyệt (None nếu engine không đếm).
+    """
+    session = AnalysisSession(net, bdd_backend=bdd_backend)
+    session.symbolic_net().var_prefix = f"bench{os.getpid()}_{next(_runs)}"  # biến BDD không đụng nhau
+    task, _, method = engine.partition(":")
+    if task == 'explicit':
+        markings, _, _ = session.explicit()
+        return len(markings), {}
+    if task == 'symbolic':
+        states, _, _, _ = session.symbolic()
+        return states, {}
+    if task == 'deadlock':
+        dead, _, message = session.detect_deadlock(method or "ilp")
+        return None, {'deadlock': dead is not None, 'message': message}
+    if task == 'optimize':
+        weights = {p: 1 for p in net.places}
+        _, value, explored, _, _ = session.optimize(weights, method or "explicit")
+        return (int(explored) if explored is not None else None), {'value': value}
+    raise ValueError(f"Engine không tồn tại: {engine}")
+
+
+def _measure(family, size, engine, bdd_backend):
+    """
+    Đo trong tiến trình hiện tại: thời gian thực và đỉnh bộ nhớ Python (tracemalloc),
+    kèm thời gian từng phase (metrics). tracemalloc làm chậm mọi phép cấp phát, nên
+    chỉ so sánh các lần chạy cùng chế độ.
+    """
+    net = None
+    with metrics.recording() as recorded:
+        start = time.perf_counter()
+        with recorded.phase("total"):
+            try:
+                net = generate(family, size)  # họ/kích thước sai cũng thành bản ghi 'error'
+                states, detail = run_engine(net, engine, bdd_backend)
+                status = 'ok'
+            except Exception as e:
+                states, detail, status = None, {'error': f"{type(e).__name__}: {e}"}, 'error'
+        seconds = time.perf_counter() - start
+    phases = dict(recorded.phases)
+    peak_mb = phases.pop("total")['peak_mb']
+    return {'family': family, 'size': size, 'engine': engine, 'status': status,
+            'seconds': seconds, 'peak_mb': peak_mb, 'states': states,
+            'places': len(net.places) if net is not None else None,
+            'transitions': len(net.transitions) if net is not None else None, 'detail': detail,
+            'phases': {name: stats['seconds'] for name, stats in phases.items()}}
+
+
+def _child(out, family, size, engine, bdd_backend):
+    out.put(_measure(family, size, engine, bdd_backend))
+
+
+_POLL_SECONDS = 0.1
+
+
+def measure(family, size, engine, bdd_backend=None, timeout=None, isolate=True):
+    """
+    Một phép đo. isolate=True: chạy trong tiến trình con (BDD/ILP không giữ trạng thái
+    giữa các lần đo, và có thể dừng engine quá `timeout` giây -> status 'timeout').
+    Tiến trình con chết mà không gửi kết quả (vd. hết bộ nhớ) -> status 'crashed'.
+    """
+    if not isolate:
+        return _measure(family, size, engine, bdd_backend)
+
+    ctx = multiprocessing.get_context()
+    out = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(out, family, size, engine, bdd_backend), daemon=True)
+    proc.start()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    record = None
+    while record is None:
+        try:
+            record = out.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            if not proc.is_alive():
+                try:  # kết quả có thể tới ngay trước khi con thoát
+                    record = out.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    record = _record(family, size, engine, 'crashed',
+                                     detail={'exitcode': proc.exitcode})
+            elif deadline is not None and time.monotonic() >= deadline:
+                proc.terminate()
+                record = _record(family, size, engine, 'timeout', seconds=timeout)
+    proc.join()
+    return record
+
+
+def run_suite(families=None, sizes=None, engines=None, bdd_backend=None,
+              timeout=None, max_seconds=None, isolate=True, progress=None):
+    """
+    Chạy mọi engine trên mọi họ mạng theo kích thước tăng dần. Khi một engine lỗi,
+    quá timeout hoặc chạy lâu hơn max_seconds ở một kích thước, các kích thước lớn hơn
+    của cùng họ được ghi 'skipped' (đó là điểm engine ngừng mở rộng được). Engine BDD
+    trên họ không 1-safe được ghi 'unsupported' và không chạy.
+    sizes: {họ: [kích thước]} (mặc định DEFAULT_SIZES). Trả về dict có thể ghi JSON.
+    """
+    families = families or list(FAMILIES)
+    sizes = sizes or DEFAULT_SIZES
+    engines = engines or DEFAULT_ENGINES
+    results = []
+    for family in families:
+        for engine in engines:
+            stopped = None
+            for size in sorted(sizes[family]):
+                if not supported(family, engine):
+                    record = _record(family, size, engine, 'unsupported')
+                elif stopped is not None:
+                    record = _record(family, size, engine, 'skipped', detail={'after': stopped})
+                else:
+                    record = measure(family, size, engine, bdd_backend, timeout, isolate)
+                    if record['status'] != 'ok' or (max_seconds is not None and record['seconds'] > max_seconds):
+                        stopped = size
+                results.append(record)
+                if progress is not None:
+                    progress(record)
+    return {
+        'format': FORMAT_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'bdd_backend': bdd_backend,
+        'results': results,
+    }
+
+
+def _key(record):
+    return record['family'], record['size'], record['engine']
+
+
+def compare(current, baseline, threshold=1.5, min_seconds=0.05, min_mb=5.0):
+    """
+    So sánh hai kết quả run_suite() -> danh sách thông báo regression:
+    - phép đo ok trong baseline nhưng giờ lỗi/timeout/bị bỏ qua
+    - số trạng thái khác nhau (kết quả sai)
+    - thời gian hoặc đỉnh bộ nhớ tăng quá `threshold` lần và quá min_seconds / min_mb
+    Phép đo chỉ có ở một bên thì bỏ qua.
+    """
+    old = {_key(r): r for r in baseline['results']}
+    regressions = []
+    for record in current['results']:
+        before = old.get(_key(record))
+        if before is None or before['status'] != 'ok':
+            continue
+        name = "{}[{}] {}".format(*_key(record))
+        if record['status'] != 'ok':
+            regressions.append(f"{name}: {record['status']} (baseline ok in {before['seconds']:.3f}s)")
+            continue
+        if record['states'] != before['states']:
+            regressions.append(f"{name}: states {record['states']} != baseline {before['states']}")
+        for field, unit, minimum in (('seconds', 's', min_seconds), ('peak_mb', 'MB', min_mb)):
+            now, then = record[field], before[field]
+            if now is None or then is None:
+                continue
+            if now > then * threshold and now - then > minimum:
+                regressions.append(f"{name}: {field} {now:.3f}{unit} vs baseline {then:.3f}{unit} "
+                                   f"(x{now / then if then else float('inf'):.2f})")
+    return regressions
+
+
+def load_results(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') != FORMAT_VERSION:
+        raise ValueError(f"{filename}: định dạng benchmark {data.get('format')} không được hỗ trợ")
+    return data
+
+
+def save_results(data, filename):
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def _option(name, default=None):
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def _print_record(record):
+    seconds = f"{record['seconds']:.4f}s" if record['seconds'] is not None else "-"
+    peak = f"{record['peak_mb']:.2f} MB" if record['peak_mb'] is not None else "-"
+    print(f"   {record['family']:<18} {record['size']:>4} {record['engine']:<24} "
+          f"{record['status']:<8} {seconds:>12} {peak:>12} states={record['states']}")
+
+
+if __name__ == "__main__":
+    # python benchmark.py [--families a,b] [--sizes a=2,3,4;b=8,16] [--engines explicit,deadlock:symbolic]
+    #                     [--backend array] [--timeout 60] [--max-seconds 10] [--in-process]
+    #                     [--output results.json] [--baseline baseline.json] [--threshold 1.5]
+    families = _option("--families")
+    families = families.split(",") if families else None
+    for family in families or []:
+        if family not in FAMILIES:
+            print(f"Họ mạng không tồn tại: {family} (có: {', '.join(FAMILIES)})")
+            exit(2)
+    sizes = dict(DEFAULT_SIZES)
+    for part in filter(None, (_option("--sizes") or "").split(";")):
+        family, _, values = part.partition("=")
+        sizes[family] = [int(v) for v in values.split(",")]
+    engines = _option("--engines")
+    timeout = _option("--timeout")
+    max_seconds = _option("--max-seconds")
+
+    data = run_suite(families, sizes, engines.split(",") if engines else None,
+                     bdd_backend=_option("--backend"),
+                     timeout=float(timeout) if timeout else None,
+                     max_seconds=float(max_seconds) if max_seconds else None,
+                     isolate="--in-process" not in sys.argv[1:],
+                     progress=_print_record)
+
+    output = _option("--output")
+    if output:
+        save_results(data, output)
+        print(f"Results written to {output}")
+
+    baseline = _option("--baseline")
+    if baseline:
+        regressions = compare(data, load_results(baseline), threshold=float(_option("--threshold", 1.5)))
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {baseline}:")
+            for message in regressions:
+                print(f"   - {message}")
+            exit(1)
+        print(f"No regression against {baseline}")
@@ -1,7 +1,8 @@
 import time
-from pulp import LpProblem, LpVariable, LpMinimize, lpSum, LpBinary, LpStatus, PULP_CBC_CMD
-from pyeda.inter import expr, expr2bdd
+from pulp import LpVariable, lpSum, LpBinary
 from copy import deepcopy
+from ilp_session import IlpSession
+import metrics
 
 
 class DeadlockDetector:
@@ -13,87 +14,97 @@ class DeadlockDetector:
         self.transition_inputs = self.build_transition_input_map()
 
     def build_transition_input_map(self):
-        input_map = {trans_id: set() for trans_id in self.petri_net.transitions}
-
-        for source, target in self.petri_net.arcs:
-            if source in self.petri_net.places and target in self.petri_net.transitions:
-                input_map[target].add(source)
-
-        return input_map
+        ir = self.petri_net.compile()
+        return {trans_id: ir.input_places(i) for i, trans_id in enumerate(ir.transition_ids)}
 
     def convert_marking_to_bdd(self, marking):
 
         if not marking:
-            return expr2bdd(expr(1))
+            return self.bdd_solver.builder.true()
 
-        boolean_clauses = []
-        for place_id in sorted(self.petri_net.places.keys()):
-            has_token = marking.get(place_id, 0)
-            clause = f"x_{place_id}" if has_token == 1 else f"~x_{place_id}"
-            boolean_clauses.append(clause)
+        return self.bdd_solver.builder.marking(marking, self.petri_net.places)
 
-        bdd_formula = " & ".join(boolean_clauses)
-        return expr2bdd(expr(bdd_formula))
-
-    def detect_deadlock(self, max_attempts=50):
+    def detect_deadlock_por(self):
+        """
+        Tìm deadlock bằng BFS rút gọn (stubborn set) trên mạng tường minh,
+        không cần BDD hay ILP.
+        """
         start_time = time.time()
 
-        if not hasattr(self.bdd_solver, 'current_set'):
-            try:
-                current_states = self.bdd_solver.encode_initial_marking()
-                transition_relation = self.bdd_solver.encode_transition_relation()
-                state_variables = list(self.bdd_solver.place_to_curr_var.values())
-
-                bdd_iteration = 0
-                max_bdd_iterations = 100
+        if not self.petri_net.pre and self.petri_net.transitions:
+            self.petri_net.build_pre_post()
 
-                while bdd_iteration < max_bdd_iterations:
-                    bdd_iteration += 1
+        visited, deadlocks, _, _ = self.petri_net.bfs_reduced(stop_at_first_deadlock=True)
+        elapsed_time = time.time() - start_time
 
-                    state_transition_product = current_states & transition_relation
+        if deadlocks:
+            return deadlocks[0], elapsed_time, "Deadlock FOUND"
+        return None, elapsed_time, f"No reachable deadlock found (explored {len(visited)} reduced states)"
 
-                    try:
-                        if int(state_transition_product.satisfy_count()) == 0:
-                            break
-                    except:
-                        break
+    def reachable_states(self, strategy="monolithic"):
+        """Tập reachable dạng BDD (tính một lần rồi giữ trong bdd_solver.current_set)."""
+        if not hasattr(self.bdd_solver, 'current_set'):
+            self.bdd_solver.check_safe()
+            current_states = self.bdd_solver.encode_initial_marking()
+            transition_relation = self.bdd_solver.encode_relations(strategy)
+            current_states, _ = self.bdd_solver.reachable_fixpoint(current_states, transition_relation, strategy)
+            self.bdd_solver.check_safe(current_states)
+            self.bdd_solver.current_set = current_states
+        return self.bdd_solver.current_set
+
+    def detect_all_deadlocks(self, max_samples=10, strategy="monolithic"):
+        """
+        Mọi deadlock reachable bằng một phép giao BDD: Reach(x) ∧ ∧_t ¬enabled_t(x).
+        Trả về (số deadlock, tối đa max_samples marking mẫu, thời gian, thông báo);
+        max_samples=None -> trả về toàn bộ.
+        """
+        start_time = time.time()
 
-                    next_states_encoded = state_transition_product.smoothing(state_variables)
+        try:
+            reachable_states_bdd = self.reachable_states(strategy)
+        except Exception as error:
+            elapsed_time = time.time() - start_time
+            return 0, [], elapsed_time, f"BDD computation failed: {str(error)}"
 
-                    try:
-                        if int(next_states_encoded.satisfy_count()) == 0:
-                            break
-                    except:
-                        break
+        dead_states = reachable_states_bdd & self.bdd_solver.encode_dead_states()
+        if dead_states.is_zero():
+            elapsed_time = time.time() - start_time
+            return 0, [], elapsed_time, "No reachable deadlock"
 
-                    next_states = expr2bdd(expr(0))
-                    for assignment in next_states_encoded.satisfy_all():
-                        variable_assignments = []
-                        for place_id in self.petri_net.places.keys():
-                            next_var = self.bdd_solver.place_to_next_var[place_id]
-                            value = bool(assignment.get(next_var, False))
-                            variable_assignments.append(f"x_{place_id}" if value else f"~x_{place_id}")
-
-                        state_formula = " & ".join(variable_assignments)
-                        try:
-                            next_states = next_states | expr2bdd(expr(state_formula))
-                        except:
-                            continue
-
-                    updated_states = current_states | next_states
-                    if updated_states.equivalent(current_states):
-                        break
-                    current_states = updated_states
+        count = self.bdd_solver.count_states(dead_states)
+        samples = []
+        for marking in self.bdd_solver.iter_markings(dead_states):
+            if max_samples is not None and len(samples) >= max_samples:
+                break
+            samples.append(marking)
 
-                self.bdd_solver.current_set = current_states
+        elapsed_time = time.time() - start_time
+        return count, samples, elapsed_time, f"{count} reachable deadlock(s) FOUND"
+
+    def detect_deadlock_symbolic(self, strategy="monolithic"):
+        count, samples, elapsed_time, message = self.detect_all_deadlocks(max_samples=1, strategy=strategy)
+        if count:
+            return samples[0], elapsed_time, f"Deadlock FOUND ({count} reachable dead markings)"
+        return None, elapsed_time, message
+
+    @metrics.timed("deadlock")
+    def detect_deadlock(self, max_attempts=50, method="ilp", strategy="monolithic"):
+        if method == "por":
+            return self.detect_deadlock_por()
+        if method == "symbolic":
+            return self.detect_deadlock_symbolic(strategy)
+        if method == "state_equation":
+            return StateEquationDeadlockDetector(self.petri_net).detect_deadlock()
 
-            except Exception as error:
-                elapsed_time = time.time() - start_time
-                return None, elapsed_time, f"BDD computation failed: {str(error)}"
+        start_time = time.time()
 
-        reachable_states_bdd = self.bdd_solver.current_set
+        try:
+            reachable_states_bdd = self.reachable_states(strategy)
+        except Exception as error:
+            elapsed_time = time.time() - start_time
+            return None, elapsed_time, f"BDD computation failed: {str(error)}"
 
-        ilp_problem = LpProblem("FindDeadMarking", LpMinimize)
+        session = IlpSession("FindDeadMarking")
 
         marking_vars = {
             place_id: LpVariable(f"M_{place_id}", cat=LpBinary)
@@ -102,62 +113,261 @@ class DeadlockDetector:
 
         for trans_id, input_places in self.transition_inputs.items():
             if input_places:
-                ilp_problem += (
+                session.add(
                     lpSum([marking_vars[p] for p in input_places]) <= len(input_places) - 1,
                     f"transition_disabled_{trans_id}"
                 )
             else:
-                ilp_problem += lpSum([1]) >= 2, f"no_input_{trans_id}"
+                session.add(lpSum([1]) >= 2, f"no_input_{trans_id}")
 
-        ilp_problem += (
+        session.add(
             lpSum([marking_vars[p] for p in self.petri_net.places]) >= 1,
             "non_empty_marking"
         )
 
-        ilp_problem += 0
-        ilp_solver = PULP_CBC_CMD(msg=0)
+        session.set_objective(0)
         attempt_count = 0
 
-        while attempt_count < max_attempts:
+        # mỗi ứng viên được kiểm tra với BDD trước khi giải tìm ứng viên tiếp theo
+        for candidate_marking in session.iter_solutions(marking_vars, max_attempts):
+            metrics.count("ilp_rounds")
             attempt_count += 1
-
-            ilp_problem.solve(ilp_solver)
-
-            if LpStatus[ilp_problem.status] != "Optimal":
-                elapsed_time = time.time() - start_time
-                return None, elapsed_time, "No reachable deadlock found"
-
-            candidate_marking = {
-                place_id: int(round(marking_vars[place_id].varValue))
-                for place_id in marking_vars
-            }
-
             try:
                 candidate_bdd = self.convert_marking_to_bdd(candidate_marking)
                 intersection = reachable_states_bdd & candidate_bdd
 
-                try:
-                    reachable_count = int(intersection.satisfy_count())
-                except:
-                    reachable_count = 0
-
-                if reachable_count > 0:
+                if not intersection.is_zero():
                     elapsed_time = time.time() - start_time
                     return candidate_marking, elapsed_time, "Deadlock FOUND"
 
             except:
                 pass
 
-            nogood_terms = []
-            for place_id in marking_vars:
-                if candidate_marking[place_id] == 0:
-                    nogood_terms.append(marking_vars[place_id])
-                else:
-                    nogood_terms.append(1 - marking_vars[place_id])
-
-            ilp_problem += (
-                lpSum(nogood_terms) >= 1,
-                f"exclude_solution_{attempt_count}"
-            )
         elapsed_time = time.time() - start_time
-        return None, elapsed_time, f"No deadlock found after {max_attempts} attempts"
\ No newline at end of file
+        if attempt_count < max_attempts:
+            return None, elapsed_time, "No reachable deadlock found"
+        return None, elapsed_time, f"No deadlock found after {max_attempts} attempts"
+
+
+class StateEquationDeadlockDetector:
+    """
+    Kiểm tra deadlock thuần đại số tuyến tính, không dựng không gian trạng thái:
+    ILP gồm phương trình trạng thái M = M0 + C·σ và ràng buộc "mọi transition
+    đều không enabled tại M". Nghiệm giả (M không reachable) được loại bằng
+    ràng buộc siphon/trap:
+    - siphon lớn nhất trong các place rỗng ban đầu rỗng mãi mãi (thêm từ đầu)
+    - trap được đánh dấu ban đầu luôn còn token (cắt khi nghiệm làm rỗng nó)
+    ILP vô nghiệm -> không có deadlock, nếu mạng bị chặn cấu trúc (cận big-M phủ
+    mọi marking reachable). Nghiệm được xác nhận bằng cách tìm dãy bắn thực hiện
+    đúng vector σ; nghiệm không xác nhận được bị loại bằng nogood rồi giải tiếp.
+    """
+
+    def __init__(self, petri_net, token_bound=None):
+        self.petri_net = petri_net
+        if not self.petri_net.pre and self.petri_net.transitions:
+            self.petri_net.build_pre_post()
+        if self.petri_net.pre_matrix is None:
+            self.petri_net.compile_matrices()
+        self.places = self.petri_net.place_order
+        self.transitions = self.petri_net.transition_order
+        structural = self.structural_bound()
+        self.token_bound = token_bound or structural or self.default_token_bound()
+        # "không có deadlock" chỉ là kết luận chắc chắn khi cận big-M phủ mọi marking reachable
+        self.bounded = structural is not None and self.token_bound >= structural
+        self.trace = None       # dãy bắn tới deadlock tìm được gần nhất
+        self.cuts = []          # các trap đã dùng để cắt
+        self.candidates = []    # các nghiệm không hiện thực được, đã loại bằng nogood
+
+    def structural_bound(self):
+        """
+        Cận token mỗi place nếu mạng bị chặn cấu trúc, ngược lại None. Mạng bảo toàn:
+        tổng token ban đầu. Tổng quát: tìm y >= 1 với C·y <= 0 (LP), khi đó y·M giảm
+        dọc mọi dãy bắn nên M(p) <= y·M0 / y(p) với mọi marking reachable.
+        """
+        pre, post, incidence = self.petri_net.pre_matrix, self.petri_net.post_matrix, self.petri_net.incidence
+        initial = [self.petri_net.places[p]['initial'] for p in self.places]
+        if (pre.sum(axis=1) == post.sum(axis=1)).all():
+            return max(1, sum(initial))
+
+        session = IlpSession("StructuralBound")
+        y = [LpVariable(f"Y_{j}", lowBound=1) for j in range(len(self.places))]
+        for i in range(len(self.transitions)):
+            session.add(lpSum(int(incidence[i, j]) * y[j]
+                              for j in incidence[i].nonzero()[0]) <= 0, f"decreasing_{i}")
+        session.set_objective(lpSum(m * y[j] for j, m in enumerate(initial) if m))
+        if session.solve() != "Optimal":
+            return None
+        weights = [v.varValue for v in y]
+        total = sum(m * w for m, w in zip(initial, weights))
+        return max(1, max(int(total / w + 1e-6) for w in weights))
+
+    def default_token_bound(self):
+        """
+        Cận big-M cho mạng không bị chặn cấu trúc: một cận lớn cố định. Kết luận khi
+        ILP vô nghiệm chỉ đúng với các marking có mỗi place <= cận này, nên
+        detect_deadlock() báo "Inconclusive" kèm cận thay vì "No deadlock".
+        """
+        total = sum(self.petri_net.places[p]['initial'] for p in self.places)
+        return max(1000, 10 * total)
+
+    # ---------- siphon / trap ----------
+    def max_siphon(self, places):
+        """Siphon lớn nhất nằm trong `places` (mọi transition đổ vào S đều lấy từ S)."""
+        pre, post = self.petri_net.pre_matrix, self.petri_net.post_matrix
+        col = {p: j for j, p in enumerate(self.places)}
+        siphon = set(places)
+        changed = True
+        while changed:
+            changed = False
+            for p in list(siphon):
+                for i in post[:, col[p]].nonzero()[0]:
+                    if not any(pre[i, col[q]] for q in siphon):
+                        siphon.discard(p)
+                        changed = True
+                        break
+        return siphon
+
+    def max_trap(self, places):
+        """Trap lớn nhất nằm trong `places` (mọi transition lấy từ R đều trả lại R)."""
+        pre, post = self.petri_net.pre_matrix, self.petri_net.post_matrix
+        col = {p: j for j, p in enumerate(self.places)}
+        trap = set(places)
+        changed = True
+        while changed:
+            changed = False
+            for p in list(trap):
+                for i in pre[:, col[p]].nonzero()[0]:
+                    if not any(post[i, col[q]] for q in trap):
+                        trap.discard(p)
+                        changed = True
+                        break
+        return trap
+
+    # ---------- mô hình ILP ----------
+    def build_model(self):
+        net = self.petri_net
+        pre, incidence = net.pre_matrix, net.incidence
+        bound = self.token_bound
+
+        session = IlpSession("StateEquationDeadlock")
+        marking = {p: LpVariable(f"M_{j}", lowBound=0, upBound=bound, cat="Integer")
+                   for j, p in enumerate(self.places)}
+        firing = {t: LpVariable(f"S_{i}", lowBound=0, cat="Integer")
+                  for i, t in enumerate(self.transitions)}
+
+        # phương trình trạng thái
+        for j, p in enumerate(self.places):
+            session.add(
+                marking[p] == net.places[p]['initial']
+                + lpSum(int(incidence[i, j]) * firing[t]
+                        for i, t in enumerate(self.transitions) if incidence[i, j]),
+                f"state_equation_{j}"
+            )
+
+        # mọi transition bị chặn bởi ít nhất một input place thiếu token
+        for i, t in enumerate(self.transitions):
+            inputs = pre[i].nonzero()[0]
+            blockers = []
+            for j in inputs:
+                d = LpVariable(f"D_{i}_{j}", cat=LpBinary)
+                w = int(pre[i, j])
+                session.add(marking[self.places[j]] <= w - 1 + bound * (1 - d), f"blocks_{i}_{j}")
+                blockers.append(d)
+            session.add(lpSum(blockers) >= 1, f"dead_{i}")
+
+        # siphon rỗng ban đầu thì rỗng mãi, transition lấy từ nó không bao giờ bắn
+        empty = [p for p in self.places if net.places[p]['initial'] == 0]
+        siphon = self.max_siphon(empty)
+        for p in siphon:
+            session.add(marking[p] == 0, f"unmarked_siphon_{self.places.index(p)}")
+        col = {p: j for j, p in enumerate(self.places)}
+        for i, t in enumerate(self.transitions):
+            if any(pre[i, col[p]] for p in siphon):
+                session.add(firing[t] == 0, f"never_fires_{i}")
+
+        # ưu tiên vector bắn ngắn -> dễ xác nhận bằng dãy bắn
+        session.set_objective(lpSum(firing.values()))
+        return session, marking, firing
+
+    # ---------- xác nhận nghiệm ----------
+    def realize(self, counts, max_nodes=100000):
+        """
+        Tìm dãy bắn từ M0 dùng đúng counts[t] lần mỗi transition (DFS có nhớ).
+        Trả về list transition hoặc None nếu không có / vượt max_nodes.
+        """
+        moves = self.petri_net.compile_moves(self.places)
+        index = {t: i for i, t in enumerate(self.petri_net.transitions)}
+        start = tuple(self.petri_net.places[p]['initial'] for p in self.places)
+        remaining = tuple(counts.get(t, 0) for t in self.petri_net.transitions)
+        seen = set()
+        stack = [(start, remaining, [])]
+        while stack and len(seen) < max_nodes:
+            m, left, path = stack.pop()
+            if not any(left):
+                return path
+            if (m, left) in seen:
+                continue
+            seen.add((m, left))
+            for t, k in index.items():
+                pre, effect = moves[k]
+                if left[k] and all(m[j] >= w for j, w in pre):
+                    new_m = list(m)
+                    for j, d in effect:
+                        new_m[j] += d
+                    new_left = left[:k] + (left[k] - 1,) + left[k + 1:]
+                    stack.append((tuple(new_m), new_left, path + [t]))
+        return None
+
+    def detect_deadlock(self, max_rounds=20):
+        start_time = time.time()
+        self.trace, self.cuts, self.candidates = None, [], []
+
+        if any(not self.petri_net.pre[t] for t in self.transitions):
+            return None, time.time() - start_time, "No deadlock: a transition without input places is always enabled"
+
+        session, marking, firing = self.build_model()
+
+        for _ in range(max_rounds):
+            metrics.count("ilp_rounds")
+            status = session.solve()
+            if status == "Infeasible":
+                return None, time.time() - start_time, self.infeasible_message()
+            if status != "Optimal":
+                # chỉ Infeasible mới chứng minh không có deadlock
+                return None, time.time() - start_time, f"Inconclusive: ILP solver status '{status}'"
+
+            candidate = session.values(marking)
+            counts = session.values(firing)
+
+            # trap được đánh dấu ban đầu nhưng bị làm rỗng -> nghiệm giả
+            unmarked = [p for p in self.places if candidate[p] == 0]
+            trap = self.max_trap(unmarked)
+            if any(self.petri_net.places[p]['initial'] for p in trap):
+                self.cuts.append(trap)
+                metrics.count("trap_cuts")
+                session.add_cut(lpSum(marking[p] for p in trap) >= 1, "marked_trap")
+                continue
+
+            trace = self.realize(counts)
+            if trace is not None:
+                self.trace = trace
+                return candidate, time.time() - start_time, f"Deadlock FOUND (firing sequence of length {len(trace)})"
+            # không tìm được dãy bắn tới nghiệm này: loại nó bằng nogood và tìm tiếp;
+            # marking đã loại chưa bị bác bỏ nên "vô nghiệm" về sau không còn là chứng minh
+            self.candidates.append(candidate)
+            metrics.count("nogood_cuts")
+            session.exclude_point(marking, candidate, self.token_bound)
+
+        return None, time.time() - start_time, f"Inconclusive after {max_rounds} refinement rounds"
+
+    def infeasible_message(self):
+        """Kết luận khi ILP vô nghiệm, tùy cận token và các nghiệm đã loại mà chưa bác bỏ."""
+        if self.candidates:
+            return (f"Inconclusive: {len(self.candidates)} state-equation solution(s) not realizable, "
+                    f"no other candidate remains")
+        if not self.bounded:
+            return (f"Inconclusive: no deadlock with at most {self.token_bound} tokens per place "
+                    f"(net not structurally bounded)")
+        if self.cuts:
+            return f"No deadlock (state equation + {len(self.cuts)} trap cut(s))"
+        return "No deadlock (state equation infeasible)"
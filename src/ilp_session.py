@@ -0,0 +1,98 @@
+from pulp import LpProblem, LpMinimize, LpVariable, LpBinary, lpSum, LpStatus, PULP_CBC_CMD, HiGHS, listSolvers
+
+import metrics
+
+
+def default_solver():
+    """
+    HiGHS qua highspy (khai báo trong requirements.txt) giải ngay trong tiến trình,
+    không ghi file LP và không fork. Chỉ khi môi trường thiếu highspy mới dùng CBC
+    của PuLP: mỗi lần giải ghi mô hình ra file tạm và chạy một tiến trình cbc.
+    """
+    if "HiGHS" in listSolvers(onlyAvailable=True):
+        return HiGHS(msg=False)
+    return PULP_CBC_CMD(msg=0, warmStart=True)
+
+
+class IlpSession:
+    """
+    Một mô hình ILP sống suốt vòng lặp tinh chỉnh: ràng buộc cắt (nogood, trap...)
+    được thêm dần vào cùng LpProblem thay vì dựng lại mô hình mỗi vòng. PuLP vẫn
+    gửi toàn bộ mô hình cho solver ở mỗi lần solve(); với CBC, nghiệm trước được
+    đưa vào làm điểm xuất phát (warmStart) nhưng sau một nogood nó không còn khả
+    thi nên ít có tác dụng.
+    """
+
+    def __init__(self, name, sense=LpMinimize, solver=None):
+        self.name = name
+        self.problem = LpProblem(name, sense)
+        self.solver = solver or default_solver()
+        self.constraints = []   # [(ràng buộc, tên)] theo thứ tự thêm, kể cả cut
+        self.cut_count = 0
+        self.solve_count = 0
+
+    def add(self, constraint, name):
+        self.problem += constraint, name
+        self.constraints.append((constraint, name))
+
+    def add_cut(self, constraint, prefix="cut"):
+        self.cut_count += 1
+        self.add(constraint, f"{prefix}_{self.cut_count}")
+
+    def exclude(self, variables, values):
+        """Nogood loại đúng một phép gán 0/1 của các biến nhị phân `variables`."""
+        self.add_cut(lpSum(v if not values[k] else 1 - v for k, v in variables.items()) >= 1,
+                     "exclude_solution")
+
+    def exclude_point(self, variables, values, upper):
+        """
+        Nogood loại đúng một điểm nguyên của các biến `variables` có miền [0, upper]:
+        với mỗi biến, một biến nhị phân chọn "nhỏ hơn" hoặc "lớn hơn" giá trị cũ
+        (big-M bằng chính `upper`), và ít nhất một lựa chọn phải đúng.
+        """
+        self.cut_count += 1
+        tag = f"nogood_{self.cut_count}"
+        choices = []
+        for j, (k, v) in enumerate(variables.items()):
+            c = values[k]
+            if c > 0:
+                below = LpVariable(f"{tag}_lt_{j}", cat=LpBinary)
+                self.add(v <= c - 1 + (upper - c + 1) * (1 - below), f"{tag}_lt_{j}")
+                choices.append(below)
+            if c < upper:
+                above = LpVariable(f"{tag}_gt_{j}", cat=LpBinary)
+                self.add(v >= (c + 1) * above, f"{tag}_gt_{j}")
+                choices.append(above)
+        self.add(lpSum(choices) >= 1, tag)
+
+    def set_objective(self, expression):
+        self.problem.setObjective(lpSum([expression]))
+
+    def solve(self):
+        """Giải mô hình hiện tại; trả về trạng thái dạng chuỗi ("Optimal", "Infeasible", ...)."""
+        self.solve_count += 1
+        metrics.count("ilp_solves")
+        with metrics.phase("ilp_solve"):
+            self.problem.solve(self.solver)
+        return LpStatus[self.problem.status]
+
+    @staticmethod
+    def values(variables):
+        return {k: int(round(v.varValue or 0)) for k, v in variables.items()}
+
+    # ---------- nhiều nghiệm liên tiếp ----------
+    def iter_solutions(self, variables, limit=None):
+        """
+        Lần lượt các nghiệm phân biệt trên các biến nhị phân `variables` (tối đa `limit`):
+        mỗi lần chỉ giải khi người gọi xin nghiệm tiếp theo, nên ứng viên được kiểm tra
+        trước lần giải sau. Nghiệm đã trả về bị loại bằng exclude() trước khi giải lại.
+        Dừng khi mô hình hết nghiệm ("Optimal" là trạng thái duy nhất cho nghiệm).
+        """
+        found = 0
+        while limit is None or found < limit:
+            if self.solve() != "Optimal":
+                return
+            solution = self.values(variables)
+            found += 1
+            yield solution
+            self.exclude(variables, solution)
@@ -2,10 +2,10 @@ import os
 import sys
 import time
 
-from reachability_explicit import ReachabilityNet
-from reachability_bdd import SymbolicReachabilityPyEDA
-from ilp_deadlock import DeadlockDetector
-from optimization import OptimizationReachability
+from analysis_session import AnalysisSession
+from optimization import load_objectives
+from result_cache import ResultCache
+import metrics
 
 
 # ==============================
@@ -39,22 +39,26 @@ def parse_objective_input(user_input, places):
 
     return weights
 
-def test_file(file_path):
+def cached_note(session, task):
+    """Hậu tố cho dòng thời gian/bộ nhớ của kết quả lấy từ ResultCache (không đo ở lần chạy này)."""
+    return " (cached, measured on an earlier run)" if session.from_cache(task) else ""
+
+def test_file(file_path, deadlock_method="ilp", bdd_backend=None, cache=None, opt_method="explicit", weights_file=None):
     filename = os.path.basename(file_path)
     print(f"\n{'=' * 70}")
     print(f"Testing: {filename}")
     print(f"{'=' * 70}")
 
-    net = ReachabilityNet()
-
     print(f"\n[Task 1] Parsing {filename}")
-    if not net.parse_pnml(file_path):
+    session = AnalysisSession.from_pnml(file_path, bdd_backend=bdd_backend, cache=cache)
+    if session is None:
         print("Parsing failed. Skipping this file.")
         return
 
+    net = session.net
     net.summary()
 
-    is_consistent = net.check_consistency()
+    is_consistent = session.is_valid()
 
     if not is_consistent:
         print("Network is invalid. Skipping Task 2 but continuing with Task 3.")
@@ -64,13 +68,12 @@ def test_file(file_path):
 
         print(f"\n[Task 2] Computing Reachability Graph (BFS)")
         try:
-            net.build_pre_post()
-            reachable_markings, exec_time, mem_used = net.bfs() 
+            reachable_markings, exec_time, mem_used = session.explicit()
             explicit_count = len(reachable_markings)
 
             print(f"   Total reachable states: {explicit_count}")
-            print(f"   Time: {exec_time:.10f}s")
-            print(f"   Memory used: {mem_used:.10f} MB")
+            print(f"   Time: {exec_time:.10f}s{cached_note(session, 'explicit')}")
+            print(f"   Memory used: {mem_used:.10f} MB{cached_note(session, 'explicit')}")
 
             if explicit_count <= 20:
                 print("   Marking list:")
@@ -86,18 +89,13 @@ def test_file(file_path):
 
     print(f"\n[Task 3] Symbolic Reachability (BDD)")
     try:
-        sym_net = SymbolicReachabilityPyEDA()
-
-        sym_net.places = net.places
-        sym_net.transitions = net.transitions
-        sym_net.arcs = net.arcs
-
-        bdd_count, bdd_time, bdd_mem, formulas = sym_net.compute_reachable(return_formula=True)
+        bdd_count, bdd_time, bdd_mem, formulas = session.symbolic()
 
         print(f"   Total states (Symbolic): {bdd_count}")
-        print(f"   Time: {bdd_time:.10f}s")
-        print(f"   Memory used: {bdd_mem:.10f} MB")
+        print(f"   Time: {bdd_time:.10f}s{cached_note(session, 'symbolic')}")
+        print(f"   Memory used: {bdd_mem:.10f} MB{cached_note(session, 'symbolic')}")
         
+        formulas = session.symbolic_formulas()
         print(f"   Symbolic formula:")
         print(f"      - Initial: {formulas['initial']}")
         print(f"      - Final: {formulas['final']}")
@@ -116,15 +114,21 @@ def test_file(file_path):
             print(f"   Cannot compare: Network invalid or Task 2 failed")
 
     except Exception as e:
+        # vd. mạng không 1-safe: Task 4, 5 vẫn chạy (cách nào cần BDD sẽ tự báo lỗi)
         print(f"Task 3 Error: {e}")
-        return
 
-    print(f"\n[Task 4] Deadlock Detection (ILP + BDD)...")
+    if deadlock_method == "por" and is_consistent:
+        print(f"\n[Task 4] Deadlock Detection (Partial-order reduction)...")
+    elif deadlock_method == "symbolic":
+        print(f"\n[Task 4] Deadlock Detection (Symbolic: Reach ∧ ∧¬enabled_t)...")
+    elif deadlock_method == "state_equation" and is_consistent:
+        print(f"\n[Task 4] Deadlock Detection (State equation ILP + siphon/trap)...")
+    else:
+        deadlock_method = "ilp"
+        print(f"\n[Task 4] Deadlock Detection (ILP + BDD)...")
 
     try:
-        detector = DeadlockDetector(net, sym_net)
-
-        dead_marking, elapsed_time, status_message = detector.detect_deadlock(max_attempts=20)
+        dead_marking, elapsed_time, status_message = session.detect_deadlock(deadlock_method, max_attempts=20)
 
         print(f"Completed.")
 
@@ -139,22 +143,25 @@ def test_file(file_path):
             print(f"   Result: NO DEADLOCK")
             print(f"   Reason: {status_message}")
 
-        print(f"   Time: {elapsed_time:.4f}s")
+        print(f"   Time: {elapsed_time:.4f}s{cached_note(session, 'deadlock')}")
 
     except Exception as error:
         print(f"Task 4 Error: {error}")
 
 # --- TASK 5: Optimization ---
     if is_consistent:
-        print(f"\n[Task 5] Optimization Over Reachable Markings...")
+        if opt_method == "symbolic":
+            print(f"\n[Task 5] Optimization Over Reachable Markings (Symbolic: max-weight path on BDD)...")
+        elif opt_method == "bnb":
+            print(f"\n[Task 5] Optimization Over Reachable Markings (Branch-and-bound, state-equation bound)...")
+        else:
+            print(f"\n[Task 5] Optimization Over Reachable Markings...")
 
-        try:
-            opt_net = OptimizationReachability()
-            opt_net.places = net.places
-            opt_net.transitions = net.transitions
-            opt_net.arcs = net.arcs
-            opt_net.build_pre_post()
+        if weights_file is not None:
+            optimize_from_file(session, weights_file)
+            return
 
+        try:
             # 🧠 YÊU CẦU NGƯỜI DÙNG NHẬP OBJECTIVE
             print("\nNhập hàm mục tiêu dạng 'p1=2 p3=-1 p4=5'")
             print("Hoặc nhấn ENTER để dùng mặc định: tất cả trọng số = 1")
@@ -166,15 +173,15 @@ def test_file(file_path):
 
             print(f"➡️  Objective function: maximize {weights}")
 
-            optimal_marking, optimal_value, total_markings, exec_time_opt, mem_used_opt = opt_net.optimize_marking(weights)
+            optimal_marking, optimal_value, total_markings, exec_time_opt, mem_used_opt = session.optimize(weights, opt_method)
 
             if optimal_marking is None:
                 print("❌ Không tìm được marking tối ưu.")
             else:
                 print(f"- Optimal value: {optimal_value}")
                 print(f"- Optimal marking: {optimal_marking}")
-                print(f"- Running time: {exec_time_opt:.10f}s")
-                print(f"- Memory used: {mem_used_opt:.10f} MB")
+                print(f"- Running time: {exec_time_opt:.10f}s{cached_note(session, 'optimize')}")
+                print(f"- Memory used: {mem_used_opt:.10f} MB{cached_note(session, 'optimize')}")
 
         except Exception as e:
             print(f"❌ Lỗi Task 5: {e}")
@@ -183,6 +190,35 @@ def test_file(file_path):
         print("\n[Task 5] Skip optimization (network invalid)")
 
 
+def optimize_from_file(session, weights_file):
+    """Task 5 không tương tác: mỗi dòng của weights_file là một hàm mục tiêu, tối ưu cùng lúc."""
+    try:
+        # cùng bộ đọc với batch_runner: file sai bị từ chối với số dòng, không bỏ qua lặng lẽ
+        objectives = load_objectives(weights_file, session.net.places)
+
+        values, markings, total_markings, exec_time_opt, mem_used_opt = session.optimize_batch(objectives)
+
+        print(f"   {len(objectives)} objective(s) over {total_markings} reachable markings")
+        for k, (weights, value, marking) in enumerate(zip(objectives, values, markings), start=1):
+            print(f"   {k}. maximize {weights} -> {value}: {marking}")
+        print(f"- Running time: {exec_time_opt:.10f}s{cached_note(session, 'optimize')}")
+        print(f"- Memory used: {mem_used_opt:.10f} MB{cached_note(session, 'optimize')}")
+
+    except Exception as e:
+        print(f"❌ Lỗi Task 5: {e}")
+
+
+def print_metrics(recorded):
+    """Bảng phase (thời gian, đỉnh bộ nhớ) và counter của một file."""
+    print(f"\n[Metrics]")
+    for name, stats in sorted(recorded.phases.items(), key=lambda item: -item[1]['seconds']):
+        print(f"   {name:<16} {stats['seconds']:>10.4f}s  x{stats['calls']:<4} peak {stats['peak_mb']:.3f} MB")
+    for name, value in sorted({**recorded.counters, **recorded.gauges}.items()):
+        print(f"   {name:<24} {value:.6g}" if isinstance(value, float) else f"   {name:<24} {value}")
+    for name, values in sorted(recorded.series.items()):
+        print(f"   {name:<24} {len(values)} step(s), max {max(values)}: {values[:10]}{' ...' if len(values) > 10 else ''}")
+
+
 def main():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     examples_dir = os.path.join(os.path.dirname(current_dir), "examples")
@@ -201,9 +237,40 @@ def main():
 
     print(f"Found {len(pnml_files)} PNML file(s).\n")
 
+    deadlock_method = "ilp"
+    if "--por" in sys.argv[1:]:
+        deadlock_method = "por"
+    elif "--symbolic" in sys.argv[1:]:
+        deadlock_method = "symbolic"
+    elif "--state-equation" in sys.argv[1:]:
+        deadlock_method = "state_equation"
+    bdd_backend = sys.argv[sys.argv.index("--backend") + 1] if "--backend" in sys.argv else None
+    metrics_file = sys.argv[sys.argv.index("--metrics") + 1] if "--metrics" in sys.argv else None
+    # --metrics đo từng phase: kết quả lấy từ cache không có phase nào để đo
+    cache = None if "--no-cache" in sys.argv[1:] or metrics_file is not None else ResultCache()
+    opt_method = "explicit"
+    if "--symbolic-opt" in sys.argv[1:]:
+        opt_method = "symbolic"
+    elif "--bnb" in sys.argv[1:]:
+        opt_method = "bnb"
+    weights_file = sys.argv[sys.argv.index("--weights") + 1] if "--weights" in sys.argv else None
+
+    recordings = []
+
     for f in pnml_files:
         path = os.path.join(examples_dir, f)
-        test_file(path)
+        if metrics_file is None:
+            # không tracemalloc: thời gian không bị làm chậm, bộ nhớ theo đỉnh RSS
+            test_file(path, deadlock_method, bdd_backend, cache, opt_method, weights_file)
+            continue
+        with metrics.recording() as recorded:
+            test_file(path, deadlock_method, bdd_backend, cache, opt_method, weights_file)
+        recordings.append(({'net': f}, recorded))
+        print_metrics(recorded)
+
+    if metrics_file is not None:
+        metrics.save(metrics_file, recordings)
+        print(f"\nMetrics written to {metrics_file}")
 
     print(f"\n{'=' * 70}")
     print("All files processed.")
@@ -0,0 +1,236 @@
+import functools
+import json
+import re
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows: không có ru_maxrss
+    resource = None
+
+# Đo theo phase cho mọi engine. Code engine gọi các hàm cấp module (phase, count,
+# gauge, observe); ngoài một khối `with recording()` thì các hàm này không làm gì,
+# nên engine không phải truyền đối tượng đo qua từng lời gọi.
+#   phase   : thời gian thực (cộng dồn), số lần gọi, đỉnh bộ nhớ Python (tracemalloc)
+#   measure : thời gian và đỉnh bộ nhớ của một khối, không ghi phase (bộ nhớ engine trả về)
+#   counter : số cộng dồn (ilp_solves, bfs_states, ...)
+#   gauge   : giá trị cuối cùng (bfs_states_per_second, bdd_reachable_nodes, ...)
+#   series  : dãy giá trị theo bước (bfs_frontier theo level, bdd_nodes theo vòng lặp)
+
+_MB = 1024 * 1024
+_active = None
+
+
+def max_rss_mb():
+    """Đỉnh RSS của tiến trình từ lúc khởi động (ru_maxrss), 0 nếu không đọc được."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / _MB if sys.platform == "darwin" else peak / 1024  # macOS: byte, Linux: KB
+
+
+class Metrics:
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.phases = {}    # {tên: {'calls', 'seconds', 'peak_mb'}}
+        self.counters = {}
+        self.gauges = {}
+        self.series = {}
+        self._stack = []    # [bộ nhớ lúc vào phase, đỉnh đã thấy] của các phase đang mở
+
+    @contextmanager
+    def measure(self):
+        """
+        Thời gian thực và đỉnh bộ nhớ của một khối lệnh, không ghi phase: trả về dict
+        {'seconds', 'peak_mb'} được điền khi ra khỏi khối.
+        - tracemalloc đang bật: phần tăng của đỉnh bộ nhớ Python so với lúc vào khối.
+          Khối lồng nhau được tính cho cả khối ngoài (tracemalloc.reset_peak() ở mỗi
+          khối nên đỉnh của khối ngoài được giữ lại trong _stack trước khi reset).
+        - không bật: phần tăng của đỉnh RSS tiến trình (ru_maxrss); bằng 0 khi khối
+          không vượt đỉnh cũ, nên chỉ là chặn dưới.
+        Thời gian chỉ tính thân khối, không gồm các lời gọi tracemalloc.
+        """
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        frame = [0, 0]
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            for outer in self._stack:
+                outer[1] = max(outer[1], peak)
+            tracemalloc.reset_peak()
+            frame = [current, current]
+        else:
+            rss_before = max_rss_mb()
+        self._stack.append(frame)
+        usage = {'seconds': 0.0, 'peak_mb': 0.0}
+        start = time.perf_counter()
+        try:
+            yield usage
+        finally:
+            usage['seconds'] = time.perf_counter() - start
+            self._stack.pop()
+            if tracing:
+                peak = max(frame[1], tracemalloc.get_traced_memory()[1])
+                for outer in self._stack:
+                    outer[1] = max(outer[1], peak)
+                usage['peak_mb'] = (peak - frame[0]) / _MB
+            else:
+                usage['peak_mb'] = max_rss_mb() - rss_before
+
+    @contextmanager
+    def phase(self, name):
+        """Đo một phase bằng measure() rồi cộng dồn vào phases[name] (đỉnh lấy max)."""
+        usage = {'seconds': 0.0, 'peak_mb': 0.0}
+        try:
+            with self.measure() as usage:
+                yield usage
+        finally:
+            stats = self.phases.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_mb': 0.0})
+            stats['calls'] += 1
+            stats['seconds'] += usage['seconds']
+            stats['peak_mb'] = max(stats['peak_mb'], usage['peak_mb'])
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def observe(self, name, value):
+        self.series.setdefault(name, []).append(value)
+
+    def to_dict(self):
+        return {'phases': self.phases, 'counters': self.counters,
+                'gauges': self.gauges, 'series': self.series}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, labels=None, prefix="petri"):
+        return to_prometheus([(labels or {}, self)], prefix)
+
+
+# ---------- API cấp module dùng trong engine ----------
+@contextmanager
+def recording(trace_memory=True):
+    """
+    Bật đo cho khối lệnh, trả về Metrics. trace_memory=True bật tracemalloc (nếu chưa
+    bật) trong suốt khối: đỉnh bộ nhớ chính xác nhưng mọi phép cấp phát chậm hơn.
+    """
+    global _active
+    previous = _active
+    metrics = Metrics(trace_memory)
+    started = trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    _active = metrics
+    try:
+        yield metrics
+    finally:
+        _active = previous
+        if started:
+            tracemalloc.stop()
+
+
+def active():
+    """Metrics đang ghi, None nếu không có khối recording() nào."""
+    return _active
+
+
+def phase(name):
+    return _active.phase(name) if _active is not None else nullcontext()
+
+
+def measure():
+    """
+    Metrics.measure() của lần ghi đang bật: engine lấy bộ nhớ báo cáo từ đây để khớp
+    với đỉnh của phase. Ngoài recording() (hoặc trace_memory=False) peak_mb là phần
+    tăng của đỉnh RSS (ru_maxrss), không làm chậm engine.
+    """
+    return (_active or Metrics(trace_memory=False)).measure()
+
+
+def timed(name):
+    """Decorator: cả lời gọi hàm là một phase."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+
+def gauge(name, value):
+    if _active is not None:
+        _active.gauge(name, value)
+
+
+def observe(name, value):
+    if _active is not None:
+        _active.observe(name, value)
+
+
+# ---------- xuất ----------
+def _metric_name(*parts):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", "_".join(parts))
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{_metric_name(k)}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def to_prometheus(recordings, prefix="petri"):
+    """
+    Định dạng text của Prometheus cho nhiều lần đo [(labels, Metrics)], vd. một lần
+    cho mỗi file mạng; mỗi metric có một dòng # TYPE rồi một mẫu cho mỗi lần đo.
+    Series được xuất thành _count, _sum và _max.
+    """
+    families = {}   # {tên: (kiểu, [(labels, giá trị)])}
+
+    def sample(name, kind, labels, value):
+        families.setdefault(name, (kind, []))[1].append((labels, value))
+
+    for labels, metrics in recordings:
+        for name, stats in metrics.phases.items():
+            with_phase = dict(labels, phase=name)
+            sample(_metric_name(prefix, "phase_seconds_total"), "counter", with_phase, stats['seconds'])
+            sample(_metric_name(prefix, "phase_calls_total"), "counter", with_phase, stats['calls'])
+            sample(_metric_name(prefix, "phase_peak_bytes"), "gauge", with_phase, int(stats['peak_mb'] * _MB))
+        for name, value in metrics.counters.items():
+            sample(_metric_name(prefix, name, "total"), "counter", labels, value)
+        for name, value in metrics.gauges.items():
+            sample(_metric_name(prefix, name), "gauge", labels, value)
+        for name, values in metrics.series.items():
+            sample(_metric_name(prefix, name, "count"), "gauge", labels, len(values))
+            sample(_metric_name(prefix, name, "sum"), "gauge", labels, sum(values))
+            sample(_metric_name(prefix, name, "max"), "gauge", labels, max(values, default=0))
+
+    lines = []
+    for name, (kind, samples) in families.items():
+        lines.append(f"# TYPE {name} {kind}")
+        lines += [f"{name}{_label_text(labels)} {value}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+def save(filename, recordings):
+    """
+    Ghi [(labels, Metrics)] ra file: .json -> list {labels, phases, counters, gauges,
+    series}; đuôi khác -> text Prometheus.
+    """
+    with open(filename, 'w', encoding='utf-8') as f:
+        if filename.endswith(".json"):
+            json.dump([dict(labels=labels, **metrics.to_dict()) for labels, metrics in recordings],
+                      f, indent=2, ensure_ascii=False)
+        else:
+            f.write(to_prometheus(recordings))
@@ -0,0 +1,171 @@
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from net_ir import CompiledNet
+
+# Định dạng nhị phân của một mạng đã parse (.pnb), little-endian:
+#   header      : MAGIC, FORMAT_VERSION, flags, số place, số transition, số node, số arc
+#   bảng section: (offset, số phần tử) cho từng mảng trong SECTIONS, mỗi mảng căn 8 byte
+#   string table: str_offsets (uint64) + str_blob (utf-8) gồm id các node (place, transition,
+#                 rồi node lạ chỉ xuất hiện trong arc), tên place, tên transition
+#   mảng        : initial, arc_src/arc_tgt (chỉ số node), arc_w, rồi các mảng CSR của
+#                 CompiledNet (chỉ khi FLAG_IR: mọi arc nối place <-> transition)
+# Mảng được đọc bằng np.frombuffer trên mmap nên không sao chép và nhiều tiến trình
+# dùng chung page cache của cùng một file.
+MAGIC = b"PETRINET"
+FORMAT_VERSION = 1
+FLAG_IR = 1
+
+_HEADER = struct.Struct("<8sIIQQQQ")
+IR_ARRAYS = ("pre_ptr", "pre_idx", "pre_w", "post_ptr", "post_idx", "post_w",
+             "support_ptr", "support_idx", "consumers_ptr", "consumers_idx",
+             "producers_ptr", "producers_idx")
+SECTIONS = (("str_offsets", np.uint64), ("str_blob", np.uint8), ("initial", np.int64),
+            ("arc_src", np.int32), ("arc_tgt", np.int32), ("arc_w", np.int64)) + \
+           tuple((name, np.int64) for name in IR_ARRAYS)
+_TABLE = struct.Struct("<" + "QQ" * len(SECTIONS))
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def write_net(net, filename):
+    """
+    Ghi `net` (PetriNet) ra file nhị phân. Ghi file tạm rồi đổi tên để tiến trình
+    đang mmap file cũ không đọc phải file ghi dở.
+    """
+    place_ids = list(net.places)
+    transition_ids = list(net.transitions)
+    node_index = {n: i for i, n in enumerate(place_ids + transition_ids)}
+    nodes = place_ids + transition_ids
+    for src, tgt in net.arcs:
+        for n in (src, tgt):
+            if n not in node_index:
+                node_index[n] = len(nodes)
+                nodes.append(n)
+
+    def name_of(value, default):
+        return value if isinstance(value, str) else default
+
+    strings = nodes + [name_of(net.places[p].get('name'), p) for p in place_ids] + \
+        [name_of(net.transitions[t], t) for t in transition_ids]
+    encoded = [s.encode('utf-8') for s in strings]
+    arrays = {
+        "str_offsets": np.cumsum([0] + [len(b) for b in encoded], dtype=np.uint64),
+        "str_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "initial": np.array([net.places[p]['initial'] for p in place_ids], dtype=np.int64),
+        "arc_src": np.array([node_index[s] for s, _ in net.arcs], dtype=np.int32),
+        "arc_tgt": np.array([node_index[t] for _, t in net.arcs], dtype=np.int32),
+        "arc_w": np.array([net.arc_weights.get(a, 1) for a in net.arcs], dtype=np.int64),
+    }
+
+    ir = net.compile()
+    flags = 0
+    if not ir.invalid_arcs and not any(map(ir.is_broken, range(ir.n_transitions))):
+        flags |= FLAG_IR
+        arrays.update((name, getattr(ir, name)) for name in IR_ARRAYS)
+
+    offset = _align(_HEADER.size + _TABLE.size)
+    table, chunks = [], []
+    for name, dtype in SECTIONS:
+        data = np.ascontiguousarray(arrays.get(name, np.empty(0)), dtype=dtype).tobytes()
+        table += [offset, len(data) // np.dtype(dtype).itemsize]
+        chunks.append((offset, data))
+        offset = _align(offset + len(data))
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, flags, len(place_ids),
+                                 len(transition_ids), len(nodes), len(net.arcs)))
+            f.write(_TABLE.pack(*table))
+            for start, data in chunks:
+                f.write(b"\0" * (start - f.tell()))
+                f.write(data)
+        os.replace(tmp, filename)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def map_arrays(filename):
+    """
+    mmap file chỉ đọc; trả về (header dict, {tên section: mảng numpy trên mmap}).
+    Lỗi định dạng -> ValueError.
+    """
+    with open(filename, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mm) < _HEADER.size + _TABLE.size:
+        raise ValueError(f"{filename}: file quá ngắn cho định dạng mạng nhị phân")
+    magic, version, flags, n_places, n_transitions, n_nodes, n_arcs = _HEADER.unpack_from(mm, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{filename}: không phải file mạng nhị phân")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{filename}: phiên bản định dạng {version} không được hỗ trợ")
+
+    table = _TABLE.unpack_from(mm, _HEADER.size)
+    arrays = {}
+    for k, (name, dtype) in enumerate(SECTIONS):
+        offset, count = table[2 * k], table[2 * k + 1]
+        if offset + count * np.dtype(dtype).itemsize > len(mm):
+            raise ValueError(f"{filename}: section '{name}' vượt quá cuối file")
+        arrays[name] = np.frombuffer(mm, dtype=dtype, count=count, offset=offset)
+    header = {'flags': flags, 'n_places': n_places, 'n_transitions': n_transitions,
+              'n_nodes': n_nodes, 'n_arcs': n_arcs}
+    return header, arrays
+
+
+def read_net(filename, cls):
+    """
+    Dựng một `cls` (PetriNet hoặc lớp con) từ file nhị phân, không parse XML. Nếu file
+    có FLAG_IR thì CompiledNet của mạng dùng thẳng các mảng trên mmap (không dựng lại).
+    """
+    header, arrays = map_arrays(filename)
+    n_places, n_transitions = header['n_places'], header['n_transitions']
+    n_nodes = header['n_nodes']
+
+    offsets = arrays["str_offsets"].tolist()
+    blob = arrays["str_blob"].tobytes()
+    strings = [blob[offsets[k]:offsets[k + 1]].decode('utf-8') for k in range(len(offsets) - 1)]
+    nodes = strings[:n_nodes]
+    place_names = strings[n_nodes:n_nodes + n_places]
+    transition_names = strings[n_nodes + n_places:]
+
+    net = cls()
+    place_ids = nodes[:n_places]
+    transition_ids = nodes[n_places:n_places + n_transitions]
+    net.places = {p: {'name': name, 'initial': m}
+                  for p, name, m in zip(place_ids, place_names, arrays["initial"].tolist())}
+    net.transitions = dict(zip(transition_ids, transition_names))
+    net.arcs = [(nodes[s], nodes[t]) for s, t in zip(arrays["arc_src"].tolist(), arrays["arc_tgt"].tolist())]
+    net.arc_weights = {a: w for a, w in zip(net.arcs, arrays["arc_w"].tolist()) if w != 1}
+
+    if header['flags'] & FLAG_IR:
+        ir = CompiledNet.from_arrays(place_ids, transition_ids, arrays["initial"],
+                                     {name: arrays[name] for name in IR_ARRAYS})
+        net._compiled = (net.fingerprint(), ir)
+    return net
+
+
+if __name__ == "__main__":
+    import sys
+
+    from pnml_parser import PetriNet
+
+    if len(sys.argv) < 3:
+        print("Usage: python net_binary.py <input.pnml> <output.pnb>")
+        exit(1)
+
+    net = PetriNet()
+    if not net.parse_pnml(sys.argv[1]):
+        exit(1)
+    write_net(net, sys.argv[2])
+    print(f"{len(net.places)} places, {len(net.transitions)} transitions, {len(net.arcs)} arcs "
+          f"-> {sys.argv[2]} ({os.path.getsize(sys.argv[2])} bytes)")
@@ -0,0 +1,120 @@
+import random
+
+from reachability_explicit import ReachabilityNet
+
+# Các họ mạng có tham số để đo khả năng mở rộng của engine. Mọi arc có trọng số 1
+# (như build_pre_post) nên dung lượng bộ đệm được mô hình bằng place "slot" bù.
+
+
+def _place(net, pid, initial=0):
+    net.places[pid] = {'name': pid, 'initial': initial}
+
+
+def _transition(net, tid, pre, post):
+    net.transitions[tid] = tid
+    net.arcs += [(p, tid) for p in pre] + [(tid, p) for p in post]
+
+
+def philosophers(n):
+    """n triết gia, mỗi người lấy nĩa trái rồi nĩa phải -> có deadlock khi mọi người cầm nĩa trái."""
+    net = ReachabilityNet()
+    for i in range(n):
+        _place(net, f"fork{i}", 1)
+        _place(net, f"think{i}", 1)
+        _place(net, f"left{i}")
+        _place(net, f"eat{i}")
+    for i in range(n):
+        right = f"fork{(i + 1) % n}"
+        _transition(net, f"take_left{i}", [f"think{i}", f"fork{i}"], [f"left{i}"])
+        _transition(net, f"take_right{i}", [f"left{i}", right], [f"eat{i}"])
+        _transition(net, f"release{i}", [f"eat{i}"], [f"think{i}", f"fork{i}", right])
+    return net
+
+
+def token_ring(n, tokens=1):
+    """Vòng n place, `tokens` token ở place đầu; không deadlock."""
+    net = ReachabilityNet()
+    for i in range(n):
+        _place(net, f"r{i}", tokens if i == 0 else 0)
+    for i in range(n):
+        _transition(net, f"move{i}", [f"r{i}"], [f"r{(i + 1) % n}"])
+    return net
+
+
+def producer_consumer_ring(n, capacity=2, items=2):
+    """
+    n trạm xếp vòng, trạm i có bộ đệm sức chứa `capacity` (buf_i + slot_i = capacity);
+    move_i chuyển một phần tử từ buf_i sang buf_{i+1} khi trạm sau còn chỗ.
+    `items` phần tử ban đầu nằm ở trạm 0; không deadlock khi items < n * capacity.
+    """
+    if not 0 <= items <= capacity:
+        raise ValueError("items phải nằm trong [0, capacity]")
+    net = ReachabilityNet()
+    for i in range(n):
+        _place(net, f"buf{i}", items if i == 0 else 0)
+        _place(net, f"slot{i}", capacity - items if i == 0 else capacity)
+    for i in range(n):
+        j = (i + 1) % n
+        _transition(net, f"move{i}", [f"buf{i}", f"slot{j}"], [f"buf{j}", f"slot{i}"])
+    return net
+
+
+def fork_join(n, length=1):
+    """
+    Một token tách thành n nhánh song song, mỗi nhánh đi qua `length` bước rồi hợp lại
+    và quay về đầu; có (length + 1)^n + 1 marking reachable.
+    """
+    net = ReachabilityNet()
+    _place(net, "start", 1)
+    for i in range(n):
+        for k in range(length + 1):
+            _place(net, f"b{i}_{k}")
+    _transition(net, "fork", ["start"], [f"b{i}_0" for i in range(n)])
+    for i in range(n):
+        for k in range(length):
+            _transition(net, f"step{i}_{k}", [f"b{i}_{k}"], [f"b{i}_{k + 1}"])
+    _transition(net, "join", [f"b{i}_{length}" for i in range(n)], ["start"])
+    return net
+
+
+def random_net(seed, n_places=6, n_transitions=6):
+    """
+    Mạng ngẫu nhiên bảo toàn token (mỗi transition lấy 1 và trả 1) -> hữu hạn; có thể
+    không 1-safe khi hai token dồn vào cùng một place.
+    """
+    rng = random.Random(seed)
+    net = ReachabilityNet()
+    places = [f"p{i}" for i in range(n_places)]
+    for p in places:
+        _place(net, p, rng.randint(0, 1))
+    for k in range(n_transitions):
+        src, dst = rng.sample(places, 2)
+        pre, post = [src], [dst]
+        if rng.random() < 0.5:
+            guard = rng.choice([p for p in places if p != src])
+            pre.append(guard)
+            post.append(guard)
+        _transition(net, f"t{k}", pre, post)
+    return net
+
+
+FAMILIES = {
+    'philosophers': philosophers,
+    'token_ring': token_ring,
+    'producer_consumer': producer_consumer_ring,
+    'fork_join': fork_join,
+}
+
+
+# Họ mạng 1-safe: chỉ trên các họ này engine BDD (mã hóa 1 biến mỗi place) mới đúng.
+# producer_consumer giữ tới `capacity` token trong một bộ đệm.
+SAFE_FAMILIES = {'philosophers', 'token_ring', 'fork_join'}
+
+
+def generate(family, size, **params):
+    """Mạng `family` kích thước `size`; họ không tồn tại hoặc size không dương -> ValueError."""
+    if family not in FAMILIES:
+        raise ValueError(f"Họ mạng không tồn tại: {family} (có: {', '.join(FAMILIES)})")
+    if not isinstance(size, int) or size < 1:
+        raise ValueError(f"Kích thước không hợp lệ cho {family}: {size!r}")
+    return FAMILIES[family](size, **params)
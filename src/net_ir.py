@@ -0,0 +1,181 @@
+from types import MappingProxyType
+
+import numpy as np
+
+
+def _frozen(values, dtype=np.int64):
+    a = np.asarray(values, dtype=dtype)
+    a.setflags(write=False)
+    return a
+
+
+def _csr(rows, n):
+    """list các list chỉ số -> (ptr, idx) dạng CSR chỉ đọc."""
+    ptr = [0]
+    idx = []
+    for i in range(n):
+        idx.extend(rows[i])
+        ptr.append(len(idx))
+    return _frozen(ptr), _frozen(idx)
+
+
+class CompiledNet:
+    """
+    Dạng biên dịch, chỉ đọc của một PetriNet, dựng một lần trong O(số arc) và dùng
+    chung cho mọi engine:
+    - place/transition đánh số nguyên theo thứ tự trong mạng (place_ids, transition_ids,
+      place_index, transition_index)
+    - pre/post dạng CSR theo transition: các place của transition i là
+      pre_idx[pre_ptr[i]:pre_ptr[i+1]] với trọng số pre_w tương ứng (thứ tự arc trong
+      file, arc trùng chỉ tính một lần)
+    - chỉ mục ngược theo place: consumers (transition lấy token từ place), producers
+    - support: mọi place nối với transition (cả vào lẫn ra) theo thứ tự arc
+    - bad_inputs / bad_outputs: node không phải place nối vào/ra transition;
+      invalid_arcs: arc tới node không tồn tại hoặc nối 2 place / 2 transition
+    - pre_matrix, post_matrix, incidence (T x P) dựng khi cần tới lần đầu
+    Trọng số arc lấy từ net.arc_weights (mặc định 1); các engine tường minh và phương
+    trình trạng thái dùng trọng số, mã hóa BDD 1-safe từ chối arc có trọng số khác 1.
+    """
+
+    def __init__(self, net):
+        self.place_ids = tuple(net.places)
+        self.transition_ids = tuple(net.transitions)
+        self.place_index = MappingProxyType({p: j for j, p in enumerate(self.place_ids)})
+        self.transition_index = MappingProxyType({t: i for i, t in enumerate(self.transition_ids)})
+        self.initial = _frozen([net.places[p]['initial'] for p in self.place_ids])
+
+        n_p, n_t = len(self.place_ids), len(self.transition_ids)
+        place_index, transition_index = self.place_index, self.transition_index
+        weights = getattr(net, 'arc_weights', {})
+        pre = [{} for _ in range(n_t)]
+        post = [{} for _ in range(n_t)]
+        support = [{} for _ in range(n_t)]
+        bad_inputs = [{} for _ in range(n_t)]
+        bad_outputs = [{} for _ in range(n_t)]
+        invalid = {}
+
+        for src, tgt in net.arcs:
+            sp, tp = place_index.get(src), place_index.get(tgt)
+            st, tt = transition_index.get(src), transition_index.get(tgt)
+            w = weights.get((src, tgt), 1)
+            if sp is not None and tt is not None:
+                pre[tt].setdefault(sp, w)
+                support[tt].setdefault(sp, None)
+            elif st is not None and tp is not None:
+                post[st].setdefault(tp, w)
+                support[st].setdefault(tp, None)
+            else:
+                if tt is not None:
+                    bad_inputs[tt].setdefault(src, None)
+                if st is not None:
+                    bad_outputs[st].setdefault(tgt, None)
+                if sp is None and st is None:
+                    invalid.setdefault(f"Arc source '{src}' trỏ đến một node không tồn tại", None)
+                if tp is None and tt is None:
+                    invalid.setdefault(f"Arc target '{tgt}' trỏ đến một node không tồn tại", None)
+                if sp is not None and tp is not None:
+                    invalid.setdefault(f"Arc nối 2 place: '{src}' -> '{tgt}'", None)
+                if st is not None and tt is not None:
+                    invalid.setdefault(f"Arc nối 2 transition: '{src}' -> '{tgt}'", None)
+
+        self.pre_ptr, self.pre_idx = _csr([list(d) for d in pre], n_t)
+        self.pre_w = _frozen([w for d in pre for w in d.values()])
+        self.post_ptr, self.post_idx = _csr([list(d) for d in post], n_t)
+        self.post_w = _frozen([w for d in post for w in d.values()])
+        self.support_ptr, self.support_idx = _csr([list(d) for d in support], n_t)
+
+        consumers = [[] for _ in range(n_p)]
+        producers = [[] for _ in range(n_p)]
+        for i in range(n_t):
+            for j in pre[i]:
+                consumers[j].append(i)
+            for j in post[i]:
+                producers[j].append(i)
+        self.consumers_ptr, self.consumers_idx = _csr(consumers, n_p)
+        self.producers_ptr, self.producers_idx = _csr(producers, n_p)
+
+        self.bad_inputs = tuple(tuple(d) for d in bad_inputs)
+        self.bad_outputs = tuple(tuple(d) for d in bad_outputs)
+        self.invalid_arcs = tuple(invalid)
+        self._matrices = None
+
+    @classmethod
+    def from_arrays(cls, place_ids, transition_ids, initial, arrays):
+        """
+        Dựng lại từ các mảng CSR đã có sẵn (vd. mmap từ file nhị phân), không sao chép.
+        Chỉ dùng cho mạng không có arc lỗi: bad_inputs/bad_outputs/invalid_arcs rỗng.
+        """
+        ir = cls.__new__(cls)
+        ir.place_ids = tuple(place_ids)
+        ir.transition_ids = tuple(transition_ids)
+        ir.place_index = MappingProxyType({p: j for j, p in enumerate(ir.place_ids)})
+        ir.transition_index = MappingProxyType({t: i for i, t in enumerate(ir.transition_ids)})
+        ir.initial = initial
+        for name, a in arrays.items():
+            setattr(ir, name, a)
+        ir.bad_inputs = ir.bad_outputs = ((),) * len(ir.transition_ids)
+        ir.invalid_arcs = ()
+        ir._matrices = None
+        return ir
+
+    @property
+    def n_places(self):
+        return len(self.place_ids)
+
+    @property
+    def n_transitions(self):
+        return len(self.transition_ids)
+
+    # ---------- truy cập theo transition ----------
+    def pre(self, i):
+        """[(chỉ số place, trọng số)] input của transition i."""
+        lo, hi = self.pre_ptr[i], self.pre_ptr[i + 1]
+        return list(zip(self.pre_idx[lo:hi].tolist(), self.pre_w[lo:hi].tolist()))
+
+    def post(self, i):
+        lo, hi = self.post_ptr[i], self.post_ptr[i + 1]
+        return list(zip(self.post_idx[lo:hi].tolist(), self.post_w[lo:hi].tolist()))
+
+    def support(self, i):
+        return self.support_idx[self.support_ptr[i]:self.support_ptr[i + 1]].tolist()
+
+    def consumers(self, j):
+        return self.consumers_idx[self.consumers_ptr[j]:self.consumers_ptr[j + 1]].tolist()
+
+    def producers(self, j):
+        return self.producers_idx[self.producers_ptr[j]:self.producers_ptr[j + 1]].tolist()
+
+    def is_broken(self, i):
+        """Transition nối tới node không phải place (bị bỏ qua khi mã hóa symbolic)."""
+        return bool(self.bad_inputs[i] or self.bad_outputs[i])
+
+    # ---------- dạng theo id, tương thích với code cũ ----------
+    def pre_dicts(self):
+        """{transition: {place: trọng số}} như ReachabilityNet.pre."""
+        return {t: {self.place_ids[j]: w for j, w in self.pre(i)} for i, t in enumerate(self.transition_ids)}
+
+    def post_dicts(self):
+        return {t: {self.place_ids[j]: w for j, w in self.post(i)} for i, t in enumerate(self.transition_ids)}
+
+    def input_places(self, i):
+        return {self.place_ids[j] for j, _ in self.pre(i)}
+
+    def output_places(self, i):
+        return {self.place_ids[j] for j, _ in self.post(i)}
+
+    # ---------- ma trận ----------
+    def matrices(self):
+        """(pre_matrix, post_matrix, incidence) dạng T x P, chỉ đọc."""
+        if self._matrices is None:
+            shape = (self.n_transitions, self.n_places)
+            pre = np.zeros(shape, dtype=np.int64)
+            post = np.zeros(shape, dtype=np.int64)
+            rows = np.repeat(np.arange(self.n_transitions), np.diff(self.pre_ptr))
+            pre[rows, self.pre_idx] = self.pre_w
+            rows = np.repeat(np.arange(self.n_transitions), np.diff(self.post_ptr))
+            post[rows, self.post_idx] = self.post_w
+            incidence = post - pre
+            for a in (pre, post, incidence):
+                a.setflags(write=False)
+            self._matrices = (pre, post, incidence)
+        return self._matrices
@@ -1,28 +1,204 @@
+import heapq
+import math
+import os
+import time
+
+import numpy as np
+from pulp import LpVariable, lpSum, LpMaximize
+
+from ilp_session import IlpSession
 from reachability_explicit import ReachabilityNet
+import metrics
 
 class OptimizationReachability(ReachabilityNet):
-    def optimize_marking(self, objective_weights):
-        reachable_markings, exec_time, mem_used = self.bfs()
-        if not reachable_markings:
-            return None, 0, 0, exec_time, mem_used
+    @metrics.timed("optimize")
+    def optimize_marking(self, objective_weights, reachable=None):
+        """
+        reachable: kết quả bfs() đã có sẵn (markings, time, mem) để khỏi BFS lại;
+        không có thì duyệt iter_reachable() và tính mục tiêu ngay khi marking được phát hiện.
+        """
+        if reachable is not None:
+            reachable_markings, exec_time, mem_used = reachable
+            if not reachable_markings:
+                return None, 0, 0, exec_time, mem_used
+            markings = reachable_markings.tuples() if hasattr(reachable_markings, 'tuples') else (
+                tuple(m[p] for p in self.places) for m in reachable_markings)
+        else:
+            markings = self.iter_reachable(form="tuple")
+
+        weights = [objective_weights.get(p, 1) for p in self.places]
         best_value = -float('inf')
         best_marking = None
-        for marking in reachable_markings:
-            curr = 0
-            for p in self.places:
-                weight = objective_weights.get(p, 1)
-                curr += weight * marking[p]
-            
-            if curr > best_value:
-                best_value = curr
-                best_marking = marking
+        count = 0
+        with metrics.measure() as usage:
+            for marking in markings:
+                count += 1
+                curr = sum(w * k for w, k in zip(weights, marking))
+                if curr > best_value:
+                    best_value = curr
+                    best_marking = marking
+
+        if reachable is None:
+            exec_time, mem_used = usage['seconds'], usage['peak_mb']
+        return dict(zip(self.places, best_marking)), best_value, count, exec_time, mem_used
+
+    @metrics.timed("optimize")
+    def optimize_batch(self, objectives, reachable=None, chunk_size=65536):
+        """
+        Tối ưu nhiều hàm mục tiêu trong một lần duyệt tập reachable: mỗi khối
+        chunk_size marking (mảng n x P) được nhân với ma trận trọng số K x P, nên bộ
+        nhớ phụ chỉ là chunk_size x K. objectives: list dict {place: trọng số} (place
+        vắng mặt có trọng số 1 như optimize_marking) hoặc mảng K x P theo thứ tự
+        self.places. reachable: kết quả bfs() có sẵn.
+        Trả về (mảng K giá trị tối ưu, list K marking tối ưu, số marking, thời gian, bộ nhớ).
+        """
+        reachable_markings, _, _ = reachable if reachable is not None else self.bfs()
+        with metrics.measure() as usage:
+            start_time = time.time()
+
+            order = list(self.places)
+            weights = weight_matrix(objectives, order)
+            # int64 (không dùng -inf kiểu float): giá trị lớn hơn 2**53 vẫn chính xác
+            best_values = np.zeros(len(weights), dtype=np.int64)
+            found = np.zeros(len(weights), dtype=bool)
+            best_rows = np.zeros((len(weights), len(order)), dtype=np.int64)
+
+            if hasattr(reachable_markings, 'iter_chunks'):
+                blocks = reachable_markings.iter_chunks(chunk_size)
+            else:
+                rows = [[m[p] for p in order] for m in reachable_markings]
+                blocks = (np.array(rows[i:i + chunk_size], dtype=np.int64).reshape(-1, len(order))
+                          for i in range(0, len(rows), chunk_size))
+
+            for block in blocks:
+                if not len(block):
+                    continue
+                scores = block @ weights.T                # n x K
+                arg = scores.argmax(axis=0)
+                values = scores[arg, np.arange(len(weights))]
+                better = ~found | (values > best_values)
+                found |= better
+                best_values[better] = values[better]
+                best_rows[better] = block[arg[better]]
+
+            exec_time = time.time() - start_time
+        mem_used = usage['peak_mb']
+
+        if not len(reachable_markings):
+            return best_values, [None] * len(weights), 0, exec_time, mem_used  # như optimize_marking: 0
+        markings = [dict(zip(order, map(int, row))) for row in best_rows]
+        return best_values, markings, len(reachable_markings), exec_time, mem_used
+
+    def state_equation_bounds(self, objective_weights):
+        """
+        Cận trên của sum w_p * M(p) từ phương trình trạng thái M = M0 + C·σ:
+        - z: nghiệm đối ngẫu của LP nới lỏng, min z·M0 với z >= w, C·z <= 0. Mọi
+          transition không làm tăng z·M nên z·M là cận trên cho mọi marking đạt được
+          từ M (cắt nhánh với chi phí O(|P|) mỗi trạng thái)
+        - ILP max w·M với M = M0 + C·σ, σ nguyên >= 0: cận toàn cục chặt hơn để dừng sớm
+        Trả về (z, cận toàn cục); (None, None) nếu LP không bị chặn.
+        """
+        if self.pre_matrix is None:
+            self.compile_matrices()
+        places, transitions = self.place_order, self.transition_order
+        weights = {p: objective_weights.get(p, 1) for p in places}
+        initial = {p: self.places[p]["initial"] for p in places}
+
+        dual = IlpSession("OptimizationBoundDual")
+        z = {p: LpVariable(f"Z_{j}", lowBound=weights[p]) for j, p in enumerate(places)}
+        for i, t in enumerate(transitions):
+            row = self.incidence[i]
+            dual.add(lpSum(int(row[j]) * z[p] for j, p in enumerate(places) if row[j]) <= 0, f"non_increasing_{i}")
+        dual.set_objective(lpSum(initial[p] * z[p] for p in places))
+        if dual.solve() != "Optimal":
+            return None, None
+        # place không nằm trong ràng buộc nào và không có trong hàm mục tiêu (vd. place cô
+        # lập, marking ban đầu 0) không được solver gán giá trị -> dùng cận dưới w_p
+        z_values = {p: z[p].varValue if z[p].varValue is not None else weights[p] for p in places}
+        bound = math.floor(sum(initial[p] * z_values[p] for p in places) + 1e-6)
+
+        primal = IlpSession("OptimizationBoundPrimal", LpMaximize)
+        marking = {p: LpVariable(f"M_{j}", lowBound=0, cat="Integer") for j, p in enumerate(places)}
+        firing = {t: LpVariable(f"S_{i}", lowBound=0, cat="Integer") for i, t in enumerate(transitions)}
+        for j, p in enumerate(places):
+            primal.add(marking[p] == initial[p] + lpSum(int(self.incidence[i, j]) * firing[t]
+                                                         for i, t in enumerate(transitions) if self.incidence[i, j]),
+                       f"state_equation_{j}")
+        primal.set_objective(lpSum(weights[p] * marking[p] for p in places))
+        if primal.solve() == "Optimal":
+            bound = min(bound, math.floor(primal.problem.objective.value() + 1e-6))
+        return z_values, bound
+
+    @metrics.timed("optimize")
+    def optimize_branch_and_bound(self, objective_weights, max_states=None):
+        """
+        Tìm marking tối ưu bằng tìm kiếm best-first có cắt nhánh thay vì bfs() toàn bộ:
+        trạng thái có cận z·M lớn nhất được mở rộng trước, nhánh có cận không vượt
+        incumbent bị bỏ, và dừng ngay khi incumbent bằng cận toàn cục của phương
+        trình trạng thái. Kết quả là chính xác (trừ khi dừng vì max_states).
+        Trả về cùng định dạng optimize_marking(), phần tử thứ 3 là số marking đã sinh.
+        """
+        with metrics.measure() as usage:
+            start_time = time.time()
 
-        return best_marking, best_value, len(reachable_markings), exec_time, mem_used
+            if not self.pre and self.transitions:
+                self.build_pre_post()
+            z, global_bound = self.state_equation_bounds(objective_weights)
+            order = self.place_order
+            moves = self.compile_moves(order)
+            weights = [objective_weights.get(p, 1) for p in order]
+            z_row = [z[p] for p in order] if z is not None else None
 
-    def print_result(self, objective_weights):
+            def value(m):
+                return sum(w * k for w, k in zip(weights, m))
+
+            def bound(m):
+                if z_row is None:
+                    return math.inf
+                return math.floor(sum(c * k for c, k in zip(z_row, m)) + 1e-6)
+
+            init = tuple(self.places[p]["initial"] for p in order)
+            best, best_value = init, value(init)
+            seen = {init}
+            heap = [(-bound(init), 0, init)]
+            counter = 1
+
+            while heap:
+                if global_bound is not None and best_value >= global_bound:
+                    break
+                if max_states is not None and len(seen) >= max_states:
+                    break
+                neg_bound, _, m = heapq.heappop(heap)
+                if -neg_bound <= best_value:
+                    break   # heap theo cận giảm dần: không nhánh nào còn lại vượt được incumbent
+                for pre, effect in moves:
+                    if all(m[j] >= w for j, w in pre):
+                        new_m = list(m)
+                        for j, d in effect:
+                            new_m[j] += d
+                        new_m = tuple(new_m)
+                        if new_m in seen:
+                            continue
+                        seen.add(new_m)
+                        v = value(new_m)
+                        if v > best_value:
+                            best, best_value = new_m, v
+                        b = bound(new_m)
+                        if b > best_value:
+                            heapq.heappush(heap, (-b, counter, new_m))
+                            counter += 1
+
+            exec_time = time.time() - start_time
+        mem_used = usage['peak_mb']
+        return dict(zip(order, best)), best_value, len(seen), exec_time, mem_used
+
+    def print_result(self, objective_weights, session=None):
         
 
-        marking, value, count, time_used, mem_used = self.optimize_marking(objective_weights)
+        if session is not None:
+            marking, value, count, time_used, mem_used = session.optimize(objective_weights)
+        else:
+            marking, value, count, time_used, mem_used = self.optimize_marking(objective_weights)
         
         
         print("\n" + "="*50)
@@ -32,8 +208,9 @@ class OptimizationReachability(ReachabilityNet):
         print(f"Hàm mục tiêu: {objective_weights}")
         print(f"Chế độ: Maximize")
         print(f"Số đánh dấu đạt được: {count}")
-        print(f"Thời gian tính toán: {time_used:.4f} giây")
-        print(f"Bộ nhớ: {mem_used:.4f} MB")
+        note = " (cache, đo ở lần chạy trước)" if session is not None and session.from_cache("optimize") else ""
+        print(f"Thời gian tính toán: {time_used:.4f} giây{note}")
+        print(f"Bộ nhớ: {mem_used:.4f} MB{note}")
         print("-"*50)
         
         if marking is None:
@@ -46,6 +223,42 @@ class OptimizationReachability(ReachabilityNet):
         print("="*50)
 
 
+def weight_matrix(objectives, places):
+    """list dict {place: trọng số} (mặc định 1) hoặc mảng K x P -> mảng int64 K x P theo `places`."""
+    if isinstance(objectives, np.ndarray):
+        return objectives.astype(np.int64).reshape(-1, len(places))
+    return np.array([[w.get(p, 1) for p in places] for w in objectives], dtype=np.int64).reshape(-1, len(places))
+
+
+def load_objectives(filename, places):
+    """
+    Đọc nhiều hàm mục tiêu từ file, mỗi dòng một hàm dạng 'p1=2 p3=-1' (cùng cú pháp
+    với nhập từ bàn phím); dòng trống và phần sau '#' bị bỏ qua.
+    Place không tồn tại hoặc trọng số sai -> ValueError kèm số dòng.
+    """
+    objectives = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.split("#", 1)[0].strip()
+            if line:
+                objectives.append(parse_objective(line, places, f"{filename}:{line_no}"))
+    return objectives
+
+
+def parse_objective(text, places, where):
+    """Một hàm mục tiêu 'p1=2 p3=-1' -> {place: trọng số}; lỗi -> ValueError bắt đầu bằng `where`."""
+    weights = {}
+    for part in text.split():
+        p, sep, w_str = part.partition("=")
+        if not sep or p not in places:
+            raise ValueError(f"{where}: mục tiêu không hợp lệ '{part}'")
+        try:
+            weights[p] = int(w_str)
+        except ValueError:
+            raise ValueError(f"{where}: trọng số không hợp lệ '{part}'")
+    return weights
+
+
 def parse_user_objective(places):
     print(f"\nCác place trong mạng: {sorted(places)}")
     print("Nhập hàm mục tiêu dạng 'p1=2 p3=-1 p4=5'")
@@ -86,22 +299,35 @@ if __name__ == "__main__":
     import sys
     import os
     if len(sys.argv) < 2:
-        print("Cú pháp: python optimization.py <file.pnml>")
+        print("Cú pháp: python optimization.py <file.pnml> [--weights <file>] [--no-cache]")
         print("Ví dụ: python optimization.py my_network.pnml")
         sys.exit(1)
     if not os.path.exists(sys.argv[1]):
         print(f"❌ Lỗi: File '{sys.argv[1]}' không tồn tại!")
         sys.exit(1)
     
+    from analysis_session import AnalysisSession
+    from result_cache import ResultCache
+
     print("⏳ Đang tải mạng Petri...")
     net = OptimizationReachability()
     net.parse_pnml(sys.argv[1])
     net.build_pre_post()
+    session = AnalysisSession(net, cache=None if "--no-cache" in sys.argv[2:] else ResultCache())
     
     print(f"✅ Đã tải: {sys.argv[1]}")
     print(f"  • Số place: {len(net.places)}")
     print(f"  • Số transition: {len(net.transitions)}")
     print(f"  • Số cung: {len(net.arcs)}")
-    weights = parse_user_objective(net.places)
-    print("\n⏳ Đang tính toán các đánh dấu đạt được và tìm giá trị tối ưu...")
-    net.print_result(weights)
\ No newline at end of file
+    if "--weights" in sys.argv:
+        objectives = load_objectives(sys.argv[sys.argv.index("--weights") + 1], net.places)
+        print(f"\n⏳ Tối ưu {len(objectives)} hàm mục tiêu trong một lần duyệt...")
+        values, markings, count, time_used, mem_used = session.optimize_batch(objectives)
+        note = " (cache, đo ở lần chạy trước)" if session.from_cache("optimize") else ""
+        print(f"Số đánh dấu đạt được: {count}, thời gian: {time_used:.4f} giây{note}")
+        for k, (weights, value, marking) in enumerate(zip(objectives, values, markings), start=1):
+            print(f"  {k}. {weights} -> {value}: {marking}")
+    else:
+        weights = parse_user_objective(net.places)
+        print("\n⏳ Đang tính toán các đánh dấu đạt được và tìm giá trị tối ưu...")
+        net.print_result(weights, session)
\ No newline at end of file
@@ -1,14 +1,28 @@
 import os
 import xmltodict
 import sys
+from xml.etree.ElementTree import iterparse
+from net_ir import CompiledNet
+import net_binary
+import metrics
 
 class PetriNet:
     def __init__(self):
         self.places = {}      # {id: {'name': str, 'initial': int}}
         self.transitions = {} # {id: name}
         self.arcs = []        # list of tuples (source_id, target_id)
+        self.arc_weights = {} # {(source_id, target_id): weight} chỉ cho arc có inscription khác 1
+        self._compiled = None # (dấu vân tay của mạng, CompiledNet)
+
+    @metrics.timed("parse")
+    def parse_pnml(self, filename, streaming=True):
+        """
+        streaming=True: parse_pnml_stream() (đọc từng phần tử, không dựng cây);
+        False: đọc cả file bằng xmltodict. Hai cách cho cùng kết quả.
+        """
+        if streaming:
+            return self.parse_pnml_stream(filename)
 
-    def parse_pnml(self, filename):
         try:
             with open(filename, 'r', encoding='utf-8') as f:
                 doc = xmltodict.parse(f.read())
@@ -69,8 +83,104 @@ class PetriNet:
                     source = arc['@source']
                     target = arc['@target']
                     self.arcs.append((source, target))
+                    weight = _inscription_weight(arc.get('inscription'))
+                    if weight != 1:
+                        self.arc_weights[(source, target)] = weight
+        return True
+
+    def parse_pnml_stream(self, filename):
+        """
+        Parse PNML bằng iterparse: mỗi place/transition/arc được đọc khi thẻ đóng
+        rồi bị gỡ khỏi cây ngay, nên bộ nhớ chỉ cỡ các bảng kết quả chứ không phải cả
+        file. Quy tắc giống bản xmltodict: chỉ lấy <net> đầu tiên; nếu <net> có <page>
+        thì chỉ đọc các phần tử nằm trực tiếp trong các <page> đó, ngược lại đọc phần
+        tử nằm trực tiếp trong <net>; phần tử thiếu @id (arc thiếu source/target) bị bỏ.
+        """
+        places, transitions, arcs, weights = {}, {}, [], {}
+        direct = []       # phần tử trực tiếp trong <net>, chỉ dùng nếu không có <page>
+        has_page = False
+        nets = 0
+        path = []         # tên thẻ (bỏ namespace) từ gốc tới phần tử hiện tại
+        elements = []
+
+        try:
+            for event, elem in iterparse(filename, events=("start", "end")):
+                tag = elem.tag.rsplit('}', 1)[-1]
+                if event == "start":
+                    path.append(tag)
+                    elements.append(elem)
+                    if tag == "net" and len(path) == 2:
+                        nets += 1
+                    elif tag == "page" and len(path) == 3 and path[1] == "net" and nets == 1:
+                        has_page = True
+                    continue
+
+                path.pop()
+                elements.pop()
+                if tag not in ("place", "transition", "arc") or not elements:
+                    continue
+                # gỡ phần tử khỏi cha (kể cả phần tử bị bỏ qua) để cây không lớn dần
+                elements[-1].remove(elem)
+                if nets != 1 or len(path) < 2 or path[0] != "pnml" or path[1] != "net":
+                    continue
+                in_page = len(path) == 3 and path[2] == "page"
+                if not in_page and len(path) != 2:
+                    continue
+
+                item = _read_node(tag, elem)
+                if item is None:
+                    continue
+                if in_page:
+                    _store_node(item, places, transitions, arcs, weights)
+                else:
+                    direct.append(item)
+        except Exception as e:
+            print("Lỗi khi đọc file PNML:", e)
+            return False
+
+        if nets == 0:
+            print("Lỗi khi đọc file PNML: không có thẻ <net>")
+            return False
+        if not has_page:
+            for item in direct:
+                _store_node(item, places, transitions, arcs, weights)
+
+        self.places.update(places)
+        self.transitions.update(transitions)
+        self.arcs.extend(arcs)
+        self.arc_weights.update(weights)
         return True
 
+    def compile(self):
+        """
+        CompiledNet (chỉ số nguyên, CSR, chỉ mục ngược) của mạng, dựng một lần trong
+        O(số arc) rồi dùng lại; tự dựng lại khi place, transition, arc hoặc marking
+        ban đầu thay đổi, kể cả khi sửa tại chỗ (vd. net.arcs[i] = ...).
+        """
+        key = self.fingerprint()
+        if self._compiled is None or self._compiled[0] != key:
+            with metrics.phase("compile"):
+                self._compiled = (key, CompiledNet(self))
+        return self._compiled[1]
+
+    def fingerprint(self):
+        """
+        Toàn bộ cấu trúc mà CompiledNet phụ thuộc vào (id place/transition, marking ban
+        đầu, danh sách arc, trọng số arc); so sánh tốn O(số arc), rẻ hơn nhiều so với dựng lại.
+        """
+        return (tuple(self.places), tuple(info['initial'] for info in self.places.values()),
+                tuple(self.transitions), tuple(self.arcs), tuple(sorted(self.arc_weights.items())))
+
+    def save_binary(self, filename):
+        """Ghi mạng ra định dạng nhị phân của net_binary (.pnb)."""
+        net_binary.write_net(self, filename)
+
+    @classmethod
+    @metrics.timed("load_binary")
+    def load_binary(cls, filename):
+        """Nạp mạng từ file .pnb bằng mmap, không parse XML; lỗi định dạng -> ValueError."""
+        return net_binary.read_net(filename, cls)
+
     def check_consistency(self):
         place_ids = set(self.places.keys())
         trans_ids = set(self.transitions.keys())
@@ -102,6 +212,76 @@ class PetriNet:
         print("Arcs:", self.arcs)
 
 
+def _inscription_weight(inscription):
+    """Trọng số arc từ <inscription><text>n</text></inscription> (mặc định 1)."""
+    if isinstance(inscription, dict):
+        try:
+            return int(inscription.get('text', 1))
+        except (ValueError, TypeError):
+            return 1
+    return 1
+
+
+def _child(elem, name):
+    for child in elem:
+        if child.tag.rsplit('}', 1)[-1] == name:
+            return child
+    return None
+
+
+def _child_text(elem, name):
+    """
+    Chữ của <name><text>...</text></name> như xmltodict: đã bỏ khoảng trắng, rỗng
+    -> None; trả về False nếu không có <name> hoặc <text>.
+    """
+    node = _child(elem, name)
+    if node is None:
+        return False
+    text = _child(node, "text")
+    if text is None:
+        return False
+    return (text.text or "").strip() or None
+
+
+def _read_node(tag, elem):
+    """Phần tử PNML đã đóng -> bản ghi nhỏ; None nếu thiếu @id / @source / @target."""
+    if tag == "arc":
+        source, target = elem.get("source"), elem.get("target")
+        if source is None or target is None:
+            return None
+        weight = _child_text(elem, "inscription")
+        return ("arc", source, target, _inscription_weight({'text': weight} if weight is not False else None))
+
+    node_id = elem.get("id")
+    if node_id is None:
+        return None
+    name = _child_text(elem, "name")
+    if name is False:
+        name = node_id
+    if tag == "transition":
+        return ("transition", node_id, name)
+
+    initial = _child_text(elem, "initialMarking")
+    try:
+        initial = int(initial) if initial is not False else 0
+    except (ValueError, TypeError):
+        initial = 0
+    return ("place", node_id, name, initial)
+
+
+def _store_node(item, places, transitions, arcs, weights):
+    kind = item[0]
+    if kind == "place":
+        places[item[1]] = {'name': item[2], 'initial': item[3]}
+    elif kind == "transition":
+        transitions[item[1]] = item[2]
+    else:
+        _, source, target, weight = item
+        arcs.append((source, target))
+        if weight != 1:
+            weights[(source, target)] = weight
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         sys.exit(1)
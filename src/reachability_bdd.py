@@ -1,16 +1,25 @@
 import time
 import sys
-import psutil
-import os
-from pyeda.inter import bddvar, expr2bdd
-from pyeda.boolalg.expr import expr
 from pnml_parser import PetriNet
+from bdd_backend import make_backend
+from bdd_builder import BddBuilder
+import metrics
 
 class SymbolicReachabilityPyEDA(PetriNet):
-    def __init__(self):
+    STRATEGIES = ("monolithic", "chaining", "chaining_ordered")
+
+    def __init__(self, backend=None):
         super().__init__()
+        # BddBackend dùng cho mọi phép toán BDD (mặc định: PyEDA)
+        self.backend = make_backend(backend) if backend is None or isinstance(backend, str) else backend
         self.place_to_curr_var = {}  # p -> x
         self.place_to_next_var = {}  # p -> x'
+        self.next_to_curr = {}       # x' -> x (dùng khi đổi tên sau phép ảnh)
+        self._builder = None         # BddBuilder trên các biến hiện tại
+        self.variable_order = None   # thứ tự place dùng khi tạo biến
+        self.var_prefix = "x"        # tiền tố tên biến BDD
+        self.interleave = True       # xen kẽ x và x' của cùng place
+        self.node_stats = {}         # số node BDD của lần tính gần nhất
 
     def check_symbolic_consistency(self):
         """
@@ -24,74 +33,90 @@ class SymbolicReachabilityPyEDA(PetriNet):
             errors.append("Mạng không có places nào")
         
         # 2. Kiểm tra transitions và arcs
+        ir = self.compile()
         invalid_transitions = []
-        for t_id in self.transitions:
-            pre_places = {src for src, tgt in self.arcs if tgt == t_id}
-            post_places = {tgt for src, tgt in self.arcs if src == t_id}
-            
+        for i, t_id in enumerate(ir.transition_ids):
             # Kiểm tra input places có tồn tại không
-            invalid_inputs = pre_places - set(self.places.keys())
-            if invalid_inputs:
-                invalid_transitions.append(f"Transition '{t_id}' có input places không tồn tại: {invalid_inputs}")
+            if ir.bad_inputs[i]:
+                invalid_transitions.append(f"Transition '{t_id}' có input places không tồn tại: {set(ir.bad_inputs[i])}")
             
             # Kiểm tra output places có tồn tại không
-            invalid_outputs = post_places - set(self.places.keys())
-            if invalid_outputs:
-                invalid_transitions.append(f"Transition '{t_id}' có output places không tồn tại: {invalid_outputs}")
+            if ir.bad_outputs[i]:
+                invalid_transitions.append(f"Transition '{t_id}' có output places không tồn tại: {set(ir.bad_outputs[i])}")
         
         errors.extend(invalid_transitions)
         
-        # 3. Kiểm tra arcs không hợp lệ
-        invalid_arcs = []
-        for src, tgt in self.arcs:
-            # Kiểm tra arc từ place không tồn tại
-            if src not in self.places and src not in self.transitions:
-                invalid_arcs.append(f"Arc source '{src}' trỏ đến một node không tồn tại")
-            
-            # Kiểm tra arc đến place/transition không tồn tại
-            if tgt not in self.places and tgt not in self.transitions:
-                invalid_arcs.append(f"Arc target '{tgt}' trỏ đến một node không tồn tại")
-            
-            # Kiểm tra arc nối 2 places
-            if src in self.places and tgt in self.places:
-                invalid_arcs.append(f"Arc nối 2 place: '{src}' -> '{tgt}'")
-            
-            # Kiểm tra arc nối 2 transitions
-            if src in self.transitions and tgt in self.transitions:
-                invalid_arcs.append(f"Arc nối 2 transition: '{src}' -> '{tgt}'")
-        
-        # Loại bỏ các thông báo trùng lặp
-        invalid_arcs = list(set(invalid_arcs))
-        errors.extend(invalid_arcs)
+        # 3. Kiểm tra arcs không hợp lệ (đã loại trùng khi biên dịch)
+        errors.extend(ir.invalid_arcs)
         
         return len(errors) == 0, errors
 
-    def setup_variables(self):
+    def setup_variables(self, order=None, interleave=None):
         """
-        Tạo biến BDD trong PyEDA.
+        Tạo biến BDD trong backend theo thứ tự `order` (mặc định: self.variable_order,
+        nếu chưa có thì theo id place).
+        interleave=True (mặc định lấy self.interleave): x_p và x_p' của cùng một
+        place đứng cạnh nhau; False: mọi x trước rồi mới tới mọi x'.
+        Lưu ý: backend cố định thứ tự biến theo lần tạo đầu tiên của mỗi tên
+        (với PyEDA là trong cả tiến trình), nên muốn thử thứ tự khác cho cùng
+        một mạng thì đổi self.var_prefix.
         """
-        sorted_places = sorted(self.places.keys())
-        for i, p in enumerate(sorted_places):
-            self.place_to_curr_var[p] = bddvar(f'x_{p}')
-            self.place_to_next_var[p] = bddvar(f'x_{p}_prime')
+        order = list(order or self.variable_order or sorted(self.places.keys()))
+        self.variable_order = order
+        if interleave is None:
+            interleave = self.interleave
+        self.place_to_curr_var = {}
+        self.place_to_next_var = {}
+        self.next_to_curr = {}
+
+        prefix = self.var_prefix
+        if interleave:
+            for p in order:
+                self.place_to_curr_var[p] = self.backend.var(f'{prefix}_{p}')
+                self.place_to_next_var[p] = self.backend.var(f'{prefix}_{p}_prime')
+        else:
+            for p in order:
+                self.place_to_curr_var[p] = self.backend.var(f'{prefix}_{p}')
+            for p in order:
+                self.place_to_next_var[p] = self.backend.var(f'{prefix}_{p}_prime')
+
+        for p in order:
+            self.next_to_curr[self.place_to_next_var[p]] = self.place_to_curr_var[p]
+        self._builder = BddBuilder(self.backend, self.place_to_curr_var, self.place_to_next_var)
+
+    @property
+    def builder(self):
+        """BddBuilder trên các biến hiện tại; tự tạo biến nếu chưa gọi setup_variables()."""
+        if self._builder is None:
+            self.setup_variables()
+        return self._builder
+
+    def actual_variable_order(self):
+        """
+        Thứ tự biến thực sự trong BDD (theo level trong backend), để kiểm tra thứ tự
+        yêu cầu có được áp dụng hay không.
+        """
+        variables = list(self.place_to_curr_var.values()) + list(self.place_to_next_var.values())
+        return [self.backend.var_name(v) for v in sorted(variables, key=self.backend.level)]
 
     def encode_initial_marking(self):
         """
         Mã hóa trạng thái ban đầu: M0(x)
         """
         if not self.places:
-            return expr2bdd(expr(1))
-        
-        expr_str_parts = []
-        for p, info in self.places.items():
-            if info['initial'] > 0:
-                expr_str_parts.append(f"x_{p}")
-            else:
-                expr_str_parts.append(f"~x_{p}")
-        
-        expr_str = " & ".join(expr_str_parts) # Noi cac phan tu bang toan tu &
-        boolean_expr = expr(expr_str) # chuyen thanh bieu thuc boolean
-        return expr2bdd(boolean_expr) # chuyen bieu thuc boolean sang BDD
+            return self.builder.true()
+
+        initial = {p: info['initial'] for p, info in self.places.items()}
+        return self.builder.marking(initial, self.places)
+
+    def transition_io(self):
+        """
+        Input/output places của các transition hợp lệ (bỏ qua transition nối tới
+        node không tồn tại).
+        """
+        ir = self.compile()
+        return [(t_id, ir.input_places(i), ir.output_places(i))
+                for i, t_id in enumerate(ir.transition_ids) if not ir.is_broken(i)]
 
     def encode_transition_relation(self):
         """
@@ -99,82 +124,108 @@ class SymbolicReachabilityPyEDA(PetriNet):
         """
         # Kiểm tra có transition hay không
         if not self.transitions:
-            return expr2bdd(expr(0))
-            
-        transition_relations = []
+            return self.builder.false()
+
         all_places = set(self.places.keys())
+        if not all_places:
+            return self.builder.false()
 
-        # Duyệt qua từng transition và xác định input/output places
-        for t_id in self.transitions:
-            pre_places = {src for src, tgt in self.arcs if tgt == t_id}
-            post_places = {tgt for src, tgt in self.arcs if src == t_id}
+        transition_relations = []
+        for t_id, pre_places, post_places in self.transition_io():
+            # input, output và frame condition cho các place không đổi
+            unchanged_places = all_places - (pre_places | post_places)
+            transition_relations.append(
+                self.builder.transition(pre_places, post_places, unchanged_places)
+            )
 
-            # Bỏ qua transitions có input/output không hợp lệ
-            invalid_inputs = pre_places - set(self.places.keys())
-            invalid_outputs = post_places - set(self.places.keys())
-            if invalid_inputs or invalid_outputs:
-                continue
+        # Identity Relation
+        transition_relations.append(self.builder.frame(all_places))
 
-            conditions = []
-            
-            # Điều kiện INPUT
-            for p in pre_places:
-                conditions.append(f"x_{p}")
-            
-            # Điều kiện OUTPUT
-            changed_places = pre_places | post_places
-            
-            for p in all_places:
-                if p in post_places:
-                    conditions.append(f"x_{p}_prime")
-                elif p in pre_places and p not in post_places:
-                    conditions.append(f"~x_{p}_prime")
-            
-            # Frame Condition
-            unchanged_places = all_places - changed_places
-            for p in unchanged_places:
-                frame_condition = f"((x_{p} & x_{p}_prime) | (~x_{p} & ~x_{p}_prime))"
-                conditions.append(frame_condition)
-            
-            if conditions:
-                trans_expr_str = " & ".join(conditions)
-                try:
-                    trans_rel = expr(trans_expr_str)
-                    transition_relations.append(trans_rel)
-                except Exception as e:
-                    continue
+        return self.builder.disjoin(transition_relations)
 
-        # Identity Relation
-        identity_conditions = []
-        for p in all_places:
-            identity_conditions.append(f"((x_{p} & x_{p}_prime) | (~x_{p} & ~x_{p}_prime))")
-        
-        if identity_conditions:
-            identity_expr_str = " & ".join(identity_conditions)
-            try:
-                identity_rel = expr(identity_expr_str)
-                transition_relations.append(identity_rel)
-            except Exception as e:
-                pass
-
-        # Kết hợp tất cả transition relations
-        if transition_relations:
-            full_expr_parts = [f"({str(rel)})" for rel in transition_relations]
-            full_expr_str = " | ".join(full_expr_parts)
-            try:
-                full_relation = expr(full_expr_str)
-                return expr2bdd(full_relation)
-            except Exception as e:
-                return expr2bdd(identity_rel) if 'identity_rel' in locals() else expr2bdd(expr(0))
-        
-        return expr2bdd(expr(0))
+    def encode_partitioned_relations(self):
+        """
+        Tạo quan hệ chuyển riêng cho từng transition, chỉ trên các place liên quan
+        (input ∪ output), không có frame condition cho các place còn lại.
+        Trả về list các (R_t, biến x của support, ánh xạ đổi tên x' -> x của support).
+        """
+        partitions = []
+        builder = self.builder  # tạo biến nếu chưa có
+        x, x_prime = self.place_to_curr_var, self.place_to_next_var
+        for t_id, pre_places, post_places in self.transition_io():
+            support = pre_places | post_places
+            if not support:
+                continue  # transition không đổi marking nào
+
+            relation = builder.transition(pre_places, post_places)
+            curr_vars = [x[p] for p in support]
+            rename = {x_prime[p]: x[p] for p in support}
+            partitions.append((relation, curr_vars, rename))
+        return partitions
+
+    def encode_enabled(self, pre_places):
+        """enabled_t(x) = ∧ x_p với p thuộc input của t (mã hóa 1-safe)."""
+        return self.builder.positive_cube(pre_places)
+
+    def unsafe_witness(self, states):
+        """
+        (transition, place) nếu từ một trạng thái trong `states` có transition enabled đặt
+        token thứ hai vào một output place đang có token; None nếu không có. Với `states`
+        là tập reachable của mã hóa 1-safe thì None <=> mạng 1-safe: trạng thái đầu tiên
+        vượt 1 token luôn đến từ một trạng thái an toàn, mà mã hóa đã tính đúng.
+        """
+        for t_id, pre_places, post_places in self.transition_io():
+            for p in sorted(post_places - pre_places):
+                if not (states & self.builder.positive_cube(pre_places | {p})).is_zero():
+                    return t_id, p
+        return None
+
+    def check_safe(self, states=None):
+        """
+        ValueError nếu mạng không 1-safe: có arc trọng số khác 1, marking ban đầu > 1, hoặc
+        (khi có `states`, tập reachable đã tính) unsafe_witness() tìm được transition làm
+        tràn một place. Mã hóa BDD chỉ dùng 1 biến cho mỗi place nên kết quả trên mạng
+        như vậy là sai.
+        """
+        weighted = sorted(a for a in set(self.arcs) if self.arc_weights.get(a, 1) != 1)
+        if weighted:
+            raise ValueError(f"Mạng có arc trọng số khác 1: {weighted}; "
+                             f"phân tích BDD chỉ hỗ trợ mạng 1-safe")
+        over = sorted(p for p, info in self.places.items() if info['initial'] > 1)
+        if over:
+            raise ValueError(f"Mạng không 1-safe: marking ban đầu > 1 ở {over}; "
+                             f"phân tích BDD chỉ hỗ trợ mạng 1-safe")
+        witness = self.unsafe_witness(states) if states is not None else None
+        if witness is not None:
+            raise ValueError(f"Mạng không 1-safe: transition '{witness[0]}' đặt token thứ hai vào "
+                             f"place '{witness[1]}'; phân tích BDD chỉ hỗ trợ mạng 1-safe")
+
+    def encode_dead_states(self):
+        """
+        Vị từ marking chết: D(x) = ∧_t ¬enabled_t(x). Transition không có input
+        luôn enabled nên khi đó D = False.
+        """
+        return self.builder.conjoin([~self.encode_enabled(pre_places)
+                                     for _, pre_places, _ in self.transition_io()])
+
+    @metrics.timed("encode")
+    def encode_relations(self, strategy="monolithic"):
+        """
+        Quan hệ chuyển theo chiến lược: một BDD duy nhất cho 'monolithic',
+        danh sách phân hoạch theo transition cho 'chaining' và 'chaining_ordered'.
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Chiến lược không hợp lệ: '{strategy}' (chọn một trong {self.STRATEGIES})")
+        if strategy == "monolithic":
+            return self.encode_transition_relation()
+        return self.encode_partitioned_relations()
 
     def bdd_to_readable_formula(self, bdd_expr):
         """
         Chuyển BDD thành công thức symbolic có thể đọc được
         """
         try:
-            satisfy_points = list(bdd_expr.satisfy_all())
+            satisfy_points = list(self.backend.satisfy_all(bdd_expr))
             
             if not satisfy_points:
                 return "False"
@@ -200,7 +251,179 @@ class SymbolicReachabilityPyEDA(PetriNet):
         except Exception as e:
             return f"Error: {str(e)}"
 
-    def compute_reachable(self, return_formula=True):
+    def iter_markings(self, states):
+        """
+        Duyệt các marking {place: 0/1} của tập states; biến không có trên đường đi
+        (tùy ý) được khai triển thành cả hai giá trị.
+        """
+        from itertools import product
+
+        for point in self.backend.satisfy_all(states):
+            fixed = {p: int(point[v]) for p, v in self.place_to_curr_var.items() if v in point}
+            free = [p for p in self.place_to_curr_var if p not in fixed]
+            for values in product((0, 1), repeat=len(free)):
+                marking = dict(fixed)
+                marking.update(zip(free, values))
+                yield {p: marking[p] for p in self.place_to_curr_var}
+
+    def export_states(self, states):
+        """Tập states (trên biến x) -> dữ liệu thuần Python để lưu cache, biến ghi theo place."""
+        nodes, root = self.backend.dump(states)
+        place_of = {self.backend.var_name(v): p for p, v in self.place_to_curr_var.items()}
+        return {'nodes': [(place_of[name], lo, hi) for name, lo, hi in nodes], 'root': root}
+
+    def import_states(self, data):
+        """Ngược lại của export_states() trên các biến hiện tại."""
+        names = {p: self.backend.var_name(v) for p, v in self.place_to_curr_var.items()}
+        return self.backend.load(data['nodes'], data['root'], names)
+
+    def bdd_node_count(self, bdd):
+        """Số node của BDD (kể cả 2 node hằng)."""
+        return self.backend.node_count(bdd)
+
+    def count_states(self, states):
+        """Số marking trong tập states: đếm mô hình trên toàn bộ biến x."""
+        return self.backend.count(states, self.place_to_curr_var.values())
+
+    def exists(self, f, variables):
+        """∃variables. f"""
+        return self.backend.exists(f, variables)
+
+    def image(self, states, trans_relation):
+        """
+        Ảnh của tập trạng thái qua R: ∃x. (S(x) ∧ R(x, x')) tính bằng một phép
+        relational product, sau đó đổi tên x' -> x trực tiếp trên BDD.
+        """
+        current_vars = list(self.place_to_curr_var.values())
+        next_states_prime = self.backend.and_exists(states, trans_relation, current_vars)
+        return self.backend.rename(next_states_prime, self.next_to_curr)
+
+    def partition_image(self, states, partition):
+        """
+        Ảnh qua một transition: chỉ lượng hóa và đổi tên các biến thuộc support.
+        """
+        relation, curr_vars, rename = partition
+        return self.backend.rename(self.backend.and_exists(states, relation, curr_vars), rename)
+
+    @metrics.timed("fixpoint")
+    def reachable_fixpoint(self, initial, trans_relation, strategy="monolithic"):
+        """
+        Điểm bất động của tập reachable. Trả về (tập reachable, số vòng lặp).
+        - monolithic: ảnh của frontier qua R cho tới khi không còn trạng thái mới
+        - chaining: lần lượt áp dụng từng R_t lên tập đã đạt được trong mỗi vòng
+        - chaining_ordered: chaining với các R_t nhóm theo biến trên cùng của
+          support; mở dần từ nhóm dưới đáy BDD lên đỉnh, mỗi lần mở thêm thì lặp
+          tới điểm bất động trên toàn bộ tập. Đây không phải saturation thật
+          (không bão hòa từng node BDD), chỉ là thứ tự áp dụng theo tầng.
+        """
+        if strategy == "chaining":
+            return self._chaining_fixpoint(initial, trans_relation)
+        if strategy == "chaining_ordered":
+            return self._chaining_ordered_fixpoint(initial, trans_relation)
+
+        reached = initial
+        frontier = initial
+        iteration = 0
+
+        while not frontier.is_zero():
+            iteration += 1
+            frontier = self.image(frontier, trans_relation) & ~reached
+            reached = reached | frontier
+            self._observe_nodes(reached)
+
+        return reached, iteration
+
+    def _chaining_fixpoint(self, initial, partitions):
+        reached = initial
+        iteration = 0
+        changed = True
+
+        while changed:
+            iteration += 1
+            changed = False
+            for partition in partitions:
+                new_states = self.partition_image(reached, partition) & ~reached
+                if not new_states.is_zero():
+                    reached = reached | new_states
+                    changed = True
+            self._observe_nodes(reached)
+
+        return reached, iteration
+
+    def _chaining_ordered_fixpoint(self, initial, partitions):
+        # nhóm theo biến trên cùng (level nhỏ nhất = gần gốc BDD nhất)
+        groups = {}
+        for partition in partitions:
+            top = min(self.backend.level(var) for var in partition[1])
+            groups.setdefault(top, []).append(partition)
+
+        reached = initial
+        iteration = 0
+        active = []
+
+        for top in sorted(groups, reverse=True):
+            active.extend(groups[top])
+            changed = True
+            while changed:
+                iteration += 1
+                changed = False
+                for partition in active:
+                    new_states = self.partition_image(reached, partition) & ~reached
+                    if not new_states.is_zero():
+                        reached = reached | new_states
+                        changed = True
+                self._observe_nodes(reached)
+
+        return reached, iteration
+
+    def _observe_nodes(self, reached):
+        # đếm node BDD tốn một lần duyệt đồ thị -> chỉ làm khi đang đo
+        if metrics.active() is not None:
+            metrics.observe("bdd_nodes", self.bdd_node_count(reached))
+
+    @metrics.timed("optimize")
+    def optimize_symbolic(self, objective_weights, states=None, strategy="monolithic"):
+        """
+        Tối đa hóa sum w_p * M(p) trên tập reachable BDD (mặc định current_set, chưa có
+        thì tính fixpoint) bằng quy hoạch động trên đồ thị BDD, không liệt kê marking.
+        Place không có trong objective_weights có trọng số 1 như optimize_marking().
+        Trả về cùng định dạng: (marking tối ưu, giá trị, số marking, thời gian, bộ nhớ).
+        """
+        with metrics.measure() as usage:
+            start_time = time.time()
+
+            if states is None:
+                if not hasattr(self, 'current_set'):
+                    self.check_safe()
+                    initial = self.encode_initial_marking()
+                    relation = self.encode_relations(strategy)
+                    reached, _ = self.reachable_fixpoint(initial, relation, strategy)
+                    self.check_safe(reached)
+                    self.current_set = reached
+                states = self.current_set
+            else:
+                self.check_safe(states)
+
+            weights = {v: objective_weights.get(p, 1) for p, v in self.place_to_curr_var.items()}
+            result = self.backend.max_weight(states, weights)
+            total = self.count_states(states)
+
+            exec_time = time.time() - start_time
+        mem_used = usage['peak_mb']
+
+        if result is None:
+            return None, 0, 0, exec_time, mem_used
+        value, assignment = result
+        marking = {p: assignment[self.place_to_curr_var[p]] for p in self.places}
+        return marking, value, total, exec_time, mem_used
+
+    def compute_reachable(self, return_formula=True, strategy="monolithic", readable=True):
+        """
+        Tập reachable bằng fixpoint BDD -> (số trạng thái, thời gian, bộ nhớ[, thông tin]).
+        return_formula=True: thêm dict thông tin (iterations, nodes, valid, ...);
+        readable=True thì dict có thêm công thức đọc được 'initial'/'final', dựng bằng
+        cách liệt kê từng trạng thái, nên chỉ bật khi cần in ra.
+        """
         # Kiểm tra tính hợp lệ trước khi tính toán
         is_valid, error_messages = self.check_symbolic_consistency()
         
@@ -210,7 +433,7 @@ class SymbolicReachabilityPyEDA(PetriNet):
                 print(f"  - {error}")
             
             if return_formula:
-                return 0, 0.0, {
+                return 0, 0.0, 0.0, {
                     'initial': "INVALID NETWORK",
                     'transition': "INVALID NETWORK", 
                     'final': "INVALID NETWORK",
@@ -219,16 +442,17 @@ class SymbolicReachabilityPyEDA(PetriNet):
                     'errors': error_messages
                 }
             else:
-                return 0, 0.0
+                return 0, 0.0, 0.0
 
-        self.setup_variables()
-        
-        current_set = self.encode_initial_marking()
-        initial_formula = self.bdd_to_readable_formula(current_set)
+        self.check_safe()
+        with metrics.phase("encode"):
+            self.setup_variables()
+            current_set = self.encode_initial_marking()
+        initial_formula = self.bdd_to_readable_formula(current_set) if readable else None
         
         if not self.places:
             if return_formula:
-                return 0, 0.0, {
+                return 0, 0.0, 0.0, {
                     'initial': "INVALID - No places",
                     'transition': "INVALID - No places", 
                     'final': "INVALID - No places",
@@ -236,82 +460,44 @@ class SymbolicReachabilityPyEDA(PetriNet):
                     'valid': False
                 }
             else:
-                return 0, 0.0
+                return 0, 0.0, 0.0
         
-        trans_relation = self.encode_transition_relation()
+        trans_relation = self.encode_relations(strategy)
         
-        # Symbolic BFS
-        start_time = time.time()
-        process = psutil.Process(os.getpid())
-        start_mem = process.memory_info().rss
+        # Symbolic BFS; bộ nhớ là đỉnh tracemalloc như phase "fixpoint"
+        with metrics.measure() as usage:
+            start_time = time.time()
+            current_set, iteration = self.reachable_fixpoint(current_set, trans_relation, strategy)
+            self.check_safe(current_set)
+            self.current_set = current_set  # DeadlockDetector dùng lại, không tính lại fixpoint
+            duration = time.time() - start_time
+        memory_used = usage['peak_mb']
         
-        current_vars = list(self.place_to_curr_var.values())
-        iteration = 0
-        max_iterations = 20
-        
-        while iteration < max_iterations:
-            iteration += 1
-            
-            # Image Computation
-            product = current_set & trans_relation
-            product_count = int(product.satisfy_count())
-            
-            if product_count == 0:
-                break
-            
-            next_states_prime = product.smoothing(current_vars)
-            next_count = int(next_states_prime.satisfy_count())
-            
-            if next_count == 0:
-                break
-            
-            # Đổi tên x' -> x
-            next_states = expr2bdd(expr(0))
-            satisfy_points = list(next_states_prime.satisfy_all())
-            
-            for point in satisfy_points:
-                state_conditions = []
-                for p in self.places.keys():
-                    var_next = self.place_to_next_var[p]
-                    if var_next in point and point[var_next]:
-                        state_conditions.append(f"x_{p}")
-                    else:
-                        state_conditions.append(f"~x_{p}")
-                
-                if state_conditions:
-                    state_expr_str = " & ".join(state_conditions)
-                    try:
-                        state_bdd = expr2bdd(expr(state_expr_str))
-                        next_states = next_states | state_bdd
-                    except Exception as e:
-                        continue
-            
-            # Hợp với tập hiện tại
-            new_set = current_set | next_states
-            
-            # Kiểm tra hội tụ
-            if new_set.equivalent(current_set):
-                break
-                
-            current_set = new_set
-        
-        end_time = time.time()
-        end_mem = process.memory_info().rss
-
-        duration = end_time - start_time
-        memory_used = (end_mem - start_mem) / 1024 / 1024
-        
-        final_count = int(current_set.satisfy_count())
-        final_formula = self.bdd_to_readable_formula(current_set)
+        final_count = self.count_states(current_set)
+        if strategy == "monolithic":
+            relation_nodes = self.bdd_node_count(trans_relation)
+        else:
+            relation_nodes = sum(self.bdd_node_count(part[0]) for part in trans_relation)
+        self.node_stats = {
+            'relation': relation_nodes,
+            'reachable': self.bdd_node_count(current_set),
+            'table': self.backend.stats(),
+        }
+        metrics.count("fixpoint_iterations", iteration)
+        metrics.gauge("bdd_relation_nodes", relation_nodes)
+        metrics.gauge("bdd_reachable_nodes", self.node_stats['reachable'])
         
         if return_formula:
-            return final_count, duration, memory_used, {
-                'initial': initial_formula,
-                'transition': f"R(x,x')",
-                'final': final_formula,
+            info = {
+                'transition': f"R(x,x')" if strategy == "monolithic" else f"R_t(x,x') x {len(trans_relation)} ({strategy})",
                 'iterations': iteration,
+                'nodes': self.node_stats,
                 'valid': True
             }
+            if readable:
+                info['initial'] = initial_formula
+                info['final'] = self.bdd_to_readable_formula(current_set)
+            return final_count, duration, memory_used, info
         else:
             return final_count, duration, memory_used
 
@@ -320,21 +506,32 @@ if __name__ == "__main__":
         print("Sử dụng: python src/reachability_symbolic_pyeda.py <file.pnml>")
         sys.exit(1)
         
+    from analysis_session import AnalysisSession
+    from result_cache import ResultCache
+
     file_path = sys.argv[1]
-    net = SymbolicReachabilityPyEDA()
+    backend = sys.argv[sys.argv.index("--backend") + 1] if "--backend" in sys.argv else None
+    cache = None if "--no-cache" in sys.argv else ResultCache()
+    session = AnalysisSession.from_pnml(file_path, bdd_backend=backend, cache=cache)
     
-    if net.parse_pnml(file_path):
-        count, duration, memory, formulas = net.compute_reachable(return_formula=True)
+    if session is not None:
+        if "--order" in sys.argv:
+            from bdd_ordering import load_order
+            session.symbolic_net().variable_order = load_order(sys.argv[sys.argv.index("--order") + 1])
+        count, duration, memory, formulas = session.symbolic()
         
         if formulas.get('valid', True):
+            readable = session.symbolic_formulas()
             print(f"✅ Task 3 (PyEDA) Hoàn thành.")
             print(f"   Tổng số trạng thái: {count}")
-            print(f"   Thời gian: {duration:.4f}s")
-            print(f"   Bộ nhớ sử dụng: {memory:.4f} MB")
+            note = " (cache, đo ở lần chạy trước)" if session.from_cache("symbolic") else ""
+            print(f"   Thời gian: {duration:.4f}s{note}")
+            print(f"   Bộ nhớ sử dụng: {memory:.4f} MB{note}")
             print(f"   Công thức symbolic:")
-            print(f"      - Initial: M₀(x) = {formulas['initial']}")
-            print(f"      - Final Reachable: F(x) = {formulas['final']}")
+            print(f"      - Initial: M₀(x) = {readable['initial']}")
+            print(f"      - Final Reachable: F(x) = {readable['final']}")
             print(f"      - Iterations: {formulas['iterations']}")
+            print(f"      - BDD nodes: {formulas['nodes']}")
         else:
             print(f"❌ Task 3 (PyEDA) Thất bại: Mạng không hợp lệ")
     else:
@@ -1,24 +1,55 @@
 import time
-import psutil
 import os
+import multiprocessing as mp
+import numpy as np
 from pnml_parser import PetriNet
+from state_store import PackedStateStore, DiskStateSet
+import metrics
 
 class ReachabilityNet(PetriNet):
     def __init__(self):
         super().__init__()
         self.pre = {}   # {transition: {place: weight}}
         self.post = {}  # {transition: {place: weight}}
+        self.place_order = []       # thứ tự cột của các ma trận
+        self.transition_order = []  # thứ tự hàng của các ma trận
+        self.pre_matrix = None      # np.ndarray (T x P)
+        self.post_matrix = None     # np.ndarray (T x P)
+        self.incidence = None       # post_matrix - pre_matrix
 
     def build_pre_post(self):
-        for t in self.transitions:
-            self.pre[t] = {}
-            self.post[t] = {}
+        ir = self.compile()
+        self.pre = ir.pre_dicts()
+        self.post = ir.post_dicts()
+
+    def compile_matrices(self):
+        """
+        Biên dịch pre/post thành ma trận số nguyên (hàng: transition, cột: place)
+        """
+        if not self.pre and self.transitions:
+            self.build_pre_post()
 
-        for src, tgt in self.arcs:
-            if src in self.places and tgt in self.transitions:
-                self.pre[tgt][src] = 1
-            elif src in self.transitions and tgt in self.places:
-                self.post[src][tgt] = 1
+        ir = self.compile()
+        self.place_order = list(ir.place_ids)
+        self.transition_order = list(ir.transition_ids)
+        self.pre_matrix, self.post_matrix, self.incidence = ir.matrices()
+
+    def compile_moves(self, order):
+        """
+        Mỗi transition -> (pre, effect) trên chỉ số place theo `order`:
+        pre = [(j, trọng số)], effect = [(j, thay đổi token khác 0)].
+        """
+        col = {p: j for j, p in enumerate(order)}
+        moves = []
+        for t in self.transitions:
+            pre = [(col[p], w) for p, w in self.pre[t].items()]
+            effect = {}
+            for p, w in self.pre[t].items():
+                effect[col[p]] = effect.get(col[p], 0) - w
+            for p, w in self.post[t].items():
+                effect[col[p]] = effect.get(col[p], 0) + w
+            moves.append((pre, [(j, d) for j, d in effect.items() if d]))
+        return moves
 
     def get_initial_marking(self):
         return {p: self.places[p]["initial"] for p in self.places}
@@ -37,42 +68,496 @@ class ReachabilityNet(PetriNet):
             new_m[p] += w
         return new_m
 
-    def bfs(self):
+    def structural_bounds(self):
+        """
+        Cận token mỗi place suy ra từ cấu trúc mạng.
+        Mạng bảo toàn (mỗi transition lấy và trả cùng tổng trọng số) thì tổng token
+        không đổi, nên mọi place bị chặn bởi tổng token ban đầu. Ngược lại chỉ có
+        marking ban đầu làm cận; PackedStateStore sẽ tự tăng số bit (widen, nén lại
+        toàn bộ kho) mỗi khi gặp giá trị vượt cận.
+        """
+        if not self.pre and self.transitions:
+            self.build_pre_post()
+        initial = {p: self.places[p]["initial"] for p in self.places}
+        conservative = all(sum(self.pre[t].values()) == sum(self.post[t].values())
+                           for t in self.transitions)
+        if conservative:
+            total = sum(initial.values())
+            return {p: total for p in self.places}
+        return initial
+
+    @metrics.timed("bfs")
+    def bfs(self, bounds=None):
+        """
+        BFS tường minh. Các marking được lưu một lần duy nhất trong PackedStateStore
+        (dùng như list các dict: len, duyệt, truy cập theo chỉ số).
+        bounds: {place: cận token} dùng để chọn số bit cho mỗi place
+        (mặc định: structural_bounds()).
+        """
+        with metrics.measure() as usage:
+            start_time = time.time()
+
+            if bounds is None:
+                bounds = self.structural_bounds()
+            reachable = PackedStateStore(list(self.places), bounds)
+            for _ in self.iter_reachable(form="tuple", store=reachable):
+                pass
+
+            exec_time = time.time() - start_time
+        mem_used = usage['peak_mb']
+        metrics.count("bfs_states", len(reachable))
+        if exec_time > 0:
+            metrics.gauge("bfs_states_per_second", len(reachable) / exec_time)
+
+        return reachable, exec_time, mem_used
+
+    def iter_reachable(self, edges=False, form="dict", store=None):
+        """
+        BFS dạng generator: mỗi marking được yield ngay khi được phát hiện, theo
+        đúng thứ tự của bfs(); người dùng thoát vòng lặp thì BFS dừng luôn.
+        form: "dict" {place: tokens}, "tuple" hoặc "array" (np.int64, theo thứ tự self.places).
+        edges=True: yield (marking cha, transition, marking) với cạnh đầu tiên dẫn tới
+        marking đó; marking ban đầu có cha và transition là None.
+        store: PackedStateStore dùng làm tập đã thăm (mặc định tạo mới theo
+        structural_bounds()); các marking nằm nén trong store, không giữ list dict.
+        """
         from collections import deque
-        
-        process = psutil.Process(os.getpid())
-        start_mem = process.memory_info().rss
-        start_time = time.time()
 
-        init = self.get_initial_marking()
-        queue = deque([init])
+        order = list(self.places)
+        transitions = list(self.transitions)
+        moves = self.compile_moves(order)
+        reachable = store if store is not None else PackedStateStore(order, self.structural_bounds())
 
-        seen = set()
-        def encode(m): return tuple(m[p] for p in sorted(self.places))
+        if form == "dict":
+            convert = lambda m: dict(zip(order, m))
+        elif form == "array":
+            convert = lambda m: np.array(m, dtype=np.int64)
+        elif form == "tuple":
+            convert = tuple
+        else:
+            raise ValueError(f"form không hợp lệ: '{form}' (chọn 'dict', 'tuple' hoặc 'array')")
 
-        seen.add(encode(init))
-        reachable = [init]
+        init = tuple(self.places[p]["initial"] for p in order)
+        reachable.add(init)
+        yield (None, None, convert(init)) if edges else convert(init)
+        queue = deque([0])
+        level_end = 1   # chỉ số đầu tiên của level kế tiếp (chỉ số tăng theo thứ tự phát hiện)
+
+        def packed_deltas():
+            # độ lệch của mỗi transition trên số nguyên đã nén
+            offsets = reachable.offsets
+            return [sum(d << offsets[j] for j, d in effect) for _, effect in moves]
+
+        layout, deltas = None, None
 
         while queue:
-            m = queue.popleft()
-
-            for t in self.transitions:
-                if self.enabled(m, t):
-                    new_m = self.fire(m, t)
-                    sig = encode(new_m)
-                    if sig not in seen:
-                        seen.add(sig)
-                        reachable.append(new_m)
-                        queue.append(new_m)
-                        
-        end_time = time.time()
-        end_mem = process.memory_info().rss
-
-        exec_time = end_time - start_time
-        mem_used = (end_mem - start_mem) / 1024 / 1024
+            index = queue.popleft()
+            if index == level_end:
+                # level trước đã duyệt xong -> mọi marking của level này đã được phát hiện
+                metrics.observe("bfs_frontier", len(reachable) - level_end)
+                level_end = len(reachable)
+            code = reachable.code(index)
+            m = reachable.unpack_code(code)
+            parent = convert(m) if edges else None
+
+            if layout != reachable.layout_version:
+                layout, deltas = reachable.layout_version, packed_deltas()
+
+            for k, (pre, effect) in enumerate(moves):
+                if all(m[j] >= w for j, w in pre):
+                    limits = reachable.limits
+                    if all(m[j] + d < limits[j] for j, d in effect):
+                        i, is_new = reachable.add_code(code + deltas[k])
+                        new_m = reachable.unpack_code(code + deltas[k]) if is_new else None
+                    else:
+                        new_m = list(m)
+                        for j, d in effect:
+                            new_m[j] += d
+                        new_m = tuple(new_m)
+                        i, is_new = reachable.add(new_m)
+                        if reachable.layout_version != layout:
+                            # kho vừa nới rộng số bit -> nén lại marking cha
+                            layout, deltas = reachable.layout_version, packed_deltas()
+                            code = reachable.pack_code(m)
+                    if is_new:
+                        queue.append(i)
+                        yield (parent, transitions[k], convert(new_m)) if edges else convert(new_m)
+
+    def find_marking(self, predicate, form="dict"):
+        """Marking reachable đầu tiên (theo BFS) thỏa predicate, None nếu không có; dừng ngay khi gặp."""
+        for m in self.iter_reachable(form=form):
+            if predicate(m):
+                return m
+        return None
+
+    def build_stubborn_index(self, moves):
+        """
+        Chỉ mục cho stubborn set trên chỉ số transition:
+        conflicts[t]: các transition cùng lấy token từ một input place của t,
+        producers[j]: các transition làm tăng token của place j.
+        """
+        consumers = {}
+        producers = {}
+        for k, (pre, effect) in enumerate(moves):
+            for j, _ in pre:
+                consumers.setdefault(j, []).append(k)
+            for j, d in effect:
+                if d > 0:
+                    producers.setdefault(j, []).append(k)
+        conflicts = [sorted({u for j, _ in pre for u in consumers[j]}) for pre, _ in moves]
+        return conflicts, producers
+
+    def stubborn_set(self, m, moves, enabled, conflicts, producers):
+        """
+        Stubborn set bảo toàn deadlock (Valmari) tại marking m (tuple).
+        - t enabled: thêm mọi transition tranh chấp input place với t
+        - t disabled: chọn một input place thiếu token, thêm mọi transition nạp place đó
+        Thử lần lượt mỗi transition enabled làm hạt giống, giữ tập có ít transition
+        enabled nhất. Trả về danh sách chỉ số transition enabled cần mở rộng.
+        """
+        best = None
+        for seed in enabled:
+            stubborn = {seed}
+            stack = [seed]
+            n_enabled = 0
+            while stack:
+                t = stack.pop()
+                pre = moves[t][0]
+                scapegoat = next((j for j, w in pre if m[j] < w), None)
+                if scapegoat is None:
+                    n_enabled += 1
+                    if best is not None and n_enabled >= len(best):
+                        break
+                    grow = conflicts[t]
+                else:
+                    grow = producers.get(scapegoat, ())
+                for u in grow:
+                    if u not in stubborn:
+                        stubborn.add(u)
+                        stack.append(u)
+            else:
+                # chỉ tới đây khi closure chạy hết (không bị cắt vì kém hơn best)
+                best = [t for t in enabled if t in stubborn]
+                if len(best) == 1:
+                    break
+        return best
+
+    @metrics.timed("bfs_reduced")
+    def bfs_reduced(self, stop_at_first_deadlock=False):
+        """
+        BFS rút gọn bằng partial-order reduction: tại mỗi marking chỉ mở rộng các
+        transition enabled thuộc một stubborn set. Mọi deadlock reachable vẫn
+        được giữ lại (tập marking thăm được nhỏ hơn bfs()).
+        Trả về (các marking đã thăm, danh sách deadlock dạng dict, thời gian, bộ nhớ).
+        """
+        from collections import deque
+
+        with metrics.measure() as usage:
+            start_time = time.time()
+
+            order = list(self.places)
+            moves = self.compile_moves(order)
+            conflicts, producers = self.build_stubborn_index(moves)
+
+            visited = PackedStateStore(order, {p: self.places[p]["initial"] for p in order})
+            visited.add(tuple(self.places[p]["initial"] for p in order))
+            queue = deque([0])
+            deadlocks = []
+
+            while queue:
+                m = visited.get(queue.popleft())
+                enabled = [k for k, (pre, _) in enumerate(moves) if all(m[j] >= w for j, w in pre)]
+
+                if not enabled:
+                    deadlocks.append(dict(zip(order, m)))
+                    if stop_at_first_deadlock:
+                        break
+                    continue
+
+                for k in self.stubborn_set(m, moves, enabled, conflicts, producers):
+                    new_m = list(m)
+                    for j, d in moves[k][1]:
+                        new_m[j] += d
+                    i, is_new = visited.add(tuple(new_m))
+                    if is_new:
+                        queue.append(i)
+
+            exec_time = time.time() - start_time
+        mem_used = usage['peak_mb']
+
+        return visited, deadlocks, exec_time, mem_used
+
+    def successors_vectorized(self, frontier, chunk_size=4096):
+        """
+        Tính tất cả marking kế tiếp của một lớp frontier (mảng 2 chiều n x P).
+        Chia frontier thành từng khối (~chunk_size cặp marking-transition) để mảng
+        trung gian n x T x P không quá lớn.
+        """
+        n_trans = len(self.transition_order)
+        n_places = len(self.place_order)
+        if n_trans == 0 or len(frontier) == 0:
+            return np.empty((0, n_places), dtype=np.int64)
+
+        # transition không có input place luôn enabled -> không cần so sánh
+        needs_check = self.pre_matrix.any(axis=1)
+        checked_pre = self.pre_matrix[needs_check]
+        checked_ids = np.nonzero(needs_check)[0]
+        free_ids = np.nonzero(~needs_check)[0]
+
+        step = max(1, chunk_size // max(1, n_trans))
+        parts = []
+        for start in range(0, len(frontier), step):
+            block = frontier[start:start + step]
+            enabled = np.zeros((len(block), n_trans), dtype=bool)
+            if len(checked_ids):
+                enabled[:, checked_ids] = (block[:, None, :] >= checked_pre[None, :, :]).all(axis=2)
+            enabled[:, free_ids] = True
+
+            rows, trans = np.nonzero(enabled)
+            if len(rows):
+                parts.append(block[rows] + self.incidence[trans])
+
+        if not parts:
+            return np.empty((0, n_places), dtype=np.int64)
+        return np.concatenate(parts)
+
+    @metrics.timed("bfs_vectorized")
+    def bfs_vectorized(self, chunk_size=4096):
+        """
+        BFS theo từng lớp trên ma trận: kiểm tra enabled và tính successor cho cả
+        frontier bằng phép toán mảng. Trả về cùng định dạng với bfs().
+        """
+        with metrics.measure() as usage:
+            start_time = time.time()
+
+            self.compile_matrices()
+            n_places = len(self.place_order)
+            row_type = np.dtype((np.void, n_places * 8 or 1))
+
+            init = np.array([[self.places[p]["initial"] for p in self.place_order]], dtype=np.int64)
+            seen = {init[0].tobytes()}
+            layers = [init]
+            frontier = init
+
+            while len(frontier) and n_places:
+                succ = self.successors_vectorized(frontier, chunk_size)
+                if len(succ) == 0:
+                    break
+
+                # mỗi hàng -> một khóa bytes; loại trùng trong lớp và với seen,
+                # giữ thứ tự phát hiện giống bfs()
+                keys = np.ascontiguousarray(succ).view(row_type).ravel().tolist()
+                fresh = []
+                for i, key in enumerate(keys):
+                    if key not in seen:
+                        seen.add(key)
+                        fresh.append(i)
+
+                frontier = succ[fresh] if fresh else np.empty((0, n_places), dtype=np.int64)
+                if len(frontier):
+                    layers.append(frontier)
+
+            states = np.concatenate(layers)
+            reachable = [dict(zip(self.place_order, map(int, row))) for row in states]
+
+            exec_time = time.time() - start_time
+        mem_used = usage['peak_mb']
+
+        return reachable, exec_time, mem_used
+
+    @metrics.timed("bfs_parallel")
+    def bfs_parallel(self, workers=None, batch_size=512):
+        """
+        BFS song song: mỗi marking thuộc về worker hash(marking) % workers.
+        Mỗi worker mở rộng phần của mình, gửi successor không thuộc mình theo lô
+        tới worker sở hữu. Các worker chạy đồng bộ theo lớp; dừng khi cả lớp
+        không sinh marking mới -> cùng tập reachable với bfs().
+        """
+        with metrics.measure() as usage:
+            start_time = time.time()
+
+            workers = workers or mp.cpu_count()
+            order = list(self.places)
+            moves = self.compile_moves(order)
+            init = tuple(self.places[p]["initial"] for p in order)
+
+            inboxes = [mp.Queue() for _ in range(workers)]
+            controls = [mp.Queue() for _ in range(workers)]
+            reports = mp.Queue()
+            procs = [
+                mp.Process(target=_partition_worker,
+                           args=(w, workers, moves, init, inboxes, controls[w], reports, batch_size),
+                           daemon=True)
+                for w in range(workers)
+            ]
+            for proc in procs:
+                proc.start()
+
+            try:
+                # mỗi vòng: mọi worker mở rộng frontier của mình rồi báo số marking mới
+                while True:
+                    for c in controls:
+                        c.put("step")
+                    new_states = sum(reports.get() for _ in range(workers))
+                    if new_states == 0:
+                        break
+
+                for c in controls:
+                    c.put("stop")
+                partitions = [reports.get() for _ in range(workers)]
+            finally:
+                for proc in procs:
+                    proc.join(timeout=5)
+                    if proc.is_alive():
+                        proc.terminate()
+
+            reachable = PackedStateStore(order, {p: self.places[p]["initial"] for p in order})
+            reachable.add(init)
+            for part in partitions:
+                for m in part:
+                    reachable.add(m)
+
+            exec_time = time.time() - start_time
+        mem_used = usage['peak_mb']
 
         return reachable, exec_time, mem_used
 
+    @metrics.timed("bfs_external")
+    def bfs_external(self, workdir=None, chunk_size=65536, max_runs=8):
+        """
+        BFS ngoài bộ nhớ: tập đã thăm là các run đã sắp xếp trên đĩa (DiskStateSet),
+        frontier của mỗi lớp là một file int64 đọc bằng memmap. Successor được
+        gom thành lô chunk_size hàng rồi mới loại trùng với tập đã thăm
+        (delayed duplicate detection). Kết quả đọc ra theo luồng qua
+        DiskStateSet.iter_chunks() mà không cần dựng dict.
+        """
+        with metrics.measure() as usage:
+            start_time = time.time()
+
+            self.compile_matrices()
+            n_places = len(self.place_order)
+            visited = DiskStateSet(self.place_order, workdir, max_runs, chunk_size)
+
+            try:
+                if not n_places:
+                    visited.empty_marking = True
+                else:
+                    self._explore_external(visited, chunk_size)
+            except BaseException:
+                # dọn file tạm nếu bị lỗi/ngắt giữa chừng
+                visited.close()
+                raise
+
+            exec_time = time.time() - start_time
+        mem_used = usage['peak_mb']
+
+        return visited, exec_time, mem_used
+
+    def _explore_external(self, visited, chunk_size):
+        n_places = len(self.place_order)
+        init = np.array([[self.places[p]["initial"] for p in self.place_order]], dtype=np.int64)
+        frontier_path = visited.new_path("frontier")
+        init.tofile(frontier_path)
+        visited.add_run(visited.as_keys(init))
+        frontier_count = 1
+
+        while frontier_count:
+            next_path = visited.new_path("frontier")
+            next_count = 0
+            buffered, buffered_rows = [], 0
+
+            def flush(out):
+                # loại trùng cả lô với tập đã thăm, phần còn lại vừa là run mới
+                # vừa là frontier lớp sau
+                fresh = visited.filter_new(np.concatenate(buffered))
+                visited.add_run(fresh)
+                visited.as_rows(fresh).tofile(out)
+                return len(fresh)
+
+            frontier = np.memmap(frontier_path, dtype=np.int64, mode='r',
+                                 shape=(frontier_count, n_places))
+            with open(next_path, 'wb') as out:
+                for start in range(0, frontier_count, chunk_size):
+                    block = np.array(frontier[start:start + chunk_size])
+                    succ = self.successors_vectorized(block)
+                    if len(succ):
+                        buffered.append(succ)
+                        buffered_rows += len(succ)
+                    if buffered_rows >= chunk_size:
+                        next_count += flush(out)
+                        buffered, buffered_rows = [], 0
+                if buffered:
+                    next_count += flush(out)
+
+            del frontier
+            os.remove(frontier_path)
+            frontier_path, frontier_count = next_path, next_count
+
+        os.remove(frontier_path)
+
+
+def _owner(marking, workers):
+    # hash của tuple số nguyên không phụ thuộc PYTHONHASHSEED -> mọi tiến trình thống nhất
+    return hash(marking) % workers
+
+
+def _partition_worker(wid, workers, moves, init, inboxes, control, reports, batch_size):
+    """
+    Worker của bfs_parallel: giữ tập seen/frontier của phân vùng mình.
+    """
+    seen = set()
+    frontier = []
+    if _owner(init, workers) == wid:
+        seen.add(init)
+        frontier.append(init)
+
+    while control.get() == "step":
+        outbox = [[] for _ in range(workers)]
+        candidates = []
+
+        for m in frontier:
+            for pre, effect in moves:
+                if all(m[j] >= w for j, w in pre):
+                    new_m = list(m)
+                    for j, d in effect:
+                        new_m[j] += d
+                    new_m = tuple(new_m)
+
+                    owner = _owner(new_m, workers)
+                    if owner == wid:
+                        candidates.append(new_m)
+                    else:
+                        outbox[owner].append(new_m)
+                        if len(outbox[owner]) >= batch_size:
+                            inboxes[owner].put(("batch", outbox[owner]))
+                            outbox[owner] = []
+
+        for owner in range(workers):
+            if owner != wid:
+                if outbox[owner]:
+                    inboxes[owner].put(("batch", outbox[owner]))
+                inboxes[owner].put(("done", wid))
+
+        # thứ tự trong Queue được giữ theo từng bên gửi: khi nhận "done" của một
+        # worker thì mọi lô của worker đó trong vòng này đã tới
+        pending = workers - 1
+        while pending:
+            kind, payload = inboxes[wid].get()
+            if kind == "done":
+                pending -= 1
+            else:
+                candidates.extend(payload)
+
+        frontier = []
+        for m in candidates:
+            if m not in seen:
+                seen.add(m)
+                frontier.append(m)
+        reports.put(len(frontier))
+
+    seen.discard(init)
+    reports.put(list(seen))
+
 
 if __name__ == "__main__":
     import sys
@@ -80,14 +565,37 @@ if __name__ == "__main__":
     if len(sys.argv) < 2:
         exit(1)
 
+    from result_cache import ResultCache
+
     net = ReachabilityNet()
     net.parse_pnml(sys.argv[1])
     net.build_pre_post()
+    cache = None if "--no-cache" in sys.argv[2:] else ResultCache()
+
+    if "--vectorized" in sys.argv[2:]:
+        engine, kind = net.bfs_vectorized, "explicit-vectorized"
+    elif "--parallel" in sys.argv[2:]:
+        engine, kind = net.bfs_parallel, "explicit-parallel"
+    elif "--external" in sys.argv[2:]:
+        engine, kind = net.bfs_external, None  # kết quả nằm trên đĩa, không cache
+    else:
+        engine, kind = net.bfs, "explicit"
 
-    reachable, exec_time, mem_used = net.bfs() 
-    print(f"Reachable markings ({len(reachable)}):")
-    for m in reachable:
-        print(m)
+    cached = cache.get(net, kind) if cache is not None and kind else None
+    if cached is not None:
+        reachable, exec_time, mem_used = cached
+    else:
+        reachable, exec_time, mem_used = engine()
+        if cache is not None and kind:
+            cache.put(net, kind, (reachable, exec_time, mem_used))
+    try:
+        print(f"Reachable markings ({len(reachable)}):")
+        for m in reachable:
+            print(m)
+    finally:
+        if isinstance(reachable, DiskStateSet):
+            reachable.close()
     
-    print(f"\nExecution time: {exec_time:.4f} seconds")
-    print(f"Memory used: {mem_used:.4f} MB")
+    note = " (cached, measured on an earlier run)" if cached is not None else ""
+    print(f"\nExecution time: {exec_time:.4f} seconds{note}")
+    print(f"Memory used: {mem_used:.4f} MB{note}")
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+ENGINE_VERSION = 2   # tăng khi engine đổi cách tính -> mọi entry cũ bị bỏ
+
+
+def net_key(net):
+    """Hash nội dung của mạng đã parse: place + marking ban đầu, transition, arc + trọng số."""
+    content = {
+        'places': sorted((p, info['initial']) for p, info in net.places.items()),
+        'transitions': sorted(net.transitions),
+        'arcs': sorted((src, tgt, net.arc_weights.get((src, tgt), 1)) for src, tgt in net.arcs),
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def options_key(*parts):
+    """Khóa ngắn cho tham số của một loại kết quả (chiến lược, trọng số, ...)."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    Cache kết quả phân tích trên đĩa, khóa theo nội dung mạng (net_key) và loại
+    kết quả ('explicit', 'symbolic-...', 'deadlock-...', 'optimize-...').
+    - mỗi entry là một file pickle ghi kèm ENGINE_VERSION; đọc ra khác version
+      hoặc không unpickle được thì xóa và coi như không có
+    - kết quả giữ nguyên thời gian, bộ nhớ của lần tính đã lưu; AnalysisSession.from_cache()
+      cho biết kết quả nào lấy từ cache để không in chúng như vừa đo
+    - tổng dung lượng vượt max_bytes thì xóa entry ít được dùng gần đây nhất (LRU
+      theo mtime, được cập nhật mỗi lần đọc trúng)
+    Thư mục mặc định: $PETRI_CACHE_DIR hoặc ~/.cache/petri-analysis.
+    """
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024, engine_version=ENGINE_VERSION):
+        self.directory = (directory or os.environ.get("PETRI_CACHE_DIR")
+                          or os.path.join(os.path.expanduser("~"), ".cache", "petri-analysis"))
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.engine_version = engine_version
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key, kind):
+        return os.path.join(self.directory, f"{key}.{kind}.pkl")
+
+    def _entries(self):
+        return [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith(".pkl")]
+
+    def get(self, net, kind, default=None):
+        path = self._path(net_key(net), kind)
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.misses += 1
+            return default
+        with f:
+            try:
+                version, value = pickle.load(f)
+            except Exception:
+                # file hỏng, ghi dở hay trỏ tới class/module không còn: bỏ entry
+                self._remove(path)
+                self.misses += 1
+                return default
+        if version != self.engine_version:
+            self._remove(path)
+            self.misses += 1
+            return default
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, net, kind, value):
+        path = self._path(net_key(net), kind)
+        # ghi file tạm rồi đổi tên: tiến trình khác không bao giờ đọc được entry dở
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((self.engine_version, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception:
+            self._remove(tmp)
+            raise
+        self.evict()
+        return value
+
+    def invalidate(self, net=None, kind=None):
+        """Xóa các entry của `net` (mặc định: mọi mạng), chỉ loại `kind` nếu có."""
+        prefix = f"{net_key(net)}." if net is not None else ""
+        removed = 0
+        for path in self._entries():
+            name = os.path.basename(path)
+            if not name.startswith(prefix):
+                continue
+            if kind is not None and name.split(".")[1] != kind:
+                continue
+            self._remove(path)
+            removed += 1
+        return removed
+
+    def evict(self):
+        """Xóa entry dùng lâu nhất cho tới khi tổng dung lượng <= max_bytes."""
+        entries = []
+        for path in self._entries():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def nbytes(self):
+        return sum(os.path.getsize(path) for path in self._entries())
+
+    def __len__(self):
+        return len(self._entries())
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
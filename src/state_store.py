@@ -0,0 +1,339 @@
+import os
+import shutil
+import tempfile
+import weakref
+from array import array
+
+import numpy as np
+
+
+class PackedStateStore:
+    """
+    Kho lưu marking dạng nén: mỗi marking là một bản ghi cố định số byte trong
+    một bytearray liên tục, mỗi place chiếm đúng số bit cần cho cận (bound) của nó.
+    Chỉ mục băm địa chỉ mở (linear probing) trỏ tới vị trí bản ghi.
+    Marking chỉ được giải nén thành dict khi có người gọi tới.
+    """
+
+    EMPTY = -1
+
+    def __init__(self, places, bounds=None, initial_capacity=1024):
+        self.places = list(places)
+        bounds = bounds or {}
+        self.widths = [max(1, int(bounds.get(p, 1)).bit_length()) for p in self.places]
+        self._layout()
+
+        self.buffer = bytearray()
+        self.count = 0
+
+        capacity = 8
+        while capacity < 2 * initial_capacity:
+            capacity *= 2
+        self.index = array('q', [self.EMPTY]) * capacity
+
+    def _layout(self):
+        self.offsets = []
+        total = 0
+        for w in self.widths:
+            self.offsets.append(total)
+            total += w
+        self.limits = [1 << w for w in self.widths]
+        self.record_size = max(1, (total + 7) // 8)
+        self.layout_version = getattr(self, 'layout_version', -1) + 1
+
+    # ---------- nén / giải nén ----------
+    def pack_code(self, values):
+        """
+        Marking -> số nguyên đã nén (None nếu có giá trị vượt số bit hiện có).
+        """
+        code = 0
+        for v, off, lim in zip(values, self.offsets, self.limits):
+            if not 0 <= v < lim:
+                return None
+            code |= v << off
+        return code
+
+    def unpack_code(self, code):
+        return tuple((code >> off) & (lim - 1) for off, lim in zip(self.offsets, self.limits))
+
+    def _pack(self, values):
+        code = self.pack_code(values)
+        return None if code is None else code.to_bytes(self.record_size, 'little')
+
+    def _unpack(self, record):
+        return self.unpack_code(int.from_bytes(record, 'little'))
+
+    def _record(self, i):
+        start = i * self.record_size
+        return bytes(self.buffer[start:start + self.record_size])
+
+    def _widen(self, values):
+        """
+        Một giá trị vượt cận ban đầu -> tăng số bit của place đó và nén lại toàn bộ.
+        """
+        old = [self._unpack(self._record(i)) for i in range(self.count)]
+        for j, v in enumerate(values):
+            if v < 0:
+                raise ValueError(f"Marking âm tại place '{self.places[j]}': {v}")
+            self.widths[j] = max(self.widths[j], v.bit_length())
+        self._layout()
+
+        self.buffer = bytearray()
+        for i in range(len(self.index)):
+            self.index[i] = self.EMPTY
+        n, self.count = self.count, 0
+        for k in range(n):
+            self._insert(self._pack(old[k]))
+
+    # ---------- chỉ mục băm ----------
+    def _slot(self, record):
+        mask = len(self.index) - 1
+        slot = hash(record) & mask
+        while True:
+            i = self.index[slot]
+            if i == self.EMPTY or self._record(i) == record:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _grow_index(self):
+        self.index = array('q', [self.EMPTY]) * (2 * len(self.index))
+        for i in range(self.count):
+            self.index[self._slot(self._record(i))] = i
+
+    def _insert(self, record):
+        slot = self._slot(record)
+        i = self.index[slot]
+        if i != self.EMPTY:
+            return i, False
+
+        i = self.count
+        self.buffer += record
+        self.count += 1
+        self.index[slot] = i
+        if 2 * self.count > len(self.index):
+            self._grow_index()
+        return i, True
+
+    # ---------- API ----------
+    def add(self, values):
+        """
+        Thêm marking (tuple theo thứ tự self.places).
+        Trả về (vị trí, True nếu là marking mới).
+        """
+        record = self._pack(values)
+        if record is None:
+            self._widen(values)
+            record = self._pack(values)
+        return self._insert(record)
+
+    def add_code(self, code):
+        """
+        Thêm marking đã nén sẵn (chỉ dùng khi chắc chắn mọi place nằm trong cận).
+        """
+        return self._insert(code.to_bytes(self.record_size, 'little'))
+
+    def code(self, i):
+        return int.from_bytes(self._record(i), 'little')
+
+    def find(self, values):
+        record = self._pack(values)
+        if record is None:
+            return None
+        i = self.index[self._slot(record)]
+        return None if i == self.EMPTY else i
+
+    def __contains__(self, values):
+        return self.find(values) is not None
+
+    def get(self, i):
+        """Marking thứ i dạng tuple."""
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self._unpack(self._record(i))
+
+    def marking(self, i):
+        """Marking thứ i dạng dict {place: tokens}."""
+        return dict(zip(self.places, self.get(i)))
+
+    def tuples(self):
+        for i in range(self.count):
+            yield self.get(i)
+
+    def iter_chunks(self, chunk_size=65536):
+        """Duyệt các marking theo khối mảng n x P int64 (giải nén bằng NumPy, không tạo dict)."""
+        size = self.record_size
+        for start in range(0, self.count, chunk_size):
+            stop = min(start + chunk_size, self.count)
+            raw = np.frombuffer(bytes(self.buffer[start * size:stop * size]), dtype=np.uint8).reshape(-1, size)
+            bits = np.unpackbits(raw, axis=1, bitorder='little')
+            rows = np.empty((stop - start, len(self.places)), dtype=np.int64)
+            for j, (off, w) in enumerate(zip(self.offsets, self.widths)):
+                rows[:, j] = bits[:, off:off + w].astype(np.int64) @ (1 << np.arange(w, dtype=np.int64))
+            yield rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.marking(k) for k in range(*i.indices(self.count))]
+        return self.marking(i)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.marking(i)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return len(self.buffer) + self.index.itemsize * len(self.index)
+
+
+class DiskStateSet:
+    """
+    Tập marking đã thăm nằm trên đĩa: gồm các "run" đã sắp xếp, mỗi run là một
+    file nhị phân các hàng int64 (P cột) được đọc bằng memmap.
+    Các run rời nhau; khi số run vượt max_runs thì gộp (merge) dạng luồng.
+    File (và thư mục tạm nếu do lớp này tạo) bị xóa khi close(), khi ra khỏi khối
+    `with`, hoặc muộn nhất khi đối tượng bị thu hồi / tiến trình kết thúc.
+    """
+
+    def __init__(self, places, workdir=None, max_runs=8, chunk_size=65536):
+        self.places = list(places)
+        self.width = len(self.places) * 8
+        self.row_type = np.dtype((np.void, self.width or 1))
+        self.max_runs = max_runs
+        self.chunk_size = chunk_size
+
+        self._owns_dir = workdir is None
+        self.workdir = tempfile.mkdtemp(prefix="reach_") if workdir is None else workdir
+        os.makedirs(self.workdir, exist_ok=True)
+        self.runs = []      # [(path, số hàng)]
+        self.empty_marking = False  # mạng không có place: tập chỉ gồm marking rỗng
+        self._created = []
+        self._next_id = 0
+        self._finalizer = weakref.finalize(self, _remove_spill, self._created,
+                                           self.workdir if self._owns_dir else None)
+
+    # ---------- file ----------
+    def new_path(self, kind):
+        self._next_id += 1
+        path = os.path.join(self.workdir, f"{kind}_{self._next_id:06d}.bin")
+        self._created.append(path)
+        return path
+
+    def _open(self, path, count):
+        return np.memmap(path, dtype=self.row_type, mode='r', shape=(count,))
+
+    def as_keys(self, rows):
+        """Mảng n x P int64 -> mảng khóa void (so sánh theo byte)."""
+        return np.ascontiguousarray(rows, dtype=np.int64).view(self.row_type).ravel()
+
+    def as_rows(self, keys):
+        return np.asarray(keys).view(np.int64).reshape(-1, len(self.places))
+
+    # ---------- loại trùng theo lô ----------
+    def filter_new(self, rows):
+        """
+        Trả về các khóa (đã sắp xếp, không trùng) của `rows` chưa có trong tập.
+        """
+        keys = np.unique(self.as_keys(rows))
+        for path, count in self.runs:
+            if not len(keys):
+                break
+            run = self._open(path, count)
+            pos = np.searchsorted(run, keys)
+            found = np.zeros(len(keys), dtype=bool)
+            inside = pos < count
+            found[inside] = run[pos[inside]] == keys[inside]
+            keys = keys[~found]
+        return keys
+
+    def add_run(self, keys):
+        """Ghi một lô khóa mới (đã sắp xếp, rời với tập hiện có) thành một run."""
+        if not len(keys):
+            return
+        path = self.new_path("run")
+        keys.tofile(path)
+        self.runs.append((path, len(keys)))
+        if len(self.runs) > self.max_runs:
+            self.compact()
+
+    def compact(self):
+        """Gộp các run theo cặp, run nhỏ trước, cho tới khi còn một run."""
+        while len(self.runs) > 1:
+            self.runs.sort(key=lambda r: r[1])
+            (pa, na), (pb, nb) = self.runs[0], self.runs[1]
+            path = self.new_path("run")
+            self._merge(self._open(pa, na), self._open(pb, nb), path)
+            os.remove(pa)
+            os.remove(pb)
+            self.runs = [(path, na + nb)] + self.runs[2:]
+
+    def _merge(self, a, b, path):
+        i = j = 0
+        step = self.chunk_size
+        with open(path, 'wb') as out:
+            while i < len(a) and j < len(b):
+                ca, cb = a[i:i + step], b[j:j + step]
+                # chỉ ghi phần chắc chắn không lớn hơn phần tử cuối nhỏ hơn của 2 khối
+                limit = ca[-1:] if ca[-1].tobytes() <= cb[-1].tobytes() else cb[-1:]
+                ta = int(np.searchsorted(ca, limit, side='right')[0])
+                tb = int(np.searchsorted(cb, limit, side='right')[0])
+                np.sort(np.concatenate([ca[:ta], cb[:tb]])).tofile(out)
+                i += ta
+                j += tb
+            for rest, k in ((a, i), (b, j)):
+                for start in range(k, len(rest), step):
+                    np.asarray(rest[start:start + step]).tofile(out)
+
+    # ---------- đọc ra dạng luồng ----------
+    def iter_chunks(self, chunk_size=None):
+        """Duyệt các marking theo khối mảng n x P (không tạo dict)."""
+        step = chunk_size or self.chunk_size
+        if self.empty_marking:
+            yield np.zeros((1, 0), dtype=np.int64)
+        for path, count in self.runs:
+            run = self._open(path, count)
+            for start in range(0, count, step):
+                yield self.as_rows(np.array(run[start:start + step]))
+
+    def tuples(self):
+        for block in self.iter_chunks():
+            for row in block.tolist():
+                yield tuple(row)
+
+    def __iter__(self):
+        for m in self.tuples():
+            yield dict(zip(self.places, m))
+
+    def __len__(self):
+        return int(self.empty_marking) + sum(count for _, count in self.runs)
+
+    def __contains__(self, values):
+        if not self.places:
+            return self.empty_marking
+        return not len(self.filter_new(np.array([values], dtype=np.int64)))
+
+    def close(self):
+        """Xóa mọi file đã tạo (và thư mục tạm nếu do lớp này tạo)."""
+        self.runs = []
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _remove_spill(created, owned_dir):
+    """Dọn file của một DiskStateSet; không giữ tham chiếu tới đối tượng (weakref.finalize)."""
+    for path in created:
+        if os.path.exists(path):
+            os.remove(path)
+    created.clear()
+    if owned_dir is not None:
+        shutil.rmtree(owned_dir, ignore_errors=True)
@@ -0,0 +1,58 @@
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from analysis_session import AnalysisSession  # noqa: E402
+from reachability_bdd import SymbolicReachabilityPyEDA  # noqa: E402
+
+_names = itertools.count()
+
+
+@pytest.fixture
+def fresh_name():
+    """
+    fresh_name("x") -> "x<k>" chưa dùng trong tiến trình. PyEDA giữ biến theo tên suốt
+    tiến trình (thứ tự biến cố định theo lần tạo đầu), nên mỗi test tự đặt tiền tố riêng.
+    """
+    return lambda prefix: f"{prefix}{next(_names)}"
+
+
+@pytest.fixture
+def symbolic_for(fresh_name):
+    """symbolic_for(net, backend) -> SymbolicReachabilityPyEDA dùng chung cấu trúc của `net`."""
+    def make(net, backend="array"):
+        sym = SymbolicReachabilityPyEDA(backend)
+        sym.places, sym.transitions, sym.arcs = net.places, net.transitions, net.arcs
+        sym.var_prefix = fresh_name("b")
+        return sym
+    return make
+
+
+@pytest.fixture
+def session_for(fresh_name):
+    """session_for(net, backend, cache) -> AnalysisSession với tiền tố biến BDD riêng."""
+    def make(net, backend="array", cache=None):
+        session = AnalysisSession(net, bdd_backend=backend, cache=cache)
+        session.symbolic_net().var_prefix = fresh_name("s")
+        return session
+    return make
+
+
+@pytest.fixture
+def counting(monkeypatch):
+    """counting(cls, name) -> list ghi lại mỗi lần cls.name được gọi (vẫn chạy bản gốc)."""
+    def patch(cls, name):
+        calls = []
+        original = getattr(cls, name)
+
+        def wrapper(self, *args, **kwargs):
+            calls.append(name)
+            return original(self, *args, **kwargs)
+
+        monkeypatch.setattr(cls, name, wrapper)
+        return calls
+    return patch
@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from analysis_session import AnalysisSession  # noqa: E402
+from reachability_bdd import SymbolicReachabilityPyEDA  # noqa: E402
+from reachability_explicit import ReachabilityNet  # noqa: E402
+from net_generators import philosophers  # noqa: E402
+from tests.test_explicit_engines import EXAMPLES  # noqa: E402
+
+
+def test_each_artifact_is_computed_once(session_for, counting):
+    bfs_calls = counting(ReachabilityNet, "bfs")
+    fixpoint_calls = counting(SymbolicReachabilityPyEDA, "reachable_fixpoint")
+    session = session_for(philosophers(2))
+
+    assert session.is_valid()
+    markings, _, _ = session.explicit()
+    count, _, _, _ = session.symbolic()
+    assert count == len(markings)
+
+    marking, _, message = session.detect_deadlock("ilp", max_attempts=200)
+    assert message == "Deadlock FOUND"
+    session.detect_deadlock("symbolic")
+    session.detect_deadlock("state_equation")
+
+    best, value, total, _, _ = session.optimize({p: 1 for p in session.net.places})
+    assert total == len(markings)
+    assert value == max(sum(m.values()) for m in markings)
+
+    assert bfs_calls == ["bfs"]
+    assert fixpoint_calls == ["reachable_fixpoint"]
+
+
+def test_from_pnml():
+    session = AnalysisSession.from_pnml(os.path.join(EXAMPLES, "simple_example.pnml"))
+    assert session.is_valid()
+    assert len(session.explicit()[0]) == 2
+    assert AnalysisSession.from_pnml(os.path.join(EXAMPLES, "missing.pnml")) is None
+
+
+def test_symbolic_skips_readable_formulas(session_for, counting):
+    formula_calls = counting(SymbolicReachabilityPyEDA, "bdd_to_readable_formula")
+    session = session_for(philosophers(2))
+
+    count, _, _, info = session.symbolic()
+    assert count == len(session.explicit()[0])
+    assert 'initial' not in info and formula_calls == []
+
+    formulas = session.symbolic_formulas()
+    assert formulas['initial'] and formulas['final']
+    assert session.symbolic_formulas() is formulas
+    assert len(formula_calls) == 2
@@ -0,0 +1,103 @@
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import batch_runner  # noqa: E402
+from batch_runner import _output_names, discover, load_net_objectives, run_batch  # noqa: E402
+from net_generators import philosophers  # noqa: E402
+from tests.test_explicit_engines import EXAMPLES  # noqa: E402
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_directory_run_with_objectives(tmp_path):
+    objectives = tmp_path / "objectives.txt"
+    objectives.write_text("deadlock_example.pnml: p1_think=1 p2_think=2\n"
+                          "deadlock_example: fork1=3   # hai hàm mục tiêu cho cùng mạng\n"
+                          "simple_example: nope=1\n")
+    out = str(tmp_path / "out")
+    summary = run_batch(discover(EXAMPLES), out, load_net_objectives(str(objectives)),
+                        workers=2, timeout=120, cache=False)
+
+    statuses = {entry['file']: entry['status'] for entry in summary}
+    assert statuses == {"deadlock_example.json": "ok", "invalid_example.json": "invalid",
+                        "simple_example.json": "error"}
+    assert len(read(os.path.join(out, "summary.json"))) == 3
+
+    result = read(os.path.join(out, "deadlock_example.json"))
+    assert result['deadlock']['found'] is True
+    assert result['explicit']['states'] == result['symbolic']['states']
+    assert [o['value'] for o in result['optimize']['objectives']] == [5, 6]
+    assert "fixpoint" in result['metrics']['phases']
+    assert "nope=1" in read(os.path.join(out, "simple_example.json"))['error']
+
+
+def stuck_on(monkeypatch, marker, pid_file):
+    """analyze() của mạng có `marker` trong tên chạy một tiến trình cháu rồi treo mãi."""
+    original = batch_runner.analyze
+
+    def analyze(path, *args, **kwargs):
+        if marker not in os.path.basename(path):
+            return original(path, *args, **kwargs)
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(600)"])
+        pid_file.write_text(str(child.pid))
+        child.wait()
+
+    # job chạy trong tiến trình fork nên thấy bản vá này
+    monkeypatch.setattr(batch_runner, "analyze", analyze)
+
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().split(")")[-1].split()[0] != "Z"
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork" or not hasattr(os, "killpg"),
+                    reason="cần fork và nhóm tiến trình POSIX")
+def test_manifest_timeout_and_resume(tmp_path, monkeypatch):
+    pid_file = tmp_path / "grandchild.pid"
+    stuck_on(monkeypatch, "stuck", pid_file)
+    philosophers(2).save_binary(str(tmp_path / "small.pnb"))
+    philosophers(2).save_binary(str(tmp_path / "stuck.pnb"))
+    os.makedirs(tmp_path / "other")
+    shutil.copy(tmp_path / "small.pnb", tmp_path / "other" / "small.pnb")
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("small.pnb\nstuck.pnb  # treo tới khi bị kill\n\nother/small.pnb\n")
+
+    out = str(tmp_path / "out")
+    summary = run_batch(discover(str(manifest)), out, workers=3, timeout=5, cache=False)
+    assert sorted((e['file'], e['status']) for e in summary) == [
+        ("small-1.json", "ok"), ("small.json", "ok"), ("stuck.json", "timeout")]
+    # tiến trình cháu bị kill cùng job
+    assert not alive(int(pid_file.read_text()))
+
+    summary = run_batch(discover(str(manifest)), out, workers=3, timeout=0.5, cache=False, resume=True)
+    assert sorted((e['file'], e['status'], e.get('resumed', False)) for e in summary) == [
+        ("small-1.json", "ok", True), ("small.json", "ok", True), ("stuck.json", "timeout", False)]
+
+
+def test_output_names_never_overwrite_summary():
+    paths = ["a/summary.pnml", "a/small.pnb", "b/small.pnb", "c/small-1.pnb", "d/summary.pnb"]
+    assert _output_names(paths) == ["summary-1.json", "small.json", "small-1.json",
+                                    "small-1-1.json", "summary-2.json"]
+
+
+def test_objectives_file_errors(tmp_path):
+    path = tmp_path / "objectives.txt"
+    path.write_text("p1=2\n")
+    with pytest.raises(ValueError, match="objectives.txt:1"):
+        load_net_objectives(str(path))
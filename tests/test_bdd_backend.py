@@ -0,0 +1,204 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bdd_backend import ArrayBackend, PyEdaBackend, make_backend  # noqa: E402
+from net_generators import fork_join, philosophers, producer_consumer_ring, token_ring  # noqa: E402
+from reachability_bdd import SymbolicReachabilityPyEDA  # noqa: E402
+
+@pytest.mark.parametrize("strategy", SymbolicReachabilityPyEDA.STRATEGIES)
+def test_backends_agree_with_explicit_bfs(strategy, symbolic_for):
+    net = philosophers(4)
+    net.build_pre_post()
+    expected = len(net.bfs()[0])
+
+    for backend in ("pyeda", "array"):
+        count, _, _ = symbolic_for(net, backend).compute_reachable(return_formula=False, strategy=strategy)
+        assert count == expected
+
+
+@pytest.mark.parametrize("backend", ["pyeda", "array"])
+@pytest.mark.parametrize("net", [token_ring(6), fork_join(3, 2), philosophers(3)], ids=["ring6", "fork3x2", "phil3"])
+def test_partitioned_strategies_reach_the_same_set(backend, net, symbolic_for):
+    net.build_pre_post()
+    places = list(net.places)
+    expected = {tuple(m[p] for p in places) for m in net.bfs()[0]}
+
+    iterations = {}
+    for strategy in SymbolicReachabilityPyEDA.STRATEGIES:
+        sym = symbolic_for(net, backend)  # encode_relations tự tạo biến
+        relation = sym.encode_relations(strategy)
+        reached, iterations[strategy] = sym.reachable_fixpoint(sym.encode_initial_marking(), relation, strategy)
+        assert as_tuples(sym, reached, places) == expected
+    # chaining áp dụng R_t lên tập vừa mở rộng nên cần ít vòng hơn BFS theo lớp
+    assert iterations["chaining"] <= iterations["monolithic"]
+
+    with pytest.raises(ValueError, match="Chiến lược không hợp lệ"):
+        symbolic_for(net, backend).encode_relations("saturation")
+
+
+def test_array_backend_gc_and_bounded_cache(symbolic_for):
+    backend = ArrayBackend(cache_size=64, gc_threshold=256)
+    count, _, _ = symbolic_for(philosophers(5), backend).compute_reachable(return_formula=False)
+    stats = backend.stats()
+
+    assert count == 82
+    assert stats["gc_runs"] > 0 and stats["gc_freed"] > 0
+    assert stats["cache_slots"] == 64 and stats["cache_evictions"] > 0
+
+
+def test_array_backend_gc_keeps_live_results():
+    backend = ArrayBackend(gc_threshold=10 ** 9)  # chỉ thu hồi khi gọi collect()
+    variables = [backend.var(f"v{i}") for i in range(8)]
+    parity = backend.false()
+    for v in variables:
+        parity = parity ^ v
+    scratch = [u & ~w for u in variables for w in variables]
+    live = backend.stats()["live_nodes"]
+
+    del scratch
+    freed = backend.collect()
+    stats = backend.stats()
+    assert freed > 0 and stats["live_nodes"] == live - freed and stats["free_slots"] == freed
+    assert backend.count(parity, variables) == 2 ** 7
+
+    # node giải phóng được dùng lại, kết quả dựng lại vẫn chính tắc
+    again = backend.false()
+    for v in reversed(variables):
+        again = v ^ again
+    assert again == parity
+    assert backend.stats()["allocated_nodes"] == stats["allocated_nodes"]
+
+
+def test_array_backend_cache_hits_and_reset_on_gc():
+    backend = ArrayBackend()
+    x, y, z = (backend.var(name) for name in "xyz")
+    f = (x | y) & z
+    hits = backend.stats()["cache_hits"]
+    assert (x | y) & z == f
+    assert backend.stats()["cache_hits"] > hits
+
+    backend.collect()  # cache có thể trỏ tới node đã giải phóng -> phải bị xóa
+    misses = backend.stats()["cache_misses"]
+    assert (x | y) & z == f
+    assert backend.stats()["cache_misses"] > misses
+
+
+def test_array_backend_operations():
+    backend = make_backend("array")
+    a, c, x, y = (backend.var(name) for name in "acxy")
+    f = (x & ~y) | (a & y)
+
+    assert backend.count(f, [a, c, x, y]) == 8
+    assert backend.count(backend.exists(f, [y]), [a, c, x, y]) == 12
+    assert backend.and_exists(f, y, [y]) == a
+    assert (f ^ f).is_zero() and (f | ~f).is_one()
+
+    renamed = backend.rename(f, {x: c, a: x})
+    assert renamed == (c & ~y) | (x & y)
+    assert [backend.var_name(v) for v in sorted([y, a, x], key=backend.level)] == ["a", "x", "y"]
+
+
+def test_array_backend_node_limit():
+    backend = ArrayBackend(max_nodes=16)
+    variables = [backend.var(f"v{i}") for i in range(10)]
+    with pytest.raises(MemoryError):
+        result = backend.true()
+        for v in variables:
+            result = result ^ v
+
+
+def test_array_backend_node_limit_collects_before_failing():
+    backend = ArrayBackend(gc_threshold=10 ** 6, max_nodes=40)  # không GC theo ngưỡng
+    variables = [backend.var(f"g{i}") for i in range(8)]
+    for i in range(6):
+        garbage = variables[i] ^ variables[i + 1] ^ variables[i + 2]
+    del garbage
+    # parity 8 biến cần 15 node trong, chỉ vừa giới hạn khi rác đã được thu hồi
+    result = backend.true()
+    for v in variables:
+        result = result ^ v
+    assert backend.node_count(result) == 17
+    assert backend.stats()["gc_runs"] > 0
+    assert backend.count(result, variables) == 2 ** 7
+
+
+def test_default_backend_is_pyeda():
+    assert isinstance(make_backend(None), PyEdaBackend)
+    assert make_backend(None).stats()["backend"] == "pyeda"
+    with pytest.raises(ValueError, match="Backend BDD không hợp lệ"):
+        make_backend("cudd")
+
+
+@pytest.mark.parametrize("backend", ["pyeda", "array"])
+@pytest.mark.parametrize("weights", [{}, {"eat0": 5, "fork1": -2}, {p: -1 for p in ("think0", "think1", "think2")}])
+def test_symbolic_optimum_matches_enumeration(backend, weights, symbolic_for):
+    net = philosophers(3)
+    sym = symbolic_for(net, backend)
+    net.build_pre_post()
+    markings = list(net.bfs()[0])
+
+    marking, value, total, _, _ = sym.optimize_symbolic(weights)
+    assert total == len(markings)
+    assert value == max(sum(weights.get(p, 1) * m[p] for p in net.places) for m in markings)
+    assert marking in markings
+    assert sum(weights.get(p, 1) * marking[p] for p in net.places) == value
+
+
+@pytest.mark.parametrize("backend", ["pyeda", "array"])
+def test_symbolic_analysis_rejects_unsafe_nets(backend, symbolic_for):
+    # 2 phần tử trong vòng 3 trạm sức chứa 2: marking ban đầu buf0 = 2
+    with pytest.raises(ValueError, match="1-safe"):
+        symbolic_for(producer_consumer_ring(3), backend).optimize_symbolic({})
+
+    # marking ban đầu 1-safe nhưng hai token cùng tới r0
+    net = token_ring(3, 1)
+    net.places["r1"]["initial"] = 1
+    with pytest.raises(ValueError, match="transition 'move\\d' đặt token thứ hai"):
+        symbolic_for(net, backend).optimize_symbolic({})
+    with pytest.raises(ValueError, match="1-safe"):
+        symbolic_for(net, backend).compute_reachable()
+
+
+@pytest.mark.parametrize("backend", ["pyeda", "array"])
+def test_max_weight_sets_skipped_variables(backend, fresh_name):
+    b = make_backend(backend)
+    prefix = fresh_name("mw")
+    x, y, z = (b.var(f"{prefix}_{name}") for name in "xyz")
+    f = (x & ~z) | (~x & z)
+    value, assignment = b.max_weight(f, {x: -1, y: 3, z: 2})
+    assert value == 5
+    assert assignment == {x: 0, y: 1, z: 1}
+    assert b.max_weight(b.false(), {x: 1}) is None
+
+
+def as_tuples(sym, states, places):
+    return {tuple(m[p] for p in places) for m in sym.iter_markings(states)}
+
+
+@pytest.mark.parametrize("backend", ["pyeda", "array"])
+def test_image_matches_explicit_successors(backend, symbolic_for):
+    net = philosophers(3)
+    net.build_pre_post()
+    places = list(net.places)
+    sym = symbolic_for(net, backend)
+    relation = sym.encode_relations("monolithic")
+    partitions = sym.encode_relations("chaining")
+    assert len(partitions) == len(net.transitions)
+
+    for m in net.bfs()[0]:
+        states = sym.builder.marking(m)
+        curr = list(sym.place_to_curr_var.values())
+        assert sym.backend.and_exists(states, relation, curr) == sym.exists(states & relation, curr)
+        successors = {t: net.fire(m, t) for t in net.transitions if net.enabled(m, t)}
+        expected = {tuple(s[p] for p in places) for s in successors.values()}
+        # R có thêm quan hệ đồng nhất nên ảnh luôn chứa chính m
+        assert as_tuples(sym, sym.image(states, relation), places) == expected | {tuple(m[p] for p in places)}
+
+        per_transition = set()
+        for partition in partitions:
+            per_transition |= as_tuples(sym, sym.partition_image(states, partition), places)
+        assert per_transition == expected
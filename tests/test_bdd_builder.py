@@ -0,0 +1,82 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bdd_backend import make_backend  # noqa: E402
+from bdd_builder import BddBuilder  # noqa: E402
+
+PLACES = ["a", "b", "c", "d"]
+
+
+@pytest.fixture
+def builder_for(fresh_name):
+    def make(backend):
+        b = make_backend(backend)
+        prefix = fresh_name("bb")
+        x = {p: b.var(f"{prefix}_{p}") for p in PLACES}
+        x_prime = {p: b.var(f"{prefix}_{p}_prime") for p in PLACES}
+        return BddBuilder(b, x, x_prime)
+    return make
+
+
+def models(builder, f):
+    """Các phép gán thỏa f trên mọi biến x, x' dạng tập (place, primed) đúng."""
+    variables = [(p, False, v) for p, v in builder.curr_vars.items()]
+    variables += [(p, True, v) for p, v in builder.next_vars.items()]
+    result = set()
+    for point in builder.backend.satisfy_all(f):
+        free = [(p, primed) for p, primed, v in variables if v not in point]
+        fixed = frozenset((p, primed) for p, primed, v in variables if point.get(v))
+        for mask in range(2 ** len(free)):
+            result.add(fixed | {free[i] for i in range(len(free)) if mask >> i & 1})
+    return result
+
+
+@pytest.mark.parametrize("backend", ["pyeda", "array"])
+def test_cubes_and_marking(backend, builder_for):
+    bb = builder_for(backend)
+    everything = list(bb.curr_vars.values()) + list(bb.next_vars.values())
+    count = bb.backend.count
+
+    assert count(bb.positive_cube({"a", "b"}), everything) == 2 ** 6
+    assert count(bb.negative_cube({"a"}, primed=True), everything) == 2 ** 7
+    assert count(bb.frame({"a", "b", "c"}), everything) == 2 ** 5
+    assert bb.conjoin([]).is_one() and bb.disjoin([]).is_zero()
+    assert bb.disjoin([bb.curr_vars[p] for p in PLACES]) == ~bb.negative_cube(PLACES)
+
+    marked = models(bb, bb.marking({"a": 1, "c": 2}))
+    assert len(marked) == 2 ** 4  # x' tùy ý
+    assert all({p for p, primed in s if not primed} == {"a", "c"} for s in marked)
+
+
+@pytest.mark.parametrize("backend", ["pyeda", "array"])
+def test_cubes_are_cached(backend, builder_for):
+    bb = builder_for(backend)
+    assert bb.positive_cube(["a", "b"]) is bb.positive_cube({"b", "a"})
+    assert bb.positive_cube({"a"}) is not bb.positive_cube({"a"}, primed=True)
+    assert bb.frame(["c", "d"]) is bb.frame(("d", "c"))
+    assert bb.same("a") is bb.same("a")
+
+
+@pytest.mark.parametrize("backend", ["pyeda", "array"])
+def test_transition_relation(backend, builder_for):
+    bb = builder_for(backend)
+    # t: a, b -> b, c; d không đổi
+    relation = bb.transition({"a", "b"}, {"b", "c"}, {"d"})
+    expected = set()
+    for d in (0, 1):
+        state = {("a", False), ("b", False), ("b", True), ("c", True)}
+        for c in (0, 1):
+            s = set(state) | ({("c", False)} if c else set())
+            if d:
+                s |= {("d", False), ("d", True)}
+            expected.add(frozenset(s))
+    assert models(bb, relation) == expected
+
+    # không có frame: các place ngoài support tùy ý
+    assert bb.backend.count(relation, list(bb.curr_vars.values()) + list(bb.next_vars.values())) == 4
+    partial = bb.transition({"a"}, {"c"})
+    assert bb.backend.count(partial, list(bb.curr_vars.values()) + list(bb.next_vars.values())) == 2 ** 5
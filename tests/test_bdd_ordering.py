@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bdd_ordering import (ORDERINGS, cluster_order, compare_orderings, force_order, load_order,  # noqa: E402
+                          order_span, save_order, transition_supports)
+from net_generators import fork_join, philosophers, token_ring  # noqa: E402
+from reachability_explicit import ReachabilityNet  # noqa: E402
+from tests.test_explicit_engines import EXAMPLES  # noqa: E402
+from tests.test_net_ir import broken_net  # noqa: E402
+
+NETS = [pytest.param(philosophers(4), id="phil4"), pytest.param(token_ring(6), id="ring6"),
+        pytest.param(fork_join(3, 2), id="fork3x2")]
+
+
+@pytest.mark.parametrize("net", NETS)
+@pytest.mark.parametrize("name", sorted(ORDERINGS))
+def test_orderings_are_permutations(net, name):
+    order = ORDERINGS[name](net)
+    assert sorted(order) == sorted(net.places)
+
+
+def test_cluster_keeps_transition_supports_together():
+    net = philosophers(4)
+    order = cluster_order(net)
+    assert net.places[order[0]]['initial'] == 1
+    assert order_span(net, order) < order_span(net, sorted(net.places))
+    # các place của take_left0 (think0, fork0, left0) đứng liền nhau
+    pos = sorted(order.index(p) for p in transition_supports(net)["take_left0"])
+    assert pos[-1] - pos[0] == len(pos) - 1
+
+
+@pytest.mark.parametrize("net", NETS)
+def test_force_never_worse_than_its_start(net):
+    for start in (sorted(net.places), cluster_order(net)):
+        assert order_span(net, force_order(net, initial=start)) <= order_span(net, start)
+
+
+def test_compare_orderings_applies_each_order():
+    net = philosophers(3)
+    net.build_pre_post()
+    results = compare_orderings(net)
+    assert set(results) == set(ORDERINGS)
+    for name, res in results.items():
+        assert res['order'] == ORDERINGS[name](net)
+        assert res['states'] == len(net.bfs()[0])
+        assert res['nodes']['reachable'] > 0
+    assert results['force']['nodes']['reachable'] <= results['alphabetical']['nodes']['reachable']
+
+    with pytest.raises(ValueError, match="không hợp lệ cho phân tích symbolic"):
+        compare_orderings(broken_net(), ["cluster"])
+
+
+def test_export_order(tmp_path):
+    path = str(tmp_path / "order.json")
+    save_order(cluster_order(token_ring(4)), path)
+    assert load_order(path) == ["r0", "r1", "r3", "r2"]
+
+    script = os.path.join(os.path.dirname(__file__), "..", "src", "bdd_ordering.py")
+    pnml = os.path.join(EXAMPLES, "simple_example.pnml")
+    subprocess.run([sys.executable, script, pnml, "--export", f"force={path}"], check=True, capture_output=True)
+    with open(path, encoding="utf-8") as f:
+        exported = json.load(f)
+    net = ReachabilityNet()
+    net.parse_pnml(pnml)
+    assert exported == force_order(net)
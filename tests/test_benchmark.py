@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import benchmark  # noqa: E402
+from benchmark import compare, load_results, measure, run_suite, save_results  # noqa: E402
+from net_generators import generate  # noqa: E402
+from tests.test_explicit_engines import reference  # noqa: E402
+
+
+@pytest.mark.parametrize("family, size, states", [
+    ("philosophers", 2, 6),
+    ("token_ring", 5, 5),
+    ("producer_consumer", 3, 6),
+    ("fork_join", 3, 9),
+])
+def test_generators(family, size, states):
+    net = generate(family, size)
+    assert net.check_consistency()
+    assert len(reference(net)) == states
+
+
+def test_unknown_family():
+    with pytest.raises(ValueError, match="không tồn tại"):
+        generate("nope", 3)
+
+
+def test_suite_records_and_stops_scaling():
+    data = run_suite(["fork_join"], {"fork_join": [2, 3]}, ["explicit", "deadlock:symbolic"],
+                     bdd_backend="array", isolate=False)
+    explicit = [r for r in data["results"] if r["engine"] == "explicit"]
+    assert [(r["size"], r["status"], r["states"]) for r in explicit] == [(2, "ok", 5), (3, "ok", 9)]
+    assert all(r["seconds"] >= 0 and r["peak_mb"] > 0 for r in explicit)
+    deadlock = next(r for r in data["results"] if r["engine"] == "deadlock:symbolic")
+    assert deadlock["detail"]["deadlock"] is False
+
+    data = run_suite(["philosophers"], {"philosophers": [2, 3, 4]}, ["explicit"],
+                     isolate=False, max_seconds=0)
+    assert [r["status"] for r in data["results"]] == ["ok", "skipped", "skipped"]
+
+    data = run_suite(["token_ring"], {"token_ring": [3, 4]}, ["nope"], isolate=False)
+    assert [r["status"] for r in data["results"]] == ["error", "skipped"]
+
+
+def test_symbolic_engines_skip_unsafe_families():
+    data = run_suite(["producer_consumer"], {"producer_consumer": [2, 3]},
+                     ["symbolic", "deadlock:state_equation"], isolate=False)
+    symbolic = [r["status"] for r in data["results"] if r["engine"] == "symbolic"]
+    assert symbolic == ["unsupported", "unsupported"]
+    assert [r["status"] for r in data["results"] if r["engine"] == "deadlock:state_equation"] == ["ok", "ok"]
+
+
+def test_bad_size_is_an_error_record():
+    record = measure("philosophers", -1, "explicit", isolate=False)
+    assert record["status"] == "error" and record["places"] is None
+    assert "không hợp lệ" in record["detail"]["error"]
+    record = measure("nope", 3, "explicit", isolate=False)
+    assert record["status"] == "error" and "không tồn tại" in record["detail"]["error"]
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="cần fork để thay _measure trong con")
+def test_dead_child_is_reported(monkeypatch):
+    monkeypatch.setattr(benchmark, "_measure", lambda *args: os._exit(3))
+    record = measure("token_ring", 4, "explicit", isolate=True)
+    assert record["status"] == "crashed" and record["detail"] == {"exitcode": 3}
+
+
+def test_isolated_measure():
+    record = measure("token_ring", 4, "explicit", isolate=True, timeout=120)
+    assert record["status"] == "ok" and record["states"] == 4
+
+
+def test_compare_against_baseline(tmp_path):
+    baseline = run_suite(["token_ring"], {"token_ring": [3]}, ["explicit"], isolate=False)
+    path = str(tmp_path / "baseline.json")
+    save_results(baseline, path)
+    baseline = load_results(path)
+    assert compare(baseline, baseline) == []
+
+    current = {"results": [dict(r) for r in baseline["results"]]}
+    current["results"][0].update(seconds=baseline["results"][0]["seconds"] + 1.0, states=7)
+    messages = compare(current, baseline)
+    assert len(messages) == 2 and "states 7" in messages[0] and "seconds" in messages[1]
+
+    current["results"][0]["status"] = "timeout"
+    assert compare(current, baseline)[0].endswith(f"(baseline ok in {baseline['results'][0]['seconds']:.3f}s)")
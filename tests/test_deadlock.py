@@ -0,0 +1,165 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import metrics  # noqa: E402
+from ilp_deadlock import DeadlockDetector, StateEquationDeadlockDetector  # noqa: E402
+from ilp_session import IlpSession  # noqa: E402
+from reachability_explicit import ReachabilityNet  # noqa: E402
+from net_generators import philosophers  # noqa: E402
+
+def explicit_deadlocks(net):
+    net.build_pre_post()
+    places = list(net.places)
+    return {tuple(m[p] for p in places) for m in net.bfs()[0]
+            if not any(net.enabled(m, t) for t in net.transitions)}
+
+
+@pytest.fixture
+def detector(symbolic_for):
+    return lambda net, backend="array": DeadlockDetector(net, symbolic_for(net, backend))
+
+
+@pytest.mark.parametrize("backend", ["pyeda", "array"])
+@pytest.mark.parametrize("n", [2, 3, 4])
+def test_symbolic_finds_all_deadlocks(n, backend, detector):
+    net = philosophers(n)
+    expected = explicit_deadlocks(net)
+    places = list(net.places)
+
+    count, samples, _, _ = detector(net, backend).detect_all_deadlocks(max_samples=None)
+    assert count == len(expected)
+    assert {tuple(m[p] for p in places) for m in samples} == expected
+
+
+def test_symbolic_mode_without_deadlock(detector):
+    net = philosophers(3)
+    net.transitions["reset"] = "reset"
+    net.arcs += [("left0", "reset"), ("reset", "think0"), ("reset", "fork0")]
+    assert not explicit_deadlocks(net)
+
+    marking, _, message = detector(net).detect_deadlock(method="symbolic")
+    assert marking is None
+    assert message == "No reachable deadlock"
+
+
+@pytest.mark.parametrize("n", [2, 3, 4])
+def test_state_equation_finds_realizable_deadlock(n):
+    net = philosophers(n)
+    expected = explicit_deadlocks(net)
+    places = list(net.places)
+
+    se = StateEquationDeadlockDetector(net)
+    marking, _, message = se.detect_deadlock()
+    assert message.startswith("Deadlock FOUND")
+    assert tuple(marking[p] for p in places) in expected
+
+    m = net.get_initial_marking()
+    for t in se.trace:
+        assert net.enabled(m, t)
+        m = net.fire(m, t)
+    assert m == marking
+
+
+def test_state_equation_trap_cut_rules_out_deadlock():
+    # trap {a, b} được đánh dấu ban đầu nên không thể rỗng, nhưng phương trình
+    # trạng thái vẫn nhận nghiệm giả M = 0 (merge bắn 2 lần)
+    net = ReachabilityNet()
+    net.places["a"] = {"name": "a", "initial": 1}
+    net.places["b"] = {"name": "b", "initial": 1}
+    for t, pre, post in (("merge", ["a", "b"], ["a"]), ("ab", ["a"], ["b"]),
+                         ("ba", ["b"], ["a"])):
+        net.transitions[t] = t
+        net.arcs += [(p, t) for p in pre] + [(t, p) for p in post]
+    assert not explicit_deadlocks(net)
+
+    se = StateEquationDeadlockDetector(net)
+    marking, _, message = se.detect_deadlock()
+    assert marking is None
+    assert se.cuts == [{"a", "b"}]
+    assert se.bounded and se.token_bound == 2
+    assert message == "No deadlock (state equation + 1 trap cut(s))"
+
+
+def test_state_equation_unrealizable_solution_is_not_a_deadlock(monkeypatch):
+    monkeypatch.setattr(StateEquationDeadlockDetector, "realize", lambda self, counts: None)
+    se = StateEquationDeadlockDetector(philosophers(2))
+    marking, _, message = se.detect_deadlock()
+    assert marking is None
+    assert message.startswith("Inconclusive")
+    # mỗi nghiệm bị loại bằng nogood rồi giải tiếp, không dừng ở nghiệm đầu tiên
+    assert len(se.candidates) == len(explicit_deadlocks(philosophers(2)))
+    assert len({tuple(sorted(c.items())) for c in se.candidates}) == len(se.candidates)
+
+
+def test_state_equation_keeps_searching_after_unrealizable_solution(monkeypatch):
+    original = StateEquationDeadlockDetector.realize
+    attempts = []
+
+    def first_fails(self, counts):
+        attempts.append(counts)
+        return None if len(attempts) == 1 else original(self, counts)
+
+    monkeypatch.setattr(StateEquationDeadlockDetector, "realize", first_fails)
+    # lựa chọn tự do: hai deadlock {left} và {right}
+    net = ReachabilityNet()
+    for p, initial in (("start", 1), ("left", 0), ("right", 0)):
+        net.places[p] = {"name": p, "initial": initial}
+    for t in ("go_left", "go_right"):
+        net.transitions[t] = t
+        net.arcs += [("start", t), (t, t[3:])]
+    se = StateEquationDeadlockDetector(net)
+    marking, _, message = se.detect_deadlock()
+    assert message.startswith("Deadlock FOUND")
+    assert len(se.candidates) == 1 and se.candidates[0] != marking
+    assert tuple(marking[p] for p in net.places) in explicit_deadlocks(net)
+
+
+def test_state_equation_unbounded_net_is_inconclusive():
+    # grow luôn enabled và bơm token vào b không giới hạn: không có deadlock, nhưng
+    # ILP chỉ xét được các marking có mỗi place <= cận big-M
+    net = ReachabilityNet()
+    net.places["a"] = {"name": "a", "initial": 1}
+    net.places["b"] = {"name": "b", "initial": 0}
+    net.transitions["grow"] = "grow"
+    net.arcs += [("a", "grow"), ("grow", "a"), ("grow", "b")]
+
+    se = StateEquationDeadlockDetector(net)
+    assert se.structural_bound() is None and not se.bounded
+    marking, _, message = se.detect_deadlock()
+    assert marking is None
+    assert message == (f"Inconclusive: no deadlock with at most {se.token_bound} tokens per place "
+                       "(net not structurally bounded)")
+
+
+@pytest.mark.parametrize("status", ["Not Solved", "Undefined", "Unbounded"])
+def test_state_equation_only_infeasible_proves_no_deadlock(monkeypatch, status):
+    monkeypatch.setattr(IlpSession, "solve", lambda self: status)
+    marking, _, message = StateEquationDeadlockDetector(philosophers(2)).detect_deadlock()
+    assert marking is None
+    assert message == f"Inconclusive: ILP solver status '{status}'"
+
+
+def test_state_equation_method_on_live_net(detector):
+    net = philosophers(3)
+    net.transitions["reset"] = "reset"
+    net.arcs += [("left0", "reset"), ("reset", "think0"), ("reset", "fork0")]
+
+    marking, _, message = detector(net).detect_deadlock(method="state_equation")
+    assert marking is None
+    assert message.startswith("No deadlock")
+
+
+def test_ilp_loop_finds_reachable_deadlock(detector):
+    net = philosophers(2)
+    places = list(net.places)
+
+    with metrics.recording(trace_memory=False) as recorded:
+        marking, _, message = detector(net).detect_deadlock(max_attempts=200)
+    assert message == "Deadlock FOUND"
+    assert tuple(marking[p] for p in places) in explicit_deadlocks(net)
+    # mỗi ứng viên được kiểm tra trước lần giải sau: không có lần giải thừa
+    assert recorded.counters["ilp_solves"] == recorded.counters["ilp_rounds"]
@@ -0,0 +1,190 @@
+import gc
+import glob
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from net_generators import _place, _transition, philosophers, random_net, token_ring  # noqa: E402
+from reachability_explicit import ReachabilityNet  # noqa: E402
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+def example_nets():
+    nets = []
+    for path in sorted(glob.glob(os.path.join(EXAMPLES, "*.pnml"))):
+        net = ReachabilityNet()
+        if net.parse_pnml(path) and net.check_consistency():
+            nets.append(pytest.param(net, id=os.path.basename(path)))
+    return nets
+
+
+def weighted_net():
+    """pair lấy 2 token của a, đặt 1 vào b; split trả lại 2 token cho a."""
+    net = ReachabilityNet()
+    net.places = {"a": {"name": "a", "initial": 2}, "b": {"name": "b", "initial": 0}}
+    net.transitions = {"pair": "pair", "split": "split"}
+    net.arcs = [("a", "pair"), ("pair", "b"), ("b", "split"), ("split", "a")]
+    net.arc_weights = {("a", "pair"): 2, ("split", "a"): 2}
+    return net
+
+
+NETS = example_nets() + [
+    pytest.param(philosophers(3), id="phil3"),
+    pytest.param(philosophers(4), id="phil4"),
+    pytest.param(token_ring(4, 3), id="ring4x3"),
+    pytest.param(weighted_net(), id="weighted"),
+] + [pytest.param(random_net(seed), id=f"random{seed}") for seed in range(5)]
+
+
+def as_set(markings, places):
+    return {tuple(m[p] for p in places) for m in markings}
+
+
+def reference(net):
+    net.build_pre_post()
+    reachable, _, _ = net.bfs()
+    return as_set(reachable, list(net.places))
+
+
+@pytest.mark.parametrize("net", NETS)
+def test_vectorized_matches_bfs(net):
+    expected = reference(net)
+    reachable, _, _ = net.bfs_vectorized(chunk_size=3)
+    assert as_set(reachable, list(net.places)) == expected
+    assert len(reachable) == len(expected)
+
+
+@pytest.mark.parametrize("net", NETS)
+def test_parallel_matches_bfs(net):
+    expected = reference(net)
+    reachable, _, _ = net.bfs_parallel(workers=2, batch_size=2)
+    assert as_set(reachable, list(net.places)) == expected
+
+
+def test_parallel_with_more_workers_than_states():
+    net = token_ring(3)
+    net.build_pre_post()
+    reachable, _, _ = net.bfs_parallel(workers=6, batch_size=1)
+    assert as_set(reachable, list(net.places)) == reference(net)
+
+    empty = ReachabilityNet()
+    assert list(empty.bfs_parallel(workers=2)[0]) == [{}]
+
+
+@pytest.mark.parametrize("net", NETS)
+def test_external_matches_bfs(net, tmp_path):
+    expected = reference(net)
+    reachable, _, _ = net.bfs_external(workdir=str(tmp_path), chunk_size=2, max_runs=2)
+    with reachable:
+        assert as_set(reachable, list(net.places)) == expected
+        assert len(reachable) == len(expected)
+    assert not os.listdir(tmp_path)
+
+
+def test_external_cleans_up(tmp_path, monkeypatch):
+    empty = ReachabilityNet()
+    reachable, _, _ = empty.bfs_external(workdir=str(tmp_path))
+    with reachable:
+        assert len(reachable) == 1 and list(reachable) == [{}]
+    assert not os.listdir(tmp_path)
+
+    def fail(self, visited, chunk_size):
+        visited.add_run(visited.filter_new(np.zeros((1, len(self.place_order)), dtype=np.int64)))
+        raise KeyboardInterrupt
+
+    net = token_ring(4)
+    monkeypatch.setattr(ReachabilityNet, "_explore_external", fail)
+    with pytest.raises(KeyboardInterrupt):
+        net.bfs_external(workdir=str(tmp_path))
+    assert not os.listdir(tmp_path)
+
+
+def test_external_spill_dir_removed_without_close():
+    net = token_ring(4, 2)
+    reachable, _, _ = net.bfs_external(chunk_size=2, max_runs=2)
+    spill = reachable.workdir
+    assert len(reachable) == len(reference(net)) and os.listdir(spill)
+    del reachable
+    gc.collect()
+    assert not os.path.exists(spill)
+
+
+@pytest.mark.parametrize("net", NETS)
+def test_reduced_keeps_all_deadlocks(net):
+    expected = reference(net)
+    places = list(net.places)
+    deadlocks = {m for m in expected
+                 if not any(net.enabled(dict(zip(places, m)), t) for t in net.transitions)}
+
+    visited, found, _, _ = net.bfs_reduced()
+    assert as_set(found, places) == deadlocks
+    assert as_set(visited, places) <= expected
+
+
+def independent_chains(n):
+    """n thành phần độc lập a_i -> b_i: 2^n marking, deadlock duy nhất là mọi b_i."""
+    net = ReachabilityNet()
+    for i in range(n):
+        _place(net, f"a{i}", 1)
+        _place(net, f"b{i}")
+        _transition(net, f"t{i}", [f"a{i}"], [f"b{i}"])
+    return net
+
+
+def test_reduced_prunes_interleavings():
+    net = independent_chains(8)
+    assert len(reference(net)) == 2 ** 8
+    visited, found, _, _ = net.bfs_reduced()
+    assert len(visited) == 9  # một thứ tự bắn duy nhất
+    assert found == [{**{f"a{i}": 0 for i in range(8)}, **{f"b{i}": 1 for i in range(8)}}]
+
+
+@pytest.mark.parametrize("seed", range(5, 40))
+def test_reduced_deadlocks_on_random_nets(seed):
+    net = random_net(seed, n_places=7, n_transitions=8)
+    places = list(net.places)
+    expected = {m for m in reference(net)
+                if not any(net.enabled(dict(zip(places, m)), t) for t in net.transitions)}
+    _, found, _, _ = net.bfs_reduced()
+    assert as_set(found, places) == expected
+
+    _, first, _, _ = net.bfs_reduced(stop_at_first_deadlock=True)
+    assert len(first) == min(1, len(expected)) and as_set(first, places) <= expected
+
+
+@pytest.mark.parametrize("net", NETS)
+def test_stream_matches_bfs_with_valid_edges(net):
+    net.build_pre_post()
+    places = list(net.places)
+    expected = [tuple(m[p] for p in places) for m in net.bfs()[0]]
+
+    assert list(net.iter_reachable(form="tuple")) == expected
+    seen = set()
+    for parent, t, m in net.iter_reachable(edges=True):
+        if parent is None:
+            assert t is None
+        else:
+            assert tuple(parent[p] for p in places) in seen
+            assert net.enabled(parent, t) and net.fire(parent, t) == m
+        seen.add(tuple(m[p] for p in places))
+    assert len(seen) == len(expected)
+
+
+def test_stream_stops_early():
+    net = token_ring(6, 1)
+    net.build_pre_post()
+    stream = net.iter_reachable(form="array")
+    first = next(stream)
+    assert first.tolist() == [1, 0, 0, 0, 0, 0]
+    stream.close()
+
+    hit = net.find_marking(lambda m: m["r2"] == 1)
+    assert hit["r2"] == 1
+    assert net.find_marking(lambda m: sum(m.values()) == 2) is None
+    with pytest.raises(ValueError):
+        next(net.iter_reachable(form="list"))
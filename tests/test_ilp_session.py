@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pulp import LpBinary, LpVariable, lpSum  # noqa: E402
+
+from ilp_session import IlpSession  # noqa: E402
+
+
+@pytest.fixture
+def at_most_one_of(fresh_name):
+    def make(n):
+        name = fresh_name("pick")
+        session = IlpSession(name)
+        xs = {i: LpVariable(f"{name}_x{i}", cat=LpBinary) for i in range(n)}
+        session.add(lpSum(xs.values()) == 1, "exactly_one")
+        session.set_objective(0)
+        return session, xs
+    return make
+
+
+def test_solutions_are_distinct_and_lazy(at_most_one_of):
+    session, xs = at_most_one_of(5)
+    solutions = session.iter_solutions(xs, 3)
+    first = next(solutions)
+    assert session.solve_count == 1 and session.cut_count == 0  # chưa giải trước khi được xin
+    rest = list(solutions)
+    assert len(rest) == 2 and session.solve_count == 3
+    assert len({tuple(s.values()) for s in [first] + rest}) == 3
+    assert all(sum(s.values()) == 1 for s in [first] + rest)
+
+
+def test_solutions_stop_when_model_runs_out(at_most_one_of):
+    session, xs = at_most_one_of(4)
+    seen = [tuple(s.values()) for s in session.iter_solutions(xs)]
+    assert len(set(seen)) == 4
+    assert session.cut_count == 4
+    assert session.solve_count == 5  # mỗi nghiệm một lần giải + một lần vô nghiệm
+
+
+def test_incremental_cuts_on_single_solve(at_most_one_of):
+    session, xs = at_most_one_of(3)
+    session.set_objective(lpSum(i * x for i, x in xs.items()))
+    assert session.solve() == "Optimal"
+    assert session.values(xs) == {0: 1, 1: 0, 2: 0}
+    session.add_cut(xs[0] == 0)
+    assert session.solve() == "Optimal"
+    assert session.values(xs) == {0: 0, 1: 1, 2: 0}
+
+
+def test_solutions_keep_one_persistent_model(at_most_one_of):
+    session, xs = at_most_one_of(4)
+    problem = session.problem
+    solutions = list(session.iter_solutions(xs))
+    assert session.problem is problem
+    assert len(problem.constraints) == 1 + 4
+    assert len({tuple(s.values()) for s in solutions}) == 4
+    assert {v.name for v in problem.variables()} - {"__dummy"} == {v.name for v in xs.values()}
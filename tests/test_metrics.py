@@ -0,0 +1,115 @@
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import metrics  # noqa: E402
+from net_generators import philosophers, token_ring  # noqa: E402
+
+
+def test_disabled_outside_recording():
+    assert metrics.active() is None
+    with metrics.phase("nothing"):
+        metrics.count("x")
+        metrics.observe("y", 1)
+    net = token_ring(3, 1)
+    net.build_pre_post()
+    markings, _, _ = net.bfs()
+    assert len(markings) == 3
+
+
+def test_nested_phase_peaks():
+    with metrics.recording() as recorded:
+        with metrics.phase("outer"):
+            big = bytearray(4 * 1024 * 1024)
+            del big
+            with metrics.phase("inner"):
+                small = bytearray(1024 * 1024)
+                del small
+    assert metrics.active() is None
+    outer, inner = recorded.phases["outer"], recorded.phases["inner"]
+    assert outer['calls'] == inner['calls'] == 1
+    assert outer['seconds'] >= inner['seconds']
+    assert 0.9 < inner['peak_mb'] < 2
+    assert outer['peak_mb'] >= 3.9   # đỉnh trước khi phase trong reset_peak() vẫn được giữ
+
+
+def test_measure_does_not_record_a_phase():
+    with metrics.recording() as recorded:
+        with metrics.phase("outer") as outer:
+            with metrics.measure() as usage:
+                big = bytearray(2 * 1024 * 1024)
+                del big
+    assert list(recorded.phases) == ["outer"]
+    assert 1.9 < usage['peak_mb'] <= outer['peak_mb'] == recorded.phases["outer"]['peak_mb']
+
+
+def test_untraced_measure_falls_back_to_peak_rss():
+    # tiến trình mới để đỉnh RSS cũ không che khối cần đo
+    code = ("import metrics\n"
+            "with metrics.measure() as usage:\n"
+            "    big = b'x' * (128 * 1024 * 1024)\n"
+            "print(usage['peak_mb'])")
+    src = os.path.join(os.path.dirname(__file__), "..", "src")
+    out = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True)
+    assert float(out.stdout) > 32  # đỉnh cũ (lúc import) che một phần khối 128 MB
+
+
+def test_engine_memory_is_the_traced_peak(session_for):
+    net = philosophers(3)
+    net.build_pre_post()
+    assert net.bfs()[2] >= 0.0  # ngoài recording(): phần tăng của đỉnh RSS
+
+    sym = session_for(philosophers(3)).symbolic_net()
+    with metrics.recording() as recorded:
+        _, _, bfs_mb = net.bfs()
+        _, _, fixpoint_mb = sym.compute_reachable(return_formula=False)
+    assert 0 < bfs_mb <= recorded.phases["bfs"]['peak_mb']
+    assert fixpoint_mb >= recorded.phases["fixpoint"]['peak_mb'] > 0
+
+
+def test_engines_report_phases_and_counters(session_for):
+    session = session_for(philosophers(2))
+    with metrics.recording() as recorded:
+        markings, _, _ = session.explicit()
+        count, _, _, formulas = session.symbolic()
+        session.detect_deadlock("state_equation")
+
+    assert {"bfs", "encode", "fixpoint", "ilp_solve", "deadlock"} <= set(recorded.phases)
+    assert recorded.counters["bfs_states"] == len(markings)
+    # frontier mỗi level + marking ban đầu = tổng số marking
+    assert 1 + sum(recorded.series["bfs_frontier"]) == len(markings)
+    assert len(recorded.series["bdd_nodes"]) == formulas['iterations']
+    assert recorded.counters["fixpoint_iterations"] == formulas['iterations']
+    assert recorded.counters["ilp_rounds"] >= 1 and recorded.counters["ilp_solves"] >= 1
+
+
+def test_exports(tmp_path):
+    with metrics.recording(trace_memory=False) as recorded:
+        with metrics.phase("parse"):
+            metrics.count("ilp_rounds", 3)
+            metrics.gauge("bfs_states_per_second", 12.5)
+            metrics.observe("bfs_frontier", 2)
+            metrics.observe("bfs_frontier", 5)
+
+    text = recorded.to_prometheus({'net': 'a "b".pnml'})
+    assert '# TYPE petri_ilp_rounds_total counter' in text
+    assert 'petri_ilp_rounds_total{net="a \\"b\\".pnml"} 3' in text
+    assert 'petri_bfs_frontier_max{net="a \\"b\\".pnml"} 5' in text
+    assert 'petri_phase_calls_total{net="a \\"b\\".pnml",phase="parse"} 1' in text
+
+    path = str(tmp_path / "m.json")
+    metrics.save(path, [({'net': 'x'}, recorded), ({'net': 'y'}, recorded)])
+    with open(path) as f:
+        data = json.load(f)
+    assert [d['labels']['net'] for d in data] == ['x', 'y']
+    assert data[0]['series']['bfs_frontier'] == [2, 5]
+
+    path = str(tmp_path / "m.prom")
+    metrics.save(path, [({'net': 'x'}, recorded), ({'net': 'y'}, recorded)])
+    with open(path) as f:
+        text = f.read()
+    assert text.count('# TYPE petri_ilp_rounds_total counter') == 1
+    assert 'petri_ilp_rounds_total{net="y"} 3' in text
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from analysis_session import AnalysisSession  # noqa: E402
+from net_binary import map_arrays  # noqa: E402
+from reachability_explicit import ReachabilityNet  # noqa: E402
+from net_generators import philosophers  # noqa: E402
+from tests.test_explicit_engines import example_nets, reference  # noqa: E402
+from tests.test_net_ir import broken_net  # noqa: E402
+
+
+def same_structure(a, b):
+    assert a.places == b.places
+    assert a.transitions == b.transitions
+    assert a.arcs == b.arcs
+    assert a.arc_weights == b.arc_weights
+
+
+@pytest.mark.parametrize("net", example_nets() + [philosophers(3)])
+def test_round_trip(net, tmp_path):
+    path = str(tmp_path / "net.pnb")
+    net.save_binary(path)
+    loaded = ReachabilityNet.load_binary(path)
+    same_structure(loaded, net)
+    ir, expected = loaded.compile(), net.compile()
+    assert ir.pre_dicts() == expected.pre_dicts() and ir.post_dicts() == expected.post_dicts()
+    assert reference(loaded) == reference(net)
+
+
+def test_compiled_arrays_are_mapped_without_copy(tmp_path):
+    net = philosophers(2)
+    net.arc_weights = {net.arcs[0]: 4}
+    path = str(tmp_path / "net.pnb")
+    net.save_binary(path)
+    loaded = ReachabilityNet.load_binary(path)
+    assert loaded.arc_weights == {net.arcs[0]: 4}
+
+    ir = loaded.compile()
+    assert loaded._compiled[1] is ir  # lấy từ file, không dựng lại
+    assert ir.pre_idx.base is not None and not ir.pre_idx.flags.writeable
+    pre, post, incidence = ir.matrices()
+    assert np.array_equal(incidence, net.compile().matrices()[2])
+
+
+def test_broken_net_is_compiled_on_load(tmp_path):
+    net = broken_net()
+    net.transitions = {"t": "t", "u": "u"}
+    path = str(tmp_path / "broken.pnb")
+    net.save_binary(path)
+    header, arrays = map_arrays(path)
+    assert header['flags'] == 0 and header['n_nodes'] == 5
+    loaded = type(net).load_binary(path)
+    same_structure(loaded, net)
+    assert loaded._compiled is None
+    assert sorted(loaded.compile().invalid_arcs) == sorted(net.compile().invalid_arcs)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "bad.pnb"
+    path.write_bytes(b"<pnml>" + b"\0" * 400)
+    with pytest.raises(ValueError, match="không phải"):
+        ReachabilityNet.load_binary(str(path))
+    assert AnalysisSession.from_pnml(str(path)) is None
+
+
+def test_session_loads_binary(tmp_path):
+    net = philosophers(2)
+    path = str(tmp_path / "phil.pnb")
+    net.save_binary(path)
+    session = AnalysisSession.from_pnml(path)
+    markings, _, _ = session.explicit()
+    assert len(markings) == len(reference(net))
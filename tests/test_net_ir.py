@@ -0,0 +1,128 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from reachability_bdd import SymbolicReachabilityPyEDA  # noqa: E402
+from bdd_ordering import transition_supports  # noqa: E402
+from net_generators import philosophers, random_net  # noqa: E402
+from tests.test_explicit_engines import example_nets, reference, weighted_net  # noqa: E402
+
+
+def legacy_pre_post(net):
+    """build_pre_post() trước khi có CompiledNet."""
+    pre = {t: {} for t in net.transitions}
+    post = {t: {} for t in net.transitions}
+    for src, tgt in net.arcs:
+        if src in net.places and tgt in net.transitions:
+            pre[tgt][src] = 1
+        elif src in net.transitions and tgt in net.places:
+            post[src][tgt] = 1
+    return pre, post
+
+
+def broken_net():
+    net = SymbolicReachabilityPyEDA()
+    net.places = {"p": {"name": "p", "initial": 1}, "q": {"name": "q", "initial": 0}}
+    net.transitions = {"t": {"name": "t"}, "u": {"name": "u"}}
+    net.arcs = [("p", "t"), ("t", "q"), ("p", "t"), ("ghost", "u"), ("u", "t"), ("p", "q"), ("p", "q")]
+    return net
+
+
+@pytest.mark.parametrize("net", example_nets() + [philosophers(3), random_net(7)])
+def test_matches_legacy_pre_post(net):
+    ir = net.compile()
+    pre, post = legacy_pre_post(net)
+    assert ir.pre_dicts() == pre
+    assert ir.post_dicts() == post
+    for j, p in enumerate(ir.place_ids):
+        assert {ir.transition_ids[i] for i in ir.consumers(j)} == {t for t in pre if p in pre[t]}
+        assert {ir.transition_ids[i] for i in ir.producers(j)} == {t for t in post if p in post[t]}
+    assert list(ir.initial) == [net.places[p]['initial'] for p in ir.place_ids]
+
+
+def test_matrices_are_shared_and_read_only():
+    net = philosophers(2)
+    net.build_pre_post()
+    net.compile_matrices()
+    pre, post, incidence = net.compile().matrices()
+    assert net.pre_matrix is pre and net.incidence is incidence
+    assert np.array_equal(incidence, post - pre)
+    with pytest.raises(ValueError):
+        pre[0, 0] = 5
+
+
+def test_compile_is_cached_until_structure_changes():
+    net = philosophers(2)
+    ir = net.compile()
+    assert net.compile() is ir
+    net.places["extra"] = {"name": "extra", "initial": 0}
+    assert net.compile() is not ir
+    ir = net.compile()
+    net.places["extra"]["initial"] = 2
+    assert net.compile() is not ir
+
+
+def test_in_place_arc_edit_recompiles():
+    net = philosophers(2)
+    ir = net.compile()
+    k = net.arcs.index(("think0", "take_left0"))
+    net.arcs[k] = ("think1", "take_left0")  # cùng số arc, arc cuối không đổi
+    pre = net.compile().pre_dicts()["take_left0"]
+    assert "think1" in pre and "think0" not in pre
+    assert "think0" in ir.pre_dicts()["take_left0"]  # bản cũ không bị sửa
+
+    ir = net.compile()
+    net.transitions["take_left0"] = "renamed"  # chỉ đổi tên hiển thị
+    assert net.compile() is ir
+
+
+def test_arc_weights_are_compiled():
+    net = philosophers(2)
+    src, tgt = next(a for a in net.arcs if a[0] in net.places)
+    ir = net.compile()
+    net.arc_weights = {(src, tgt): 3}
+    assert net.compile() is not ir
+    assert net.compile().pre_dicts()[tgt][src] == 3
+    net.build_pre_post()
+    assert net.pre[tgt][src] == 3
+
+    net = weighted_net()
+    assert reference(net) == {(2, 0), (0, 1)}
+    pre, post, incidence = net.compile().matrices()
+    assert incidence.tolist() == [[-2, 1], [2, -1]]
+
+
+def test_bdd_rejects_arc_weights():
+    sym = SymbolicReachabilityPyEDA()
+    net = weighted_net()
+    sym.places, sym.transitions, sym.arcs, sym.arc_weights = net.places, net.transitions, net.arcs, net.arc_weights
+    sym.places["a"]["initial"] = 1
+    with pytest.raises(ValueError, match="trọng số khác 1"):
+        sym.check_safe()
+
+
+def test_invalid_structure_is_reported():
+    net = broken_net()
+    ir = net.compile()
+    t, u = ir.transition_index["t"], ir.transition_index["u"]
+    assert ir.bad_inputs[t] == ("u",) and ir.bad_outputs[u] == ("t",)
+    assert ir.bad_inputs[u] == ("ghost",)
+    assert ir.is_broken(t) and ir.is_broken(u)
+    assert ir.pre(t) == [(ir.place_index["p"], 1)]
+    assert sorted(ir.invalid_arcs) == sorted([
+        "Arc source 'ghost' trỏ đến một node không tồn tại",
+        "Arc nối 2 transition: 'u' -> 't'",
+        "Arc nối 2 place: 'p' -> 'q'",
+    ])
+    assert net.transition_io() == []
+    assert net.check_symbolic_consistency()[0] is False
+
+
+def test_transition_supports_follow_arc_order():
+    net = broken_net()
+    net.arcs = [("t", "q"), ("p", "t"), ("q", "t")]
+    assert transition_supports(net) == {"t": ["q", "p"], "u": []}
@@ -0,0 +1,122 @@
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from analysis_session import AnalysisSession  # noqa: E402
+from main import optimize_from_file  # noqa: E402
+from optimization import OptimizationReachability, load_objectives  # noqa: E402
+from net_generators import philosophers, random_net, token_ring  # noqa: E402
+
+
+def as_optimizer(net):
+    opt = OptimizationReachability()
+    opt.places, opt.transitions, opt.arcs = net.places, net.transitions, net.arcs
+    opt.build_pre_post()
+    return opt
+
+
+@pytest.mark.parametrize("weights", [{}, {"eat0": 5, "fork1": -2}, {"think0": -1, "left1": 3}])
+def test_branch_and_bound_matches_full_enumeration(weights):
+    opt = as_optimizer(philosophers(3))
+    _, expected, _, _, _ = opt.optimize_marking(weights)
+
+    marking, value, _, _, _ = opt.optimize_branch_and_bound(weights)
+    assert value == expected
+    assert sum(weights.get(p, 1) * marking[p] for p in opt.places) == value
+
+
+def test_branch_and_bound_on_weighted_ring():
+    opt = as_optimizer(token_ring(5, 3))
+    weights = {"r3": 4, "r0": -1}
+    assert opt.optimize_branch_and_bound(weights)[1] == opt.optimize_marking(weights)[1]
+
+
+def test_branch_and_bound_stops_at_state_equation_bound():
+    opt = as_optimizer(token_ring(8, 1))
+    weights = {p: 0 for p in opt.places}
+    weights["r1"] = 10
+    total = len(opt.bfs()[0])
+
+    marking, value, explored, _, _ = opt.optimize_branch_and_bound(weights)
+    assert value == 10 and marking["r1"] == 1
+    assert explored == 2 < total
+
+
+def test_branch_and_bound_with_isolated_place():
+    opt = OptimizationReachability()
+    opt.places = {"a": {"name": "a", "initial": 1}, "b": {"name": "b", "initial": 0},
+                  "iso": {"name": "iso", "initial": 0}}
+    opt.transitions = {"t": "t"}
+    opt.arcs = [("a", "t"), ("t", "b")]
+    opt.build_pre_post()
+
+    marking, value, _, _, _ = opt.optimize_branch_and_bound({})
+    assert value == 1 and marking["iso"] == 0
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_branch_and_bound_matches_enumeration_on_random_nets(seed):
+    net = random_net(seed)
+    net.places["iso"] = {"name": "iso", "initial": 0}
+    opt = as_optimizer(net)
+    rng = random.Random(seed)
+    weights = {p: rng.randint(-3, 3) for p in opt.places if rng.random() < 0.7}
+    assert opt.optimize_branch_and_bound(weights)[1] == opt.optimize_marking(weights)[1]
+
+
+OBJECTIVES = [{}, {"eat0": 5, "fork1": -2}, {"think0": -1, "left1": 3}, {p: 0 for p in ("fork0", "fork1")}]
+
+
+@pytest.mark.parametrize("engine", ["bfs", "bfs_vectorized"])
+def test_batch_matches_single_objective(engine):
+    opt = as_optimizer(philosophers(3))
+    reachable = getattr(opt, engine)()
+
+    values, markings, total, _, _ = opt.optimize_batch(OBJECTIVES, reachable, chunk_size=5)
+    assert total == len(reachable[0])
+    for weights, value, marking in zip(OBJECTIVES, values, markings):
+        assert value == opt.optimize_marking(weights, reachable)[1]
+        assert sum(weights.get(p, 1) * marking[p] for p in opt.places) == value
+
+
+def test_batch_values_are_exact_above_float_precision():
+    opt = as_optimizer(philosophers(2))
+    reachable = opt.bfs()
+    big = 2 ** 53 + 1  # không biểu diễn được bằng float64
+    objectives = [{p: big for p in opt.places}, {"eat0": -big, "think0": big + 2}]
+
+    values, markings, _, _, _ = opt.optimize_batch(objectives, reachable)
+    assert values.dtype == np.int64
+    for weights, value, marking in zip(objectives, values, markings):
+        exact = max(sum(weights.get(p, 1) * m[p] for p in opt.places) for m in reachable[0])
+        assert int(value) == exact
+        assert sum(weights.get(p, 1) * marking[p] for p in opt.places) == exact
+
+
+def test_load_objectives(tmp_path):
+    opt = as_optimizer(philosophers(2))
+    path = tmp_path / "weights.txt"
+    path.write_text("eat0=2 fork1=-1  # trọng số\n\n# chỉ chú thích\nthink1=3\n", encoding="utf-8")
+    assert load_objectives(str(path), opt.places) == [{"eat0": 2, "fork1": -1}, {"think1": 3}]
+
+    path.write_text("eat0=2\nnope=1\n", encoding="utf-8")
+    with pytest.raises(ValueError, match=":2:"):
+        load_objectives(str(path), opt.places)
+
+
+def test_cli_weights_file_uses_load_objectives(tmp_path, capsys):
+    session = AnalysisSession(philosophers(2))
+    path = tmp_path / "weights.txt"
+    path.write_text("eat0=2 fork1=-1\nthink1=x\n", encoding="utf-8")
+    optimize_from_file(session, str(path))
+    out = capsys.readouterr().out
+    assert "weights.txt:2: trọng số không hợp lệ 'think1=x'" in out and "objective(s)" not in out
+
+    path.write_text("eat0=2  # chú thích\n\nthink1=3\n", encoding="utf-8")
+    optimize_from_file(session, str(path))
+    assert "2 objective(s)" in capsys.readouterr().out
@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pnml_parser import PetriNet  # noqa: E402
+from tests.test_explicit_engines import EXAMPLES  # noqa: E402
+
+MULTI_PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<pnml xmlns="http://www.pnml.org/version-2009/grammar/pnml">
+  <net id="n" type="http://www.pnml.org/version-2009/grammar/ptnet">
+    <place id="ignored"><initialMarking><text>9</text></initialMarking></place>
+    <page id="a">
+      <place id="p1"><name><text> Start </text></name><initialMarking><text>2</text></initialMarking></place>
+      <place><name><text>no id</text></name></place>
+      <transition id="t1"><name><text>Go</text></name></transition>
+      <transition><name><text>no id</text></name></transition>
+      <arc id="a1" source="p1" target="t1"><inscription><text>2</text></inscription></arc>
+      <arc id="a2" source="p1"/>
+      <page id="nested"><place id="deep"/></page>
+    </page>
+    <page id="b">
+      <place id="p2"><initialMarking><text>x</text></initialMarking></place>
+      <transition id="t2"/>
+      <arc id="a3" source="t1" target="p2"><inscription><text>1</text></inscription></arc>
+      <arc id="a4" source="p2" target="t2"/>
+    </page>
+  </net>
+</pnml>
+"""
+
+NO_PAGE = """<pnml><net id="n">
+  <place id="p"><initialMarking><text>1</text></initialMarking></place>
+  <transition id="t"/>
+  <arc id="a" source="p" target="t"><inscription><text>3</text></inscription></arc>
+</net></pnml>
+"""
+
+
+def parse_both(path):
+    nets = []
+    for streaming in (False, True):
+        net = PetriNet()
+        assert net.parse_pnml(str(path), streaming=streaming)
+        nets.append((net.places, net.transitions, net.arcs, net.arc_weights))
+    return nets
+
+
+@pytest.mark.parametrize("name", sorted(os.listdir(EXAMPLES)))
+def test_stream_matches_xmltodict_on_examples(name):
+    dict_result, stream_result = parse_both(os.path.join(EXAMPLES, name))
+    assert stream_result == dict_result
+
+
+def test_multi_page(tmp_path):
+    path = tmp_path / "multi.pnml"
+    path.write_text(MULTI_PAGE, encoding="utf-8")
+    dict_result, stream_result = parse_both(path)
+    assert stream_result == dict_result
+
+    places, transitions, arcs, weights = stream_result
+    assert places == {"p1": {"name": "Start", "initial": 2}, "p2": {"name": "p2", "initial": 0}}
+    assert transitions == {"t1": "Go", "t2": "t2"}
+    assert arcs == [("p1", "t1"), ("t1", "p2"), ("p2", "t2")]
+    assert weights == {("p1", "t1"): 2}
+
+
+def test_without_page(tmp_path):
+    path = tmp_path / "flat.pnml"
+    path.write_text(NO_PAGE, encoding="utf-8")
+    dict_result, stream_result = parse_both(path)
+    assert stream_result == dict_result
+    assert stream_result[3] == {("p", "t"): 3}
+
+
+def test_malformed_file(tmp_path):
+    path = tmp_path / "broken.pnml"
+    path.write_text("<pnml><net id='n'><place id='p'></net>", encoding="utf-8")
+    net = PetriNet()
+    assert net.parse_pnml(str(path)) is False
+    assert net.places == {}
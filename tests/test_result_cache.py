@@ -0,0 +1,98 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from reachability_bdd import SymbolicReachabilityPyEDA  # noqa: E402
+from result_cache import ResultCache, net_key  # noqa: E402
+from net_generators import philosophers, token_ring  # noqa: E402
+
+
+def test_net_key_ignores_names_but_not_structure():
+    a, b = philosophers(2), philosophers(2)
+    b.places["fork0"]["name"] = "renamed"
+    assert net_key(a) == net_key(b)
+    b.places["fork0"]["initial"] = 2
+    assert net_key(a) != net_key(b)
+
+
+@pytest.mark.parametrize("backend", ["pyeda", "array"])
+def test_second_session_reads_everything_from_cache(tmp_path, backend, session_for, counting):
+    cache = ResultCache(str(tmp_path))
+    first = session_for(philosophers(2), backend, cache)
+    markings, _, _ = first.explicit()
+    count, _, _, _ = first.symbolic()
+    deadlock = first.detect_deadlock("symbolic")
+    optimum = first.optimize({"think0": 2})
+    dead_count = first.deadlock_detector().detect_all_deadlocks(max_samples=None)[0]
+
+    bfs_calls = counting(type(first.net), "bfs")
+    fixpoint_calls = counting(SymbolicReachabilityPyEDA, "reachable_fixpoint")
+    second = session_for(philosophers(2), backend, cache)
+    assert list(second.explicit()[0]) == list(markings)
+    assert second.symbolic()[0] == count
+    assert second.symbolic_net().count_states(second.reachable_bdd()) == count
+    assert second.detect_deadlock("symbolic") == deadlock
+    assert second.optimize({"think0": 2}) == optimum
+    # tập reachable BDD dựng lại từ cache dùng được cho truy vấn mới
+    assert second.deadlock_detector().detect_all_deadlocks(max_samples=None)[0] == dead_count
+    assert bfs_calls == [] and fixpoint_calls == []
+    # thời gian, bộ nhớ của kết quả lấy từ cache không phải vừa đo
+    for task in ("explicit", "symbolic", "deadlock", "optimize"):
+        assert not first.from_cache(task) and second.from_cache(task)
+
+
+def test_engine_version_change_invalidates(tmp_path):
+    net = token_ring(3, 2)
+    ResultCache(str(tmp_path)).put(net, "explicit", "old")
+    assert ResultCache(str(tmp_path)).get(net, "explicit") == "old"
+
+    newer = ResultCache(str(tmp_path), engine_version=-1)
+    assert newer.get(net, "explicit") is None
+    assert len(newer) == 0
+
+
+@pytest.mark.parametrize("payload", [
+    b"cno_such_module\nThing\n.",   # ModuleNotFoundError
+    b"cos\nno_such_attr\n.",        # AttributeError: class đã bị đổi tên
+    b"I1\n.",                        # không phải (version, value)
+    b"\x80\x05garbage",             # UnpicklingError
+])
+def test_unreadable_entry_is_a_miss_and_removed(tmp_path, payload):
+    net = token_ring(3, 2)
+    cache = ResultCache(str(tmp_path))
+    path = cache._path(net_key(net), "explicit")
+    with open(path, 'wb') as f:
+        f.write(payload)
+    assert cache.get(net, "explicit") is None
+    assert cache.misses == 1 and not os.path.exists(path)
+
+
+def test_invalidate_by_net_and_kind(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    a, b = token_ring(3, 1), token_ring(4, 1)
+    for net in (a, b):
+        cache.put(net, "explicit", 1)
+        cache.put(net, "optimize-x", 2)
+    assert cache.invalidate(a, "optimize-x") == 1
+    assert cache.get(a, "explicit") == 1 and cache.get(a, "optimize-x") is None
+    assert cache.invalidate(b) == 2
+    assert cache.invalidate() == 1
+    assert len(cache) == 0
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10 ** 9)
+    nets = [token_ring(n, 1) for n in (3, 4, 5)]
+    for i, net in enumerate(nets):
+        cache.put(net, "explicit", b"x" * 1000)
+        os.utime(cache._path(net_key(net), "explicit"), (i, i))
+    cache.get(nets[0], "explicit")   # nets[0] vừa được dùng -> mới nhất
+
+    cache.max_bytes = 2500
+    assert cache.evict() == 1
+    assert cache.get(nets[1], "explicit") is None
+    assert cache.get(nets[0], "explicit") is not None
+    assert cache.get(nets[2], "explicit") is not None
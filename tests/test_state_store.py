@@ -0,0 +1,65 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from state_store import PackedStateStore  # noqa: E402
+
+
+def test_add_and_find():
+    store = PackedStateStore(["a", "b"], {"a": 1, "b": 1})
+    assert store.add((1, 0)) == (0, True)
+    assert store.add((0, 1)) == (1, True)
+    assert store.add((1, 0)) == (0, False)
+    assert len(store) == 2
+    assert store.find((0, 1)) == 1
+    assert store.find((1, 1)) is None
+    assert (1, 0) in store
+    assert store[1] == {"a": 0, "b": 1}
+
+
+def test_widen_keeps_existing_markings():
+    store = PackedStateStore(["a", "b"], {"a": 1, "b": 1})
+    store.add((1, 0))
+    store.add((0, 1))
+    version = store.layout_version
+
+    assert store.find((5, 0)) is None
+    assert store.add((5, 0)) == (2, True)
+    assert store.layout_version > version
+    assert list(store.tuples()) == [(1, 0), (0, 1), (5, 0)]
+    assert store.find((1, 0)) == 0
+    assert store.find((0, 1)) == 1
+
+
+def test_index_grows_past_initial_capacity():
+    store = PackedStateStore(["a", "b"], {"a": 255, "b": 255}, initial_capacity=4)
+    start = len(store.index)
+    markings = [(i % 256, i // 256) for i in range(1000)]
+    for m in markings:
+        store.add(m)
+
+    assert len(store) == 1000
+    assert len(store.index) > start
+    assert 2 * len(store) <= len(store.index)
+    assert all(store.find(m) == i for i, m in enumerate(markings))
+
+
+def test_slicing_returns_markings():
+    store = PackedStateStore(["a"], {"a": 7})
+    for v in range(6):
+        store.add((v,))
+
+    assert store[:2] == [{"a": 0}, {"a": 1}]
+    assert store[-2:] == [{"a": 4}, {"a": 5}]
+    assert store[::2] == [{"a": 0}, {"a": 2}, {"a": 4}]
+    assert store[-1] == {"a": 5}
+
+
+def test_iter_chunks_matches_tuples():
+    store = PackedStateStore(["a", "b", "c"], {"a": 1, "b": 300, "c": 7})
+    for i in range(50):
+        store.add((i % 2, i * 6, i % 8))
+    blocks = list(store.iter_chunks(chunk_size=16))
+    assert [len(b) for b in blocks] == [16, 16, 16, 2]
+    assert [tuple(row) for b in blocks for row in b.tolist()] == list(store.tuples())